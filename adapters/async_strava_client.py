@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+import aiohttp
+
+from adapters.strava_budget import PRIORITY_HIGH, BudgetExhausted, StravaBudget, acquire_timeout, get_default_budget
+from adapters.strava_client import StravaClient
+from adapters.strava_transport import (
+    BACKOFF_BASE,
+    BACKOFF_MAX,
+    CONNECT_TIMEOUT,
+    MAX_RETRIES,
+    POOL_SIZE,
+    READ_TIMEOUT,
+    RETRY_STATUS,
+    RateLimitState,
+    backoff_delay,
+)
+
+logger = logging.getLogger(__name__)
+
+# intervalo com que um pedido na fila do StravaBudget é reavaliado no event loop
+BUDGET_POLL_SECONDS = 0.05
+
+
+def create_session(pool_size: int = POOL_SIZE, connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT) -> aiohttp.ClientSession:
+    """Sessão aiohttp com pool de conexões e os mesmos timeouts do StravaTransport; criar dentro do event loop."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=pool_size),
+        timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+    )
+
+
+class AsyncStravaClient:
+    """
+    Busca de atividades do StravaClient em asyncio, para o sync do runtime
+    assíncrono: retry com backoff para 5xx e 429 e o mesmo StravaBudget global,
+    de modo que chamadas dos dois runtimes dividem o orçamento. A renovação de
+    token continua no StravaClient, sob o lock por atleta do StravaTokenCache.
+
+    Erros HTTP sobem como aiohttp.ClientResponseError (status em .status).
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        base_url: Optional[str] = None,
+        budget: Optional[StravaBudget] = None,
+        group_id: Optional[int] = None,
+        rate_limit: Optional[RateLimitState] = None,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+        deadline: Optional[float] = None,
+    ):
+        self.session = session
+        self.base_url = base_url or StravaClient.BASE_URL
+        self.budget = budget or get_default_budget()
+        self.group_id = group_id
+        self.rate_limit = rate_limit or RateLimitState()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+
+    async def _acquire(self, priority: int) -> None:
+        """
+        Reserva orçamento sem bloquear o event loop nem ocupar threads: o pedido
+        é reavaliado periodicamente até ser atendido ou vencer acquire_timeout
+        (BudgetExhausted). Timeout ou cancelamento tiram o pedido da fila.
+        """
+        ticket = self.budget.submit(self.group_id, priority)
+        deadline = time.monotonic() + acquire_timeout(priority, self.deadline)
+        try:
+            while not ticket.granted:
+                if time.monotonic() >= deadline:
+                    raise BudgetExhausted(f"Sem orçamento do Strava para o grupo {self.group_id}")
+                await asyncio.sleep(BUDGET_POLL_SECONDS)
+                self.budget.tick()
+        except BaseException:
+            self.budget.cancel(ticket)
+            raise
+
+    async def _request(self, method: str, url: str, priority: int = PRIORITY_HIGH, **kwargs):
+        """
+        Executa a requisição com retry, reservando orçamento antes de cada tentativa.
+        Returns:
+            JSON da resposta de sucesso
+        """
+        attempt = 0
+        while True:
+            await self._acquire(priority)
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    self.rate_limit.update(response.headers)
+                    if response.status not in RETRY_STATUS or attempt >= self.max_retries:
+                        self.budget.observe(self.rate_limit)
+                        response.raise_for_status()
+                        return await response.json()
+                    delay = backoff_delay(attempt, response.headers.get("Retry-After"), self.backoff_base, self.backoff_max)
+                    logger.warning("Strava respondeu %s, tentando novamente em %.2fs", response.status, delay)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, backoff_base=self.backoff_base, backoff_max=self.backoff_max)
+                logger.warning("Falha de conexão com o Strava (%s), tentando novamente em %.2fs", e, delay)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def fetch_activities(self, access_token: str, after: datetime, page: int = 1, per_page: int = 200, priority: int = PRIORITY_HIGH) -> list[dict]:
+        """Mesmo contrato de StravaClient.fetch_activities."""
+        params = {
+            "after": int(after.timestamp()),
+            "per_page": per_page,
+            "page": page
+        }
+        logger.info("Buscando atividades do Strava após %s (página %d)", after, page)
+        data = await self._request(
+            "GET", f"{self.base_url}/athlete/activities", priority=priority,
+            headers={"Authorization": f"Bearer {access_token}"}, params=params
+        )
+        logger.info("Recebidas %d atividades do Strava", len(data))
+        return data
@@ -0,0 +1,236 @@
+import itertools
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from adapters.strava_transport import RateLimitState
+
+logger = logging.getLogger(__name__)
+
+SHORT_LIMIT = 100
+DAILY_LIMIT = 1000
+SHORT_WINDOW_SECONDS = 15 * 60
+DAILY_WINDOW_SECONDS = 24 * 60 * 60
+LOW_PRIORITY_RESERVE = 0.2
+MAX_WAIT_SECONDS = 1.0
+# quanto uma chamada espera na fila antes de BudgetExhausted; a espera pela
+# virada da janela pode levar horas e nunca deve prender um thread
+HIGH_PRIORITY_TIMEOUT = 5.0
+LOW_PRIORITY_TIMEOUT = 60.0
+
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 1
+
+
+def acquire_timeout(priority: int, deadline: Optional[float] = None) -> float:
+    """
+    Timeout de espera por orçamento: poucos segundos para PRIORITY_HIGH e, para
+    backfill, o tempo que resta até deadline (time.monotonic(), ex.: o fim da
+    lease de sync), nunca passando de deadline.
+    """
+    remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+    if priority == PRIORITY_LOW:
+        return LOW_PRIORITY_TIMEOUT if remaining is None else remaining
+    return HIGH_PRIORITY_TIMEOUT if remaining is None else min(HIGH_PRIORITY_TIMEOUT, remaining)
+
+
+class BudgetExhausted(Exception):
+    """Não houve orçamento de requisições disponível dentro do timeout."""
+
+
+class _Ticket:
+    def __init__(self, group_id, priority: int):
+        self.group_id = group_id
+        self.priority = priority
+        self.granted_seq: Optional[int] = None
+
+    @property
+    def granted(self) -> bool:
+        return self.granted_seq is not None
+
+
+class StravaBudget:
+    """
+    Orçamento global de requisições ao Strava, compartilhado por todos os grupos.
+
+    Segue as janelas fixas do Strava (15 minutos e diária, em UTC). Cada
+    chamada reserva uma unidade; os pedidos ficam em filas por grupo e são
+    atendidos em round-robin ponderado. Pedidos de baixa prioridade (backfill)
+    só são atendidos enquanto sobrar mais que LOW_PRIORITY_RESERVE da janela.
+    """
+
+    def __init__(
+        self,
+        short_limit: int = SHORT_LIMIT,
+        daily_limit: int = DAILY_LIMIT,
+        low_priority_reserve: float = LOW_PRIORITY_RESERVE,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.short_limit = short_limit
+        self.daily_limit = daily_limit
+        self.low_priority_reserve = low_priority_reserve
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._short_window = self._daily_window = None
+        self._short_used = self._daily_used = 0
+        self._queues: dict = {}
+        self._weights: dict = {}
+        self._rotation: deque = deque()
+        self._credit = 0
+
+    def set_weight(self, group_id, weight: int) -> None:
+        """Quantas requisições seguidas o grupo recebe por rodada do round-robin."""
+        with self._cond:
+            self._weights[group_id] = max(1, int(weight))
+
+    def _roll_windows(self) -> None:
+        now = self.clock()
+        short_window = int(now // SHORT_WINDOW_SECONDS)
+        daily_window = int(now // DAILY_WINDOW_SECONDS)
+        if short_window != self._short_window:
+            self._short_window, self._short_used = short_window, 0
+        if daily_window != self._daily_window:
+            self._daily_window, self._daily_used = daily_window, 0
+
+    def _remaining(self) -> tuple[int, int]:
+        return self.short_limit - self._short_used, self.daily_limit - self._daily_used
+
+    def _allows(self, priority: int) -> bool:
+        short_remaining, daily_remaining = self._remaining()
+        if priority == PRIORITY_LOW:
+            return (
+                short_remaining > math.ceil(self.short_limit * self.low_priority_reserve)
+                and daily_remaining > math.ceil(self.daily_limit * self.low_priority_reserve)
+            )
+        return short_remaining > 0 and daily_remaining > 0
+
+    def _next_ticket(self, group_id) -> Optional[_Ticket]:
+        high, low = self._queues[group_id]
+        if high and self._allows(PRIORITY_HIGH):
+            return high.popleft()
+        if not high and low and self._allows(PRIORITY_LOW):
+            return low.popleft()
+        return None
+
+    def _dispatch(self) -> None:
+        """Concede orçamento às filas em round-robin ponderado enquanto houver capacidade."""
+        self._roll_windows()
+        skipped = 0
+        while self._rotation and skipped < len(self._rotation) and self._allows(PRIORITY_HIGH):
+            group_id = self._rotation[0]
+            if self._credit <= 0:
+                self._credit = self._weights.get(group_id, 1)
+            ticket = self._next_ticket(group_id)
+            if not ticket:
+                # grupo só tem backfill e o orçamento está baixo: adia e tenta o próximo
+                self._rotation.rotate(-1)
+                self._credit = 0
+                skipped += 1
+                continue
+
+            skipped = 0
+            ticket.granted_seq = next(self._seq)
+            self._short_used += 1
+            self._daily_used += 1
+            self._credit -= 1
+            high, low = self._queues[group_id]
+            if not high and not low:
+                del self._queues[group_id]
+                self._rotation.popleft()
+                self._credit = 0
+            elif self._credit <= 0:
+                self._rotation.rotate(-1)
+        self._cond.notify_all()
+
+    def submit(self, group_id, priority: int = PRIORITY_HIGH) -> _Ticket:
+        """Enfileira um pedido de orçamento sem bloquear."""
+        ticket = _Ticket(group_id, priority)
+        with self._cond:
+            if group_id not in self._queues:
+                self._queues[group_id] = (deque(), deque())
+                self._rotation.append(group_id)
+            self._queues[group_id][1 if priority == PRIORITY_LOW else 0].append(ticket)
+            self._dispatch()
+        return ticket
+
+    def _cancel(self, ticket: _Ticket) -> None:
+        queues = self._queues.get(ticket.group_id)
+        if not queues:
+            return
+        for queue in queues:
+            if ticket in queue:
+                queue.remove(ticket)
+        if not any(queues):
+            del self._queues[ticket.group_id]
+            self._rotation.remove(ticket.group_id)
+
+    def cancel(self, ticket: _Ticket) -> None:
+        """Tira da fila um pedido ainda não atendido (ex.: quem esperava desistiu)."""
+        with self._cond:
+            if not ticket.granted:
+                self._cancel(ticket)
+
+    def wait(self, ticket: _Ticket, timeout: Optional[float] = None) -> None:
+        """Bloqueia até o pedido ser atendido ou levanta BudgetExhausted no timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not ticket.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._cancel(ticket)
+                    raise BudgetExhausted(f"Sem orçamento do Strava para o grupo {ticket.group_id}")
+                self._cond.wait(MAX_WAIT_SECONDS if remaining is None else min(remaining, MAX_WAIT_SECONDS))
+                self._dispatch()
+
+    def acquire(self, group_id, priority: int = PRIORITY_HIGH, timeout: Optional[float] = None) -> None:
+        """Reserva uma requisição para o grupo, esperando na fila se necessário."""
+        self.wait(self.submit(group_id, priority), timeout)
+
+    def tick(self) -> None:
+        """Reavalia as filas (ex.: após a virada de uma janela)."""
+        with self._cond:
+            self._dispatch()
+
+    def observe(self, rate_limit: RateLimitState) -> None:
+        """
+        Reconcilia o consumo local com o informado pelo Strava nos headers,
+        que também contabiliza chamadas feitas fora deste processo.
+        """
+        with self._cond:
+            self._roll_windows()
+            if rate_limit.short_limit:
+                self.short_limit = rate_limit.short_limit
+            if rate_limit.daily_limit:
+                self.daily_limit = rate_limit.daily_limit
+            if rate_limit.short_usage is not None:
+                self._short_used = max(self._short_used, rate_limit.short_usage)
+            if rate_limit.daily_usage is not None:
+                self._daily_used = max(self._daily_used, rate_limit.daily_usage)
+
+    def headroom(self) -> dict:
+        """Capacidade restante nas janelas e quantidade de pedidos na fila."""
+        with self._cond:
+            self._roll_windows()
+            short_remaining, daily_remaining = self._remaining()
+            return {
+                "short_remaining": max(short_remaining, 0),
+                "daily_remaining": max(daily_remaining, 0),
+                "queued": sum(len(high) + len(low) for high, low in self._queues.values()),
+            }
+
+
+_default_budget: Optional[StravaBudget] = None
+_default_budget_lock = threading.Lock()
+
+
+def get_default_budget() -> StravaBudget:
+    """Orçamento compartilhado por todas as instâncias de StravaClient."""
+    global _default_budget
+    with _default_budget_lock:
+        if _default_budget is None:
+            _default_budget = StravaBudget()
+        return _default_budget
@@ -1,7 +1,9 @@
 import logging
-import requests
 from datetime import datetime
+from typing import Optional
 
+from adapters.strava_budget import PRIORITY_HIGH, StravaBudget, acquire_timeout, get_default_budget
+from adapters.strava_transport import RateLimitState, StravaTransport, get_default_transport
 from config import STRAVA_CLIENT_ID, STRAVA_CLIENT_SECRET
 
 logger = logging.getLogger(__name__)
@@ -9,13 +11,56 @@ logger = logging.getLogger(__name__)
 
 class StravaClient:
     BASE_URL = "https://www.strava.com/api/v3"
+    OAUTH_URL = "https://www.strava.com/oauth/token"
 
-    def fetch_activities(self, access_token: str, after: datetime) -> list[dict]:
+    def __init__(
+        self,
+        transport: Optional[StravaTransport] = None,
+        base_url: Optional[str] = None,
+        oauth_url: Optional[str] = None,
+        budget: Optional[StravaBudget] = None,
+        group_id: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ):
+        """
+        Args:
+            deadline (float): time.monotonic() até quando as chamadas podem esperar
+                por orçamento (ex.: fim da lease do sync); ver acquire_timeout
+        """
+        self.transport = transport or get_default_transport()
+        self.base_url = base_url or self.BASE_URL
+        self.oauth_url = oauth_url or self.OAUTH_URL
+        self.budget = budget or get_default_budget()
+        self.group_id = group_id
+        self.deadline = deadline
+
+    def _request(self, method: str, url: str, priority: int = PRIORITY_HIGH, **kwargs):
+        """
+        Executa a requisição reservando orçamento global antes de cada tentativa.
+        Levanta BudgetExhausted se o orçamento não vier dentro de acquire_timeout.
+        """
+        response = self.transport.request(
+            method,
+            url,
+            on_attempt=lambda: self.budget.acquire(self.group_id, priority, acquire_timeout(priority, self.deadline)),
+            **kwargs
+        )
+        self.budget.observe(self.transport.rate_limit)
+        return response
+
+    @property
+    def rate_limit(self) -> RateLimitState:
+        """Último uso/limite de requisições informado pelo Strava."""
+        return self.transport.rate_limit
+
+    def fetch_activities(self, access_token: str, after: datetime, page: int = 1, per_page: int = 200, priority: int = PRIORITY_HIGH) -> list[dict]:
         """
         Busca atividades do Strava com base no access_token fornecido.
         :param access_token: Token de acesso do usuário Strava
         :param after: Data a partir da qual buscar atividades
+        :param page: Página a ser buscada (começa em 1)
         :param per_page: Número de atividades por página (max 200)
+        :param priority: Prioridade no orçamento global (PRIORITY_LOW para backfill)
         :return: Lista de atividades
         """
         headers = {
@@ -24,20 +69,37 @@ class StravaClient:
 
         after_timestamp = int(after.timestamp())
 
-        url = f"{self.BASE_URL}/athlete/activities"
+        url = f"{self.base_url}/athlete/activities"
         params = {
             "after": after_timestamp,
-            "per_page": 50,
-            "page": 1
+            "per_page": per_page,
+            "page": page
         }
 
-        logger.info("Buscando atividades do Strava após %s", after)
-        response = requests.get(url, headers=headers, params=params, timeout=40)
+        logger.info("Buscando atividades do Strava após %s (página %d)", after, page)
+        response = self._request("GET", url, priority=priority, headers=headers, params=params)
         response.raise_for_status()
         data = response.json()
         logger.info("Recebidas %d atividades do Strava", len(data))
         return data
   
+    def fetch_activity(self, access_token: str, activity_id: int) -> dict:
+        """
+        Busca uma única atividade pelo ID (usado na ingestão via webhook).
+        :param access_token: Token de acesso do dono da atividade
+        :param activity_id: ID da atividade no Strava
+        :return: Atividade detalhada
+        """
+        headers = {
+            "Authorization": f"Bearer {access_token}"
+        }
+        url = f"{self.base_url}/activities/{activity_id}"
+
+        logger.info("Buscando atividade %s do Strava", activity_id)
+        response = self._request("GET", url, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
     def refresh_access_token(self, refresh_token):
         """
         Atualiza token do usuário
@@ -45,7 +107,7 @@ class StravaClient:
             user (str): usuario
             refresh_token (str): refresh token
         """
-        url = "https://www.strava.com/oauth/token"
+        url = self.oauth_url
         params = {
             "client_id": STRAVA_CLIENT_ID,
             "client_secret": STRAVA_CLIENT_SECRET,
@@ -53,8 +115,7 @@ class StravaClient:
             "grant_type": "refresh_token",
         }
         logger.info("Renovando access token do Strava")
-        response = requests.post(url, params=params, timeout=40)
+        response = self._request("POST", url, params=params)
         response.raise_for_status()
         logger.info("Token renovado com sucesso")
         return response.json()
-        
\ No newline at end of file
@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+REFRESH_MARGIN_SECONDS = 10 * 60
+BATCH_HORIZON_SECONDS = 30 * 60
+STAGGER_SECONDS = 0.5
+
+
+class StravaTokenCache:
+    """
+    Cache de tokens do Strava por athlete_id.
+
+    Guarda access_token, refresh_token e expires_at de cada atleta e renova o
+    token antes de expirar. A renovação acontece sob um lock por atleta, então
+    syncs concorrentes (de grupos diferentes) nunca renovam o mesmo token duas vezes.
+    """
+
+    def __init__(self, margin_seconds: float = REFRESH_MARGIN_SECONDS, clock: Callable[[], float] = time.time):
+        self.margin_seconds = margin_seconds
+        self.clock = clock
+        self._tokens: dict = {}
+        self._locks: dict = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _tokens_from(member_data: dict) -> dict:
+        return {
+            "access_token": member_data.get("access_token"),
+            "refresh_token": member_data.get("refresh_token"),
+            "expires_at": member_data.get("expires_at"),
+        }
+
+    def _lock_for(self, athlete_id) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(athlete_id, threading.Lock())
+
+    def current(self, athlete_id, member_data: dict) -> dict:
+        """Tokens mais recentes entre o cache e os dados do membro."""
+        tokens = self._tokens_from(member_data)
+        cached = self._tokens.get(athlete_id) if athlete_id is not None else None
+        if cached and (cached["expires_at"] or 0) > (tokens["expires_at"] or 0):
+            return dict(cached)
+        return tokens
+
+    def expires_within(self, tokens: dict, seconds: float) -> bool:
+        """Tokens sem expires_at (legado) só são renovados após um 401."""
+        expires_at = tokens.get("expires_at")
+        return expires_at is not None and expires_at - self.clock() <= seconds
+
+    def _refresh(self, athlete_id, member_data: dict, strava_client, should_refresh) -> tuple[dict, bool]:
+        lock = self._lock_for(athlete_id) if athlete_id is not None else threading.Lock()
+        with lock:
+            tokens = self.current(athlete_id, member_data)
+            if not should_refresh(tokens):
+                return tokens, False
+
+            response = strava_client.refresh_access_token(tokens["refresh_token"])
+            tokens = {
+                "access_token": response["access_token"],
+                "refresh_token": response["refresh_token"],
+                "expires_at": response.get("expires_at"),
+            }
+            if athlete_id is not None:
+                self._tokens[athlete_id] = tokens
+            logger.info("Token do atleta %s renovado (expira em %s)", athlete_id, tokens["expires_at"])
+            return dict(tokens), True
+
+    def get_valid(self, athlete_id, member_data: dict, strava_client) -> tuple[dict, bool]:
+        """
+        Retorna tokens válidos, renovando se expirarem dentro da margem.
+        Returns:
+            tuple: tokens e se houve chamada de renovação ao Strava
+        """
+        return self._refresh(
+            athlete_id, member_data, strava_client,
+            lambda tokens: self.expires_within(tokens, self.margin_seconds)
+        )
+
+    def force_refresh(self, athlete_id, member_data: dict, strava_client) -> tuple[dict, bool]:
+        """
+        Renova após um 401. Se outro sync já trocou o access_token rejeitado,
+        reaproveita o novo em vez de renovar de novo.
+        """
+        rejected = member_data.get("access_token")
+        return self._refresh(
+            athlete_id, member_data, strava_client,
+            lambda tokens: tokens["access_token"] == rejected
+        )
+
+    def refresh_batch(
+        self,
+        members: list[tuple],
+        strava_client,
+        horizon_seconds: float = BATCH_HORIZON_SECONDS,
+        stagger_seconds: float = STAGGER_SECONDS,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> dict:
+        """
+        Renova, de forma escalonada, todos os tokens que expiram dentro do horizonte.
+        Args:
+            members (list): pares (athlete_id, member_data)
+        Returns:
+            dict: athlete_id -> tokens renovados
+        """
+        expiring = [
+            (athlete_id, member_data) for athlete_id, member_data in members
+            if self.expires_within(self.current(athlete_id, member_data), horizon_seconds)
+        ]
+        expiring.sort(key=lambda item: self.current(*item)["expires_at"])
+
+        refreshed = {}
+        for index, (athlete_id, member_data) in enumerate(expiring):
+            if index and stagger_seconds:
+                sleep(stagger_seconds)
+            try:
+                tokens, called = self._refresh(
+                    athlete_id, member_data, strava_client,
+                    lambda tokens: self.expires_within(tokens, horizon_seconds)
+                )
+            except Exception as e:
+                logger.error("Erro ao renovar token do atleta %s: %s", athlete_id, e)
+                continue
+            if called or tokens["access_token"] != member_data.get("access_token"):
+                refreshed[athlete_id] = tokens
+        return refreshed
+
+
+default_token_cache = StravaTokenCache()
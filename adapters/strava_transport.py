@@ -0,0 +1,156 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = 16
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None, backoff_base: float = BACKOFF_BASE, backoff_max: float = BACKOFF_MAX) -> float:
+    """
+    Tempo de espera antes da próxima tentativa. Respeita o Retry-After
+    quando presente, senão usa backoff exponencial com full jitter.
+    """
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), backoff_max)
+    return random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+
+
+class RateLimitState:
+    """
+    Último estado de rate limit informado pelo Strava nos headers
+    X-RateLimit-Limit e X-RateLimit-Usage ("15min,diário").
+    """
+
+    def __init__(self):
+        self.short_limit: Optional[int] = None
+        self.daily_limit: Optional[int] = None
+        self.short_usage: Optional[int] = None
+        self.daily_usage: Optional[int] = None
+        self.updated_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _parse(value: Optional[str]) -> Optional[tuple[int, int]]:
+        if not value:
+            return None
+        try:
+            short, daily = value.split(",")[:2]
+            return int(short), int(daily)
+        except ValueError:
+            logger.warning("Header de rate limit inválido: %s", value)
+            return None
+
+    def update(self, headers) -> None:
+        limit = self._parse(headers.get("X-RateLimit-Limit"))
+        usage = self._parse(headers.get("X-RateLimit-Usage"))
+        if not limit and not usage:
+            return
+
+        with self._lock:
+            if limit:
+                self.short_limit, self.daily_limit = limit
+            if usage:
+                self.short_usage, self.daily_usage = usage
+            self.updated_at = datetime.now()
+
+    @property
+    def short_remaining(self) -> Optional[int]:
+        if self.short_limit is None or self.short_usage is None:
+            return None
+        return max(self.short_limit - self.short_usage, 0)
+
+    @property
+    def daily_remaining(self) -> Optional[int]:
+        if self.daily_limit is None or self.daily_usage is None:
+            return None
+        return max(self.daily_limit - self.daily_usage, 0)
+
+
+class StravaTransport:
+    """
+    Camada HTTP do StravaClient: sessão com pool de conexões (keep-alive),
+    timeouts separados de conexão e leitura e retry com backoff exponencial
+    e jitter para respostas 5xx e 429.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = POOL_SIZE,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limit = RateLimitState()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        return backoff_delay(attempt, retry_after, self.backoff_base, self.backoff_max)
+
+    def request(self, method: str, url: str, on_attempt: Optional[Callable[[], None]] = None, **kwargs) -> requests.Response:
+        """
+        Executa a requisição com retry. Retorna a última resposta recebida,
+        cabe ao chamador chamar raise_for_status().
+        on_attempt é chamado antes de cada tentativa (ex.: reservar orçamento).
+        """
+        attempt = 0
+        while True:
+            if on_attempt:
+                on_attempt()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning("Falha de conexão com o Strava (%s), tentando novamente em %.2fs", e, delay)
+            else:
+                self.rate_limit.update(response.headers)
+                if response.status_code not in RETRY_STATUS or attempt >= self.max_retries:
+                    return response
+                delay = self.backoff(attempt, response)
+                logger.warning("Strava respondeu %s, tentando novamente em %.2fs", response.status_code, delay)
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+_default_transport: Optional[StravaTransport] = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> StravaTransport:
+    """Transporte compartilhado por todas as instâncias de StravaClient."""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = StravaTransport()
+        return _default_transport
@@ -0,0 +1,84 @@
+import json
+import logging
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PATH = "/strava/webhook"
+
+
+class StravaWebhookServer:
+    """
+    Endpoint HTTP para os webhooks do Strava.
+
+    GET valida a assinatura (hub.mode/hub.verify_token/hub.challenge) e POST
+    recebe os eventos, que são apenas enfileirados: o Strava exige resposta
+    200 em até 2 segundos, então a busca da atividade acontece fora do request.
+    """
+
+    def __init__(self, verify_token: str, events: queue.Queue, host: str = "0.0.0.0", port: int = 8080, path: str = WEBHOOK_PATH):
+        self.verify_token = verify_token
+        self.events = events
+        self.path = path
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def _handler(self):
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status: int, body: Optional[dict] = None):
+                payload = json.dumps(body or {}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != webhook.path:
+                    return self._reply(404)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if params.get("hub.mode") != "subscribe" or params.get("hub.verify_token") != webhook.verify_token:
+                    logger.warning("Validação de webhook do Strava recusada")
+                    return self._reply(403)
+                logger.info("Assinatura de webhook do Strava validada")
+                return self._reply(200, {"hub.challenge": params.get("hub.challenge")})
+
+            def do_POST(self):
+                if urlparse(self.path).path != webhook.path:
+                    return self._reply(404)
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    event = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return self._reply(400)
+                if not isinstance(event, dict):
+                    return self._reply(400)
+                webhook.events.put(event)
+                logger.debug("Evento do Strava enfileirado: %s", event)
+                return self._reply(200)
+
+            def log_message(self, format, *args):
+                logger.debug("Webhook Strava: " + format, *args)
+
+        return Handler
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.server.serve_forever, name="strava-webhook", daemon=True)
+        self._thread.start()
+        logger.info("Webhook do Strava escutando em %s", self.url)
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
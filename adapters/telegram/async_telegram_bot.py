@@ -0,0 +1,208 @@
+import asyncio
+import functools
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+import mongoengine
+from pymongo import AsyncMongoClient
+from telebot.util import quick_markup
+
+from adapters.async_strava_client import create_session
+from adapters.strava_webhook import StravaWebhookServer
+from adapters.telegram.async_update_dispatcher import AsyncDispatchingTeleBot
+from adapters.telegram.telegram_webhook import TelegramWebhookServer
+from application.async_sync import AsyncSyncer
+from application.commands.admin import handle_admin_callback, handle_admin_command, handle_reset_command
+from application.commands.frequency import handle_month_frequency_command, handle_year_frequency_command
+from application.commands.medal import handle_medal_command
+from application.commands.rank import (
+  RANK_FAILED,
+  RANK_PLACEHOLDER,
+  handle_rank_menu_async,
+  handle_rank_month_command_async,
+  handle_rank_year_command_async,
+  month_period,
+  year_period
+)
+from application.commands.streak import handle_max_streak_command, handle_streak_command
+from application.rebuild_rollups import ensure_rollups
+from application.sync_scheduler import default_scheduler
+from application.webhook_ingest import WebhookIngestor
+from infrastructure.mongo.async_repository import AsyncStravaRepository
+from infrastructure.mongo.index_check import check_indexes
+from infrastructure.mongo.strava_group import StravaGroup
+from config import (
+  MONGO_URI,
+  REDIRECT_URI,
+  STRAVA_CLIENT_ID,
+  STRAVA_WEBHOOK_PORT,
+  STRAVA_WEBHOOK_VERIFY_TOKEN,
+  TELEGRAM_MAX_BACKLOG,
+  TELEGRAM_MODE,
+  TELEGRAM_TOKEN,
+  TELEGRAM_WEBHOOK_PORT,
+  TELEGRAM_WEBHOOK_SECRET,
+  TELEGRAM_WEBHOOK_URL,
+  TELEGRAM_WORKERS
+)
+
+logger = logging.getLogger(__name__)
+
+# escritas, startup e comandos ainda síncronos usam os Documents do mongoengine
+mongoengine.connect(host=MONGO_URI)
+bot = AsyncDispatchingTeleBot(TELEGRAM_TOKEN, max_backlog=TELEGRAM_MAX_BACKLOG)
+# pool só dos comandos síncronos: as idas do AsyncSyncer a threads (lease,
+# gravação, renovação de token) usam o executor padrão e não os bloqueiam
+command_executor = ThreadPoolExecutor(max_workers=TELEGRAM_WORKERS, thread_name_prefix="telegram-command")
+
+# criados em run(), dentro do event loop
+repository: Optional[AsyncStravaRepository] = None
+syncer: Optional[AsyncSyncer] = None
+
+async def send_html(group_id: int, text: str):
+    await bot.send_message(group_id, text, parse_mode='HTML', disable_web_page_preview=True)
+
+async def run_command(handler, *args):
+    """Roda um comando ainda síncrono no command_executor (TELEGRAM_WORKERS threads), fora do event loop."""
+    return await asyncio.get_running_loop().run_in_executor(command_executor, functools.partial(handler, *args))
+
+async def send_threaded(group_id: int, handler, *args):
+    await send_html(group_id, await run_command(handler, group_id, *args))
+
+async def answer_in_place(call, render: Callable[[], Awaitable[str]]):
+    """Mesmo fluxo de telegram_bot.answer_in_place: responde o botão e edita o menu com o aviso e depois a resposta."""
+    chat_id = call.message.chat.id
+    message_id = call.message.message_id
+    await bot.answer_callback_query(call.id)
+    await bot.edit_message_text(RANK_PLACEHOLDER, chat_id, message_id)
+    try:
+        text = await render()
+    except Exception:
+        logger.exception("Erro ao calcular a resposta do botão %s no chat %s", call.data, chat_id)
+        text = RANK_FAILED
+    await bot.edit_message_text(text, chat_id, message_id, parse_mode='HTML', disable_web_page_preview=True)
+
+async def rank_command_menu(group_id: int, command: str, start: datetime, end: datetime):
+    sport_type_list = await handle_rank_menu_async(repository, syncer, group_id, start, end)
+    markup_dict = {x:{'callback_data': f'{command}_{x}'} for x in sport_type_list}
+    markup = quick_markup(markup_dict, row_width=1)
+    await bot.send_message(group_id, "Selecione o tipo de esporte:", reply_markup=markup)
+
+@bot.message_handler(commands=['admin'])
+async def admin_command_handler(message):
+    group_id = message.chat.id
+    member_list = await run_command(handle_admin_command, group_id)
+    markup_dict = {}
+    for member_name, member_id in member_list:
+        markup_dict[member_name] = {
+            'callback_data': f'admin_{member_id}'
+        }
+    markup = quick_markup(markup_dict, row_width=2)
+    await bot.send_message(group_id, "Selecione um membro pra remover:", reply_markup=markup)
+
+@bot.message_handler(commands=['frequency'])
+async def frequency_command_handler(message):
+    await send_threaded(message.chat.id, handle_month_frequency_command)
+
+@bot.message_handler(commands=['yfrequency'])
+async def year_frequency_command_handler(message):
+    await send_threaded(message.chat.id, handle_year_frequency_command)
+
+@bot.message_handler(commands=['medalhas'])
+async def medal_command_handler(message):
+    await send_threaded(message.chat.id, handle_medal_command)
+
+@bot.message_handler(commands=['rank', 'yrank'])
+async def rank_command_handler(message):
+    group_id = message.chat.id
+    command = message.text.strip().lower().split('/')[-1]
+    period = month_period if command.startswith('rank') else year_period
+    await rank_command_menu(group_id, command, *period(datetime.now()))
+
+@bot.message_handler(commands=['streak'])
+async def streak_command_handler(message):
+    await send_threaded(message.chat.id, handle_streak_command)
+
+@bot.message_handler(commands=['maxstreak'])
+async def max_streak_command_handler(message):
+    await send_threaded(message.chat.id, handle_max_streak_command)
+
+@bot.message_handler(commands=['link'])
+async def link_command_handler(message):
+    group_id = message.chat.id
+    redirect_uri = REDIRECT_URI.format(group_id)
+    await bot.send_message(group_id,
+        f"https://www.strava.com/oauth/authorize?client_id={STRAVA_CLIENT_ID}&redirect_uri={redirect_uri}&response_type=code&scope=activity:read"
+    )
+
+@bot.message_handler(commands=['reset'])
+async def reset_command_handler(message):
+    await send_threaded(message.chat.id, handle_reset_command)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('rank'))
+async def rank_month_callback_handler(call):
+    group_id = call.message.chat.id
+    sport_type = call.data.split('_')[1]
+    await answer_in_place(call, lambda: handle_rank_month_command_async(repository, syncer, group_id, sport_type))
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('yrank'))
+async def rank_year_callback_handler(call):
+    group_id = call.message.chat.id
+    sport_type = call.data.split('_')[1]
+    await answer_in_place(call, lambda: handle_rank_year_command_async(repository, syncer, group_id, sport_type))
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('admin'))
+async def admin_callback_handler(call):
+    group_id = call.message.chat.id
+    member_id = int(call.data.split('_')[1])
+    user_name_admin = call.from_user.first_name or call.from_user.username
+    await send_threaded(group_id, handle_admin_callback, member_id, user_name_admin)
+
+async def serve_telegram_webhook():
+    """Mesmo TelegramWebhookServer do runtime em threads; os updates voltam ao loop para o dispatcher."""
+    loop = asyncio.get_running_loop()
+    server = TelegramWebhookServer(
+        TELEGRAM_WEBHOOK_SECRET,
+        lambda updates: loop.call_soon_threadsafe(bot.dispatcher.dispatch, updates),
+        port=TELEGRAM_WEBHOOK_PORT,
+    )
+    await bot.remove_webhook()
+    await bot.set_webhook(url=TELEGRAM_WEBHOOK_URL, secret_token=TELEGRAM_WEBHOOK_SECRET)
+    server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        server.stop()
+
+async def run():
+    global repository, syncer
+    mongo_client = AsyncMongoClient(MONGO_URI)
+    session = create_session()
+    repository = AsyncStravaRepository(mongo_client[mongoengine.get_db().name])
+    syncer = AsyncSyncer(session, repository)
+    try:
+        if TELEGRAM_MODE == "webhook":
+            await serve_telegram_webhook()
+        else:
+            await bot.polling(non_stop=True)
+    finally:
+        await bot.dispatcher.shutdown()
+        await bot.outbound.shutdown()
+        await session.close()
+        await mongo_client.close()
+        command_executor.shutdown(wait=False)
+
+def start_async_bot():
+    check_indexes()
+    ensure_rollups()
+    StravaGroup().backfill_medal_summaries()
+    StravaGroup().backfill_athlete_ids()
+    default_scheduler.start()
+    if STRAVA_WEBHOOK_VERIFY_TOKEN:
+        events = queue.Queue()
+        StravaWebhookServer(STRAVA_WEBHOOK_VERIFY_TOKEN, events, port=STRAVA_WEBHOOK_PORT).start()
+        WebhookIngestor(events).start()
+    asyncio.run(run())
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Hashable, Optional
+
+from telebot.async_telebot import AsyncTeleBot
+
+from adapters.telegram.outbound_queue import PRIORITY_BROADCAST, PRIORITY_INTERACTIVE, AsyncOutboundQueue
+from adapters.telegram.update_dispatcher import BUSY_MESSAGE, MAX_BACKLOG, update_chat_id
+
+logger = logging.getLogger(__name__)
+
+# handlers assíncronos não ocupam thread; o limite só evita disparar tudo de uma vez
+CONCURRENCY = 64
+
+
+class AsyncUpdateDispatcher:
+    """
+    UpdateDispatcher do runtime assíncrono: mesmas regras (um chat por vez, em
+    ordem; acima de max_backlog os novos são descartados e on_busy é chamado),
+    com tasks no event loop em vez de workers. Só deve ser usado de dentro do loop.
+    """
+
+    def __init__(
+        self,
+        handle: Callable[..., Awaitable],
+        concurrency: int = CONCURRENCY,
+        max_backlog: int = MAX_BACKLOG,
+        on_busy: Optional[Callable[..., Awaitable]] = None,
+    ):
+        self.handle = handle
+        self.max_backlog = max_backlog
+        self.on_busy = on_busy
+        self.queued = 0
+        self.in_flight = 0
+        self.shed = 0
+        self._pending: dict[Hashable, deque] = {}
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks: set[asyncio.Task] = set()
+
+    def dispatch(self, updates: list) -> None:
+        for update in updates:
+            chat_id = update_chat_id(update)
+            self.submit(chat_id if chat_id is not None else ("update", update.update_id), update)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def submit(self, chat_id: Hashable, update) -> bool:
+        """
+        Returns:
+            bool: se o update foi aceito (False quando descartado por excesso de fila)
+        """
+        if self.queued >= self.max_backlog:
+            self.shed += 1
+            logger.warning("Fila de updates cheia (%s), update do chat %s descartado", self.gauges(), chat_id)
+            if self.on_busy:
+                self._spawn(self._reply_busy(chat_id, update))
+            return False
+
+        pending = self._pending.get(chat_id)
+        if pending is None:
+            pending = self._pending[chat_id] = deque()
+            self._spawn(self._drain(chat_id))
+        pending.append(update)
+        self.queued += 1
+        return True
+
+    async def _reply_busy(self, chat_id: Hashable, update) -> None:
+        try:
+            await self.on_busy(update)
+        except Exception:
+            logger.exception("Erro ao responder ocupado para o chat %s", chat_id)
+
+    async def _drain(self, chat_id: Hashable) -> None:
+        """Roda os updates do chat em ordem até a fila dele esvaziar."""
+        pending = self._pending[chat_id]
+        while pending:
+            update = pending.popleft()
+            self.queued -= 1
+            async with self._slots:
+                self.in_flight += 1
+                try:
+                    await self.handle(update)
+                except Exception:
+                    logger.exception("Erro ao processar update do chat %s", chat_id)
+                finally:
+                    self.in_flight -= 1
+        del self._pending[chat_id]
+
+    def gauges(self) -> dict:
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "chats": len(self._pending),
+            "shed": self.shed,
+        }
+
+    async def shutdown(self) -> None:
+        """Espera os updates já aceitos terminarem."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+class AsyncDispatchingTeleBot(AsyncTeleBot):
+    """AsyncTeleBot que entrega os updates recebidos ao AsyncUpdateDispatcher e envia pela AsyncOutboundQueue."""
+
+    def __init__(self, token: str, concurrency: int = CONCURRENCY, max_backlog: int = MAX_BACKLOG, outbound: Optional[AsyncOutboundQueue] = None, **kwargs):
+        super().__init__(token, **kwargs)
+        self.dispatcher = AsyncUpdateDispatcher(self._process_update, concurrency=concurrency, max_backlog=max_backlog, on_busy=self.reply_busy)
+        self.outbound = outbound or AsyncOutboundQueue()
+
+    async def process_new_updates(self, updates: list) -> None:
+        self.dispatcher.dispatch(updates)
+
+    async def _process_update(self, update) -> None:
+        await super().process_new_updates([update])
+
+    async def send_message(self, chat_id, text, *args, priority: int = PRIORITY_INTERACTIVE, **kwargs):
+        send = super().send_message
+        return await self.outbound.call(chat_id, lambda: send(chat_id, text, *args, **kwargs), priority)
+
+    async def edit_message_text(self, text=None, chat_id=None, *args, priority: int = PRIORITY_INTERACTIVE, **kwargs):
+        edit = super().edit_message_text
+        return await self.outbound.call(chat_id, lambda: edit(text, chat_id, *args, **kwargs), priority)
+
+    def queue_message(self, chat_id, text, priority: int = PRIORITY_BROADCAST, **kwargs) -> asyncio.Future:
+        """Enfileira uma mensagem sem esperar o envio (avisos e broadcasts)."""
+        send = super().send_message
+        return self.outbound.submit(chat_id, lambda: send(chat_id, text, **kwargs), priority)
+
+    async def reply_busy(self, update) -> None:
+        """Responde só a comandos e botões; mensagens comuns descartadas não geram resposta."""
+        callback_query = update.callback_query
+        if callback_query is not None:
+            answer = self.answer_callback_query
+            self.outbound.submit(update_chat_id(update), lambda: answer(callback_query.id, BUSY_MESSAGE), PRIORITY_INTERACTIVE)
+            return
+        message = update.message
+        if message is not None and (message.text or "").startswith("/"):
+            self.queue_message(message.chat.id, BUSY_MESSAGE, priority=PRIORITY_INTERACTIVE)
@@ -0,0 +1,331 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# limites do Telegram: ~30 mensagens/s no total e ~20/min por grupo
+GLOBAL_RATE = 30.0
+GLOBAL_BURST = 30
+CHAT_RATE = 20 / 60
+CHAT_BURST = 5
+MAX_RETRIES = 5
+SENDERS = 8
+LATENCY_WINDOW = 1000
+MAX_IDLE_BUCKETS = 1024
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BROADCAST = 1
+LANES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BROADCAST: "broadcast"}
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Segundos pedidos pelo Telegram em um 429 (ApiTelegramException do telebot
+    síncrono ou do assíncrono), ou None para qualquer outro erro.
+    """
+    if getattr(error, "error_code", None) != 429:
+        return None
+    parameters = (getattr(error, "result_json", None) or {}).get("parameters") or {}
+    return float(parameters.get("retry_after", 1))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Segundos até haver um token (0 se já houver)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class OutboundMessage:
+    def __init__(self, chat_id: Hashable, call: Callable[[], Any], priority: int, enqueued_at: float):
+        self.chat_id = chat_id
+        self.call = call
+        self.priority = priority
+        self.enqueued_at = enqueued_at
+        self.attempts = 0
+
+
+class OutboundScheduler:
+    """
+    Decide qual envio ao Telegram sai agora. Cada prioridade é uma fila com
+    os chats em round-robin; interativas saem antes de broadcasts. Um envio
+    só sai com token no balde global e no do chat, sem outro envio do mesmo
+    chat em andamento (a ordem dentro do chat é preservada) e fora da pausa
+    pedida por um 429. Não é thread-safe: os drivers chamam sob seu lock.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = GLOBAL_RATE,
+        global_burst: float = GLOBAL_BURST,
+        chat_rate: float = CHAT_RATE,
+        chat_burst: float = CHAT_BURST,
+        max_retries: int = MAX_RETRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.clock = clock
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._global = TokenBucket(global_rate, global_burst, clock())
+        self._lanes: dict[int, OrderedDict] = {priority: OrderedDict() for priority in sorted(LANES)}
+        self._buckets: dict[Hashable, TokenBucket] = {}
+        self._blocked_until: dict[Hashable, float] = {}
+        self._in_flight: set = set()
+        self._latencies = {priority: deque(maxlen=LATENCY_WINDOW) for priority in LANES}
+
+    def put(self, message: OutboundMessage, front: bool = False) -> None:
+        lane = self._lanes[message.priority]
+        pending = lane.get(message.chat_id)
+        if pending is None:
+            pending = lane[message.chat_id] = deque()
+        if front:
+            pending.appendleft(message)
+        else:
+            pending.append(message)
+
+    def _bucket(self, chat_id: Hashable, now: float) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) >= MAX_IDLE_BUCKETS:
+                self._prune(now)
+            bucket = self._buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst, now)
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        """Descarta baldes cheios de chats sem nada na fila: recriados cheios, dão o mesmo resultado."""
+        busy = self._in_flight.union(*(lane.keys() for lane in self._lanes.values()))
+        for chat_id in [chat_id for chat_id, bucket in self._buckets.items() if chat_id not in busy and bucket.full(now)]:
+            del self._buckets[chat_id]
+            self._blocked_until.pop(chat_id, None)
+
+    def next_ready(self, now: float) -> tuple[Optional[OutboundMessage], Optional[float]]:
+        """
+        Returns:
+            tuple: (mensagem a enviar agora, None) ou (None, segundos até algo poder
+                sair; None se não há nada enviável até um envio terminar ou chegar outro)
+        """
+        if not any(self._lanes.values()):
+            return None, None
+        global_delay = self._global.delay(now)
+        if global_delay > 0:
+            return None, global_delay
+
+        wait = None
+        for priority, lane in self._lanes.items():
+            for chat_id, pending in lane.items():
+                if chat_id in self._in_flight:
+                    continue
+                bucket = self._bucket(chat_id, now)
+                chat_wait = max(bucket.delay(now), self._blocked_until.get(chat_id, 0) - now)
+                if chat_wait > 0:
+                    wait = chat_wait if wait is None else min(wait, chat_wait)
+                    continue
+
+                message = pending.popleft()
+                if pending:
+                    lane.move_to_end(chat_id)
+                else:
+                    del lane[chat_id]
+                bucket.take(now)
+                self._global.take(now)
+                self._in_flight.add(chat_id)
+                if message.attempts == 0:
+                    self._latencies[priority].append(now - message.enqueued_at)
+                message.attempts += 1
+                return message, None
+        return None, wait
+
+    def finished(self, message: OutboundMessage, now: float, error: Optional[BaseException] = None) -> bool:
+        """
+        Libera o chat após o envio.
+        Returns:
+            bool: True se o envio voltou para a frente da fila por causa de um 429
+        """
+        self._in_flight.discard(message.chat_id)
+        pause = retry_after(error) if error is not None else None
+        if pause is not None and message.attempts <= self.max_retries:
+            self._blocked_until[message.chat_id] = now + pause
+            self.put(message, front=True)
+            self.retried += 1
+            logger.warning("Telegram pediu %.0fs de pausa no chat %s (tentativa %d)", pause, message.chat_id, message.attempts)
+            return True
+        if error is None:
+            self.sent += 1
+        else:
+            self.failed += 1
+        return False
+
+    def stats(self) -> dict:
+        """Fila e latência de fila (submit até o primeiro envio) por prioridade, em segundos."""
+        stats = {"in_flight": len(self._in_flight), "sent": self.sent, "retried": self.retried, "failed": self.failed}
+        for priority, name in LANES.items():
+            latencies = sorted(self._latencies[priority])
+            stats[name] = {
+                "queued": sum(len(pending) for pending in self._lanes[priority].values()),
+                "latency_p50": latencies[len(latencies) // 2] if latencies else 0.0,
+                "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+                "latency_max": latencies[-1] if latencies else 0.0,
+            }
+        return stats
+
+
+class OutboundQueue:
+    """
+    Fila de saída do bot em threads: um thread agenda os envios pelo
+    OutboundScheduler e até `senders` chamadas à API rodam ao mesmo tempo.
+    """
+
+    def __init__(self, scheduler: Optional[OutboundScheduler] = None, senders: int = SENDERS):
+        self.scheduler = scheduler or OutboundScheduler()
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=senders, thread_name_prefix="telegram-send")
+        self._thread: Optional[threading.Thread] = None
+        self._futures: dict[int, Future] = {}
+        self._stop = False
+
+    def submit(self, chat_id: Hashable, call: Callable[[], Any], priority: int = PRIORITY_INTERACTIVE) -> Future:
+        """Enfileira call (ex.: o send_message do telebot) sem bloquear."""
+        future = Future()
+        with self._cond:
+            message = OutboundMessage(chat_id, call, priority, self.scheduler.clock())
+            self._futures[id(message)] = future
+            self.scheduler.put(message)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telegram-outbound", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future
+
+    def call(self, chat_id: Hashable, call: Callable[[], Any], priority: int = PRIORITY_INTERACTIVE) -> Any:
+        """Enfileira e espera o envio; devolve o retorno da API ou levanta o erro final."""
+        return self.submit(chat_id, call, priority).result()
+
+    def _run(self) -> None:
+        with self._cond:
+            while not self._stop:
+                message, delay = self.scheduler.next_ready(self.scheduler.clock())
+                if message is None:
+                    self._cond.wait(delay)
+                    continue
+                self._executor.submit(self._send, message)
+
+    def _send(self, message: OutboundMessage) -> None:
+        result, error = None, None
+        try:
+            result = message.call()
+        except Exception as e:
+            error = e
+        with self._cond:
+            retrying = self.scheduler.finished(message, self.scheduler.clock(), error)
+            future = None if retrying else self._futures.pop(id(message))
+            self._cond.notify()
+        if future is None:
+            return
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return self.scheduler.stats()
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._executor.shutdown(wait=True)
+
+
+class AsyncOutboundQueue:
+    """OutboundQueue do runtime assíncrono: agendador e envios como tasks no event loop."""
+
+    def __init__(self, scheduler: Optional[OutboundScheduler] = None):
+        self.scheduler = scheduler or OutboundScheduler()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._futures: dict[int, asyncio.Future] = {}
+
+    def submit(self, chat_id: Hashable, call: Callable[[], Any], priority: int = PRIORITY_INTERACTIVE) -> asyncio.Future:
+        """Enfileira call (uma função que devolve a coroutine de envio) sem esperar."""
+        if self._runner is None:
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.ensure_future(self._run())
+        message = OutboundMessage(chat_id, call, priority, self.scheduler.clock())
+        future = self._futures[id(message)] = asyncio.get_running_loop().create_future()
+        self.scheduler.put(message)
+        self._wakeup.set()
+        return future
+
+    async def call(self, chat_id: Hashable, call: Callable[[], Any], priority: int = PRIORITY_INTERACTIVE) -> Any:
+        return await self.submit(chat_id, call, priority)
+
+    async def _run(self) -> None:
+        while True:
+            message, delay = self.scheduler.next_ready(self.scheduler.clock())
+            if message is not None:
+                task = asyncio.ensure_future(self._send(message))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send(self, message: OutboundMessage) -> None:
+        result, error = None, None
+        try:
+            result = await message.call()
+        except Exception as e:
+            error = e
+        retrying = self.scheduler.finished(message, self.scheduler.clock(), error)
+        self._wakeup.set()
+        if retrying:
+            return
+        future = self._futures.pop(id(message))
+        if future.cancelled():
+            return
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def stats(self) -> dict:
+        return self.scheduler.stats()
+
+    async def shutdown(self) -> None:
+        """Espera os envios já em andamento e para o agendador."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        if self._runner is not None:
+            self._runner.cancel()
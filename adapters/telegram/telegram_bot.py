@@ -1,14 +1,18 @@
+import logging
+import queue
 from datetime import datetime
+from typing import Callable
 import mongoengine
-import telebot
 from telebot.util import quick_markup
 
-from application.commands.streak import handle_streak_command
+from application.commands.streak import handle_max_streak_command, handle_streak_command
 from application.commands.frequency import (
   handle_month_frequency_command,
   handle_year_frequency_command
 )
 from application.commands.rank import (
+  RANK_FAILED,
+  RANK_PLACEHOLDER,
   handle_rank_month_command,
   handle_rank_year_command,
   handle_rank_menu
@@ -19,10 +23,49 @@ from application.commands.admin import (
   handle_admin_command,
   handle_reset_command
 )
-from config import MONGO_URI, REDIRECT_URI, STRAVA_CLIENT_ID, TELEGRAM_TOKEN
+from application.rebuild_rollups import ensure_rollups
+from application.sync_scheduler import default_scheduler
+from application.webhook_ingest import WebhookIngestor
+from adapters.strava_webhook import StravaWebhookServer
+from adapters.telegram.telegram_webhook import TelegramWebhookServer
+from adapters.telegram.update_dispatcher import DispatchingTeleBot
+from infrastructure.mongo.index_check import check_indexes
+from infrastructure.mongo.strava_group import StravaGroup
+from config import (
+  MONGO_URI,
+  REDIRECT_URI,
+  STRAVA_CLIENT_ID,
+  STRAVA_WEBHOOK_PORT,
+  STRAVA_WEBHOOK_VERIFY_TOKEN,
+  TELEGRAM_MAX_BACKLOG,
+  TELEGRAM_MODE,
+  TELEGRAM_TOKEN,
+  TELEGRAM_WEBHOOK_PORT,
+  TELEGRAM_WEBHOOK_SECRET,
+  TELEGRAM_WEBHOOK_URL,
+  TELEGRAM_WORKERS
+)
+
+logger = logging.getLogger(__name__)
 
 mongoengine.connect(host=MONGO_URI)
-bot = telebot.TeleBot(TELEGRAM_TOKEN)
+bot = DispatchingTeleBot(TELEGRAM_TOKEN, workers=TELEGRAM_WORKERS, max_backlog=TELEGRAM_MAX_BACKLOG)
+
+def answer_in_place(call, render: Callable[[], str]):
+    """
+    Responde o botão na hora e troca a mensagem do menu por um aviso enquanto
+    render() calcula a resposta, que depois substitui o aviso na mesma mensagem.
+    """
+    chat_id = call.message.chat.id
+    message_id = call.message.message_id
+    bot.answer_callback_query(call.id)
+    bot.edit_message_text(RANK_PLACEHOLDER, chat_id, message_id)
+    try:
+        text = render()
+    except Exception:
+        logger.exception("Erro ao calcular a resposta do botão %s no chat %s", call.data, chat_id)
+        text = RANK_FAILED
+    bot.edit_message_text(text, chat_id, message_id, parse_mode='HTML', disable_web_page_preview=True)
 
 def rank_command_menu(group_id :int, command :str, start :datetime, end :datetime):
     sport_type_list = handle_rank_menu(group_id, start, end)
@@ -80,6 +123,11 @@ def streak_command_handler(message):
     group_id = message.chat.id
     bot.send_message(group_id, handle_streak_command(group_id), parse_mode='HTML', disable_web_page_preview=True)
 
+@bot.message_handler(commands=['maxstreak'])
+def max_streak_command_handler(message):
+    group_id = message.chat.id
+    bot.send_message(group_id, handle_max_streak_command(group_id), parse_mode='HTML', disable_web_page_preview=True)
+
 @bot.message_handler(commands=['link'])
 def link_command_handler(message):
     group_id = message.chat.id
@@ -98,14 +146,14 @@ def reset_command_handler(message):
 def rank_month_callback_handler(call):
     group_id = call.message.chat.id
     sport_type = call.data.split('_')[1]
-    bot.send_message(group_id, handle_rank_month_command(group_id, sport_type), parse_mode='HTML', disable_web_page_preview=True)
+    answer_in_place(call, lambda: handle_rank_month_command(group_id, sport_type))
 
 
 @bot.callback_query_handler(func=lambda call: call.data.startswith('yrank'))
 def rank_year_callback_handler(call):
     group_id = call.message.chat.id
     sport_type = call.data.split('_')[1]
-    bot.send_message(group_id, handle_rank_year_command(group_id, sport_type), parse_mode='HTML', disable_web_page_preview=True)
+    answer_in_place(call, lambda: handle_rank_year_command(group_id, sport_type))
 
 @bot.callback_query_handler(func=lambda call: call.data.startswith('admin'))
 def admin_callback_handler(call):
@@ -114,5 +162,31 @@ def admin_callback_handler(call):
     user_name_admin = call.from_user.first_name or call.from_user.username
     bot.send_message(group_id, handle_admin_callback(group_id, member_id, user_name_admin), parse_mode='HTML', disable_web_page_preview=True)
 
+def start_strava_webhook():
+    events = queue.Queue()
+    StravaWebhookServer(STRAVA_WEBHOOK_VERIFY_TOKEN, events, port=STRAVA_WEBHOOK_PORT).start()
+    WebhookIngestor(events).start()
+
+def start_telegram_webhook():
+    """
+    Modo webhook: o Telegram entrega os updates em TELEGRAM_WEBHOOK_URL, que aponta
+    (direto ou via balanceador) para o servidor local em TELEGRAM_WEBHOOK_PORT.
+    """
+    server = TelegramWebhookServer(TELEGRAM_WEBHOOK_SECRET, bot.process_new_updates, port=TELEGRAM_WEBHOOK_PORT)
+    bot.remove_webhook()
+    bot.set_webhook(url=TELEGRAM_WEBHOOK_URL, secret_token=TELEGRAM_WEBHOOK_SECRET)
+    server.serve_forever()
+
 def start_bot():
-    bot.polling()
+    check_indexes()
+    ensure_rollups()
+    StravaGroup().backfill_medal_summaries()
+    StravaGroup().backfill_athlete_ids()
+    default_scheduler.start()
+    if STRAVA_WEBHOOK_VERIFY_TOKEN:
+        start_strava_webhook()
+    if TELEGRAM_MODE == "webhook":
+        start_telegram_webhook()
+    else:
+        bot.polling()
+
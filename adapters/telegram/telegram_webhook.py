@@ -0,0 +1,114 @@
+import hmac
+import json
+import logging
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+from telebot import types
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PATH = "/telegram/webhook"
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class TelegramWebhookServer:
+    """
+    Endpoint HTTP para receber os updates do Telegram em modo webhook.
+
+    Cada POST tem o secret_token conferido no header X-Telegram-Bot-Api-Secret-Token,
+    é convertido em telebot.types.Update e entregue a on_updates (o
+    process_new_updates do bot, que só enfileira no UpdateDispatcher); a resposta
+    200 sai logo em seguida, sem esperar o handler.
+    """
+
+    def __init__(self, secret_token: str, on_updates: Callable[[list], None], host: str = "0.0.0.0", port: int = 8443, path: str = WEBHOOK_PATH):
+        if not secret_token:
+            raise ValueError("O modo webhook exige um secret token")
+        self.secret_token = secret_token
+        self.on_updates = on_updates
+        self.path = path
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def _handler(self):
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status: int):
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                if urlparse(self.path).path != webhook.path:
+                    return self._reply(404)
+                # compare_digest só aceita str ASCII; bytes cobrem cabeçalhos com qualquer caractere
+                if not hmac.compare_digest((self.headers.get(SECRET_HEADER) or "").encode(), webhook.secret_token.encode()):
+                    logger.warning("Update do Telegram recusado: secret token inválido")
+                    return self._reply(403)
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                    update = types.Update.de_json(payload)
+                except (ValueError, TypeError, KeyError):
+                    return self._reply(400)
+                if update is None:
+                    return self._reply(400)
+                try:
+                    webhook.on_updates([update])
+                except Exception:
+                    # o Telegram reenviaria o update com erro; o dispatcher já registra falhas
+                    logger.exception("Erro ao entregar o update %s", update.update_id)
+                return self._reply(200)
+
+            def log_message(self, format, *args):
+                logger.debug("Webhook Telegram: " + format, *args)
+
+        return Handler
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.server.serve_forever, name="telegram-webhook", daemon=True)
+        self._thread.start()
+        logger.info("Webhook do Telegram escutando em %s", self.url)
+
+    def serve_forever(self) -> None:
+        logger.info("Webhook do Telegram escutando em %s", self.url)
+        self.server.serve_forever()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main() -> int:
+    """
+    Reenvia updates gravados (um objeto ou uma lista em JSON) para um webhook local:
+
+        python -m adapters.telegram.telegram_webhook update.json http://localhost:8443/telegram/webhook <secret>
+    """
+    import requests
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if len(sys.argv) != 4:
+        print(main.__doc__)
+        return 2
+    path, url, secret_token = sys.argv[1:]
+    with open(path) as file:
+        updates = json.load(file)
+    for update in updates if isinstance(updates, list) else [updates]:
+        response = requests.post(url, json=update, headers={SECRET_HEADER: secret_token}, timeout=10)
+        logger.info("Update %s: HTTP %s", update.get("update_id"), response.status_code)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable, Optional
+
+import telebot
+
+from adapters.telegram.outbound_queue import PRIORITY_BROADCAST, PRIORITY_INTERACTIVE, OutboundQueue
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 8
+MAX_BACKLOG = 200
+BUSY_MESSAGE = "O bot está ocupado no momento, tente novamente em instantes."
+
+
+def update_chat_id(update) -> Optional[int]:
+    """Chat de origem de um telebot.types.Update (mensagem ou callback de botão)."""
+    for message in (update.message, update.edited_message, update.channel_post, update.edited_channel_post):
+        if message is not None:
+            return message.chat.id
+    callback_query = update.callback_query
+    if callback_query is not None and callback_query.message is not None:
+        return callback_query.message.chat.id
+    return None
+
+
+class UpdateDispatcher:
+    """
+    Executa os updates do Telegram em um pool limitado de workers, um chat por
+    vez: updates do mesmo chat ficam em fila e rodam em ordem, chats diferentes
+    rodam em paralelo. Acima de max_backlog updates aguardando, os novos são
+    descartados e on_busy é chamado (ex.: responder "tente novamente").
+    """
+
+    def __init__(
+        self,
+        handle: Callable,
+        workers: int = WORKERS,
+        max_backlog: int = MAX_BACKLOG,
+        on_busy: Optional[Callable] = None,
+    ):
+        self.handle = handle
+        self.max_backlog = max_backlog
+        self.on_busy = on_busy
+        self.queued = 0
+        self.in_flight = 0
+        self.shed = 0
+        self._pending: dict[Hashable, deque] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="telegram-update")
+
+    def dispatch(self, updates: list) -> None:
+        for update in updates:
+            chat_id = update_chat_id(update)
+            # updates sem chat não têm ordem a preservar
+            self.submit(chat_id if chat_id is not None else ("update", update.update_id), update)
+
+    def submit(self, chat_id: Hashable, update) -> bool:
+        """
+        Returns:
+            bool: se o update foi aceito (False quando descartado por excesso de fila)
+        """
+        with self._lock:
+            busy = self.queued >= self.max_backlog
+            if busy:
+                self.shed += 1
+            else:
+                pending = self._pending.get(chat_id)
+                start_worker = pending is None
+                if start_worker:
+                    pending = self._pending[chat_id] = deque()
+                pending.append(update)
+                self.queued += 1
+
+        if busy:
+            logger.warning("Fila de updates cheia (%s), update do chat %s descartado", self.gauges(), chat_id)
+            if self.on_busy:
+                try:
+                    self.on_busy(update)
+                except Exception:
+                    logger.exception("Erro ao responder ocupado para o chat %s", chat_id)
+            return False
+
+        if start_worker:
+            self._executor.submit(self._drain, chat_id)
+        return True
+
+    def _drain(self, chat_id: Hashable) -> None:
+        """Roda os updates do chat em ordem até a fila dele esvaziar."""
+        while True:
+            with self._lock:
+                pending = self._pending[chat_id]
+                if not pending:
+                    del self._pending[chat_id]
+                    return
+                update = pending.popleft()
+                self.queued -= 1
+                self.in_flight += 1
+            try:
+                self.handle(update)
+            except Exception:
+                logger.exception("Erro ao processar update do chat %s", chat_id)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+    def gauges(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self.queued,
+                "in_flight": self.in_flight,
+                "chats": len(self._pending),
+                "shed": self.shed,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+class DispatchingTeleBot(telebot.TeleBot):
+    """
+    TeleBot que entrega os updates recebidos (polling ou webhook) ao
+    UpdateDispatcher em vez de processá-los no thread que os recebeu, e cujos
+    envios passam pela OutboundQueue (limites do Telegram e retry em 429).
+    """
+
+    def __init__(self, token: str, workers: int = WORKERS, max_backlog: int = MAX_BACKLOG, outbound: Optional[OutboundQueue] = None, **kwargs):
+        super().__init__(token, threaded=False, **kwargs)
+        self.dispatcher = UpdateDispatcher(self._process_update, workers=workers, max_backlog=max_backlog, on_busy=self.reply_busy)
+        self.outbound = outbound or OutboundQueue()
+
+    def process_new_updates(self, updates: list) -> None:
+        self.dispatcher.dispatch(updates)
+
+    def _process_update(self, update) -> None:
+        super().process_new_updates([update])
+
+    def send_message(self, chat_id, text, *args, priority: int = PRIORITY_INTERACTIVE, **kwargs):
+        """send_message do telebot pela fila de saída; espera o envio e devolve a Message."""
+        send = super().send_message
+        return self.outbound.call(chat_id, lambda: send(chat_id, text, *args, **kwargs), priority)
+
+    def edit_message_text(self, text=None, chat_id=None, *args, priority: int = PRIORITY_INTERACTIVE, **kwargs):
+        edit = super().edit_message_text
+        return self.outbound.call(chat_id, lambda: edit(text, chat_id, *args, **kwargs), priority)
+
+    def queue_message(self, chat_id, text, priority: int = PRIORITY_BROADCAST, **kwargs) -> Future:
+        """
+        Enfileira uma mensagem sem esperar o envio (avisos e broadcasts).
+        Returns:
+            Future: resolvido com a Message enviada ou com o erro final
+        """
+        send = super().send_message
+        return self.outbound.submit(chat_id, lambda: send(chat_id, text, **kwargs), priority)
+
+    def reply_busy(self, update) -> None:
+        """Responde só a comandos e botões; mensagens comuns descartadas não geram resposta."""
+        # sem esperar: quem chama é o thread que recebe os updates
+        callback_query = update.callback_query
+        if callback_query is not None:
+            answer = self.answer_callback_query
+            self.outbound.submit(update_chat_id(update), lambda: answer(callback_query.id, BUSY_MESSAGE), PRIORITY_INTERACTIVE)
+            return
+        message = update.message
+        if message is not None and (message.text or "").startswith("/"):
+            self.queue_message(message.chat.id, BUSY_MESSAGE, priority=PRIORITY_INTERACTIVE)
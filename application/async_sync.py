@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Optional
+
+import aiohttp
+from requests import RequestException
+
+from adapters.async_strava_client import AsyncStravaClient
+from adapters.strava_budget import PRIORITY_HIGH, BudgetExhausted
+from adapters.strava_client import StravaClient
+from adapters.strava_token_cache import StravaTokenCache, default_token_cache
+from application.response_cache import default_response_cache
+from application.sync_activities import (
+    LEASE_TTL,
+    MAX_WORKERS,
+    MIN_SYNC_INTERVAL,
+    PER_PAGE,
+    MemberSyncResult,
+    changed,
+    lease_deadline,
+    lease_owner,
+    member_cursor,
+    parse_activity_date,
+    record_group_sync,
+    recently_synced,
+    sync_stamps,
+    wait_for_lease,
+)
+from application.sync_scheduler import COMMAND_MAX_STALENESS, default_scheduler
+from infrastructure.mongo.async_repository import AsyncStravaRepository
+from infrastructure.mongo.strava_activity import StravaActivity
+from infrastructure.mongo.strava_group import StravaGroup
+from infrastructure.mongo.strava_sync_lease import StravaSyncLease
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_all_pages(client: AsyncStravaClient, access_token: str, after, per_page: int = PER_PAGE, priority: int = PRIORITY_HIGH) -> tuple[list[dict], int]:
+    """Versão assíncrona de sync_activities.fetch_all_pages."""
+    activities = []
+    page = 0
+    while True:
+        page += 1
+        data = await client.fetch_activities(access_token, after, page=page, per_page=per_page, priority=priority)
+        activities.extend(data)
+        if len(data) < per_page:
+            return activities, page
+
+
+class AsyncSyncer:
+    """
+    Sync de grupo do runtime assíncrono: busca as atividades de todos os
+    membros ao mesmo tempo no event loop, com o AsyncStravaClient, e grava o
+    resultado em uma única ida a um thread (mesmas escritas de
+    sync_all_activities). Respeita a StravaSyncLease, então nunca corre junto
+    com o SyncScheduler ou outro processo; chamadas concorrentes para o mesmo
+    grupo no loop compartilham um único sync. No máximo `concurrency` membros
+    são buscados ao mesmo tempo, somando todos os grupos (MAX_WORKERS, como no
+    sync em threads).
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        repository: AsyncStravaRepository,
+        token_cache: Optional[StravaTokenCache] = None,
+        concurrency: int = MAX_WORKERS,
+    ):
+        self.session = session
+        self.repository = repository
+        self.token_cache = token_cache or default_token_cache
+        self._fetch_slots = asyncio.Semaphore(max(1, concurrency))
+        self.coalesced = 0
+        self._flights: dict[int, asyncio.Future] = {}
+
+    async def ensure_fresh(self, group_id: int, max_age: Optional[timedelta] = COMMAND_MAX_STALENESS) -> None:
+        """Mesmo contrato de sync_scheduler.ensure_fresh: o grupo só é lido se sync_stamps não garantir dados frescos."""
+        default_scheduler.touch(group_id)
+        if max_age is None or sync_stamps.fresh(group_id, max_age):
+            return
+        group = await self.repository.get_group(group_id)
+        if not group:
+            return
+        sync_stamps.record(group_id, group.last_sync)
+        if recently_synced(group, max_age):
+            return
+        await self.sync_group(group_id, min_interval=max_age)
+
+    async def sync_group(self, group_id: int, min_interval: timedelta = MIN_SYNC_INTERVAL) -> list[MemberSyncResult]:
+        flight = self._flights.get(group_id)
+        if flight is None:
+            flight = self._flights[group_id] = asyncio.ensure_future(self._sync_group(group_id, min_interval))
+            flight.add_done_callback(lambda _: self._flights.pop(group_id, None))
+        else:
+            self.coalesced += 1
+        # shield: um comando cancelado não cancela o sync dos demais
+        return await asyncio.shield(flight)
+
+    async def _sync_group(self, group_id: int, min_interval: timedelta) -> list[MemberSyncResult]:
+        lease_repo = StravaSyncLease()
+        owner = lease_owner()
+        if not await asyncio.to_thread(lease_repo.acquire, group_id, owner, LEASE_TTL):
+            logger.info("Grupo %s já está sendo sincronizado por outro processo, aguardando", group_id)
+            await asyncio.to_thread(wait_for_lease, lease_repo, group_id)
+            return []
+
+        try:
+            group = await self.repository.get_group(group_id)
+            if group:
+                sync_stamps.record(group_id, group.last_sync)
+            if not group or recently_synced(group, min_interval):
+                logger.debug("Grupo %s sincronizado por outro processo, ignorando", group_id)
+                return []
+
+            logger.info("Iniciando sync assíncrono do grupo %s (%d membros)", group_id, len(group.membros))
+            deadline = lease_deadline()
+            client = AsyncStravaClient(self.session, group_id=group_id, deadline=deadline)
+            refresh_client = StravaClient(group_id=group_id, deadline=deadline)
+            fetched = await asyncio.gather(*(
+                self._fetch_bounded(client, refresh_client, member_name, dict(member_data))
+                for member_name, member_data in group.membros.items()
+            ))
+            return await asyncio.to_thread(self._save, group_id, group, fetched)
+        finally:
+            await asyncio.to_thread(lease_repo.release, group_id, owner)
+
+    async def _fetch_bounded(self, client: AsyncStravaClient, refresh_client: StravaClient, member_name: str, member_data: dict) -> tuple[MemberSyncResult, list[dict]]:
+        async with self._fetch_slots:
+            return await self.fetch_member(client, refresh_client, member_name, member_data)
+
+    async def fetch_member(self, client: AsyncStravaClient, refresh_client: StravaClient, member_name: str, member_data: dict) -> tuple[MemberSyncResult, list[dict]]:
+        """
+        Versão assíncrona de sync_activities.fetch_member. A renovação de token,
+        rara, roda em thread sob o lock por atleta do StravaTokenCache.
+        """
+        token_cache = self.token_cache
+        athlete_id = member_data.get("athlete_id")
+        result = MemberSyncResult(member_name)
+        started = time.monotonic()
+        activities = []
+        refresh_calls = 0
+        after, priority = member_cursor(member_data)
+
+        try:
+            tokens = token_cache.current(athlete_id, member_data)
+            if token_cache.expires_within(tokens, token_cache.margin_seconds):
+                tokens, refreshed = await asyncio.to_thread(token_cache.get_valid, athlete_id, member_data, refresh_client)
+                refresh_calls += refreshed
+            try:
+                activities, result.pages = await fetch_all_pages(client, tokens["access_token"], after, priority=priority)
+            except aiohttp.ClientResponseError as e:
+                if e.status != 401:
+                    raise
+                logger.warning("Token expirado para %s, renovando...", member_name)
+                tokens, refreshed = await asyncio.to_thread(token_cache.force_refresh, athlete_id, tokens, refresh_client)
+                refresh_calls += 1 + refreshed
+                activities, result.pages = await fetch_all_pages(client, tokens["access_token"], after, priority=priority)
+            finally:
+                if tokens["access_token"] != member_data.get("access_token"):
+                    result.tokens = tokens
+
+            result.fetched = len(activities)
+            logger.info("Membro %s: %d atividades encontradas em %d página(s)", member_name, result.fetched, result.pages)
+            if activities:
+                result.last_activity_date = parse_activity_date(activities[-1]["start_date_local"])
+        except (aiohttp.ClientError, asyncio.TimeoutError, RequestException) as e:
+            # RequestException vem da renovação de token, feita pelo StravaClient
+            status_code = getattr(e, "status", None) or getattr(getattr(e, "response", None), "status_code", None)
+            logger.error("Erro HTTP %s ao buscar atividades de %s: %s", status_code, member_name, e)
+            result.error = e
+        except BudgetExhausted as e:
+            logger.warning("Sem orçamento do Strava para buscar atividades de %s: %s", member_name, e)
+            result.error = e
+        except Exception as e:
+            logger.exception("Erro inesperado ao buscar atividades de %s", member_name)
+            result.error = e
+
+        result.calls = max(result.pages, 1) + refresh_calls
+        result.latency = time.monotonic() - started
+        return result, activities if result.ok else []
+
+    def _save(self, group_id: int, group, fetched: list[tuple[MemberSyncResult, list[dict]]]) -> list[MemberSyncResult]:
+        activity_repo = StravaActivity()
+        for result, activities in fetched:
+            if activities:
+                result.saved = activity_repo.save_activities(group_id, activities)
+                if changed(result.saved):
+                    default_response_cache.bump(group_id)
+        results = [result for result, _ in fetched]
+        record_group_sync(StravaGroup(), group_id, group, results)
+        return results
@@ -0,0 +1,88 @@
+import logging
+import sys
+from datetime import datetime
+from typing import Optional
+
+from application.response_cache import default_response_cache
+from domain.services.rank_service import RankService
+from infrastructure.mongo.strava_daily_rollup import StravaDailyRollup
+from infrastructure.mongo.strava_group import StravaGroup
+
+logger = logging.getLogger(__name__)
+
+# grupos gravados por bulk_write
+GROUP_BATCH_SIZE = 500
+
+
+def month_range(month: str) -> tuple[datetime, datetime]:
+    """
+    Args:
+        month (str): "YYYY-MM"
+    Returns:
+        tuple: (primeiro dia do mês, primeiro dia do mês seguinte)
+    """
+    start = datetime.strptime(month, "%Y-%m")
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+
+def previous_month(now: Optional[datetime] = None) -> str:
+    now = now or datetime.now()
+    if now.month == 1:
+        return f"{now.year - 1}-12"
+    return f"{now.year}-{now.month - 1:02d}"
+
+
+def _group_batches(rows, size: int):
+    """
+    Agrupa as linhas do aggregate (ordenadas por grupo) em lotes de até size grupos,
+    no formato {group_id: {modalidade: [athlete_id, ...]}}.
+    """
+    batch = {}
+    for row in rows:
+        if row["group_id"] not in batch and len(batch) >= size:
+            yield batch
+            batch = {}
+        athlete_ids = [entry["athlete_id"] for entry in row["podium"]]
+        batch.setdefault(row["group_id"], {})[row["sport_type"]] = athlete_ids
+    if batch:
+        yield batch
+
+
+def award_month(month: str) -> int:
+    """
+    Fecha o mês: calcula o pódio de cada grupo e modalidade praticada a partir
+    de strava_daily_rollup e grava em StravaGroup.medalhas. Idempotente, pode ser
+    reexecutado ou usado para meses passados.
+    Args:
+        month (str): "YYYY-MM"
+    Returns:
+        int: quantidade de grupos premiados
+    """
+    start, end = month_range(month)
+    rows = StravaDailyRollup().monthly_podiums(start, end, RankService.sport_rank_by_time_list)
+
+    group_repo = StravaGroup()
+    awarded = 0
+    for batch in _group_batches(rows, GROUP_BATCH_SIZE):
+        awarded += group_repo.award_month(month, batch)
+        for group_id in batch:
+            default_response_cache.bump(group_id)
+    logger.info("Medalhas de %s gravadas em %d grupos", month, awarded)
+    return awarded
+
+
+def main() -> int:
+    import mongoengine
+    from config import MONGO_URI
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    mongoengine.connect(host=MONGO_URI)
+    for month in sys.argv[1:] or [previous_month()]:
+        award_month(month)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
 import logging
 from datetime import datetime
+from application.response_cache import default_response_cache
 from infrastructure.mongo.strava_group import StravaGroup
 from infrastructure.mongo.strava_activity import StravaActivity
+from shared.user import MemberDirectory
 
 logger = logging.getLogger(__name__)
 
@@ -26,21 +28,16 @@ def handle_admin_callback(group_id:int, member_id:int, autor_remocao:str) -> str
     group_repo = StravaGroup()
     activity_repo = StravaActivity()
     group = group_repo.get_group(group_id)
-    membro_removido = list(filter(lambda x: x[1].get("athlete_id") == member_id, group.membros.items()))
+    member_name, _ = MemberDirectory(group.membros).get_member(member_id)
 
-    if not membro_removido:
+    if member_name is None:
         logger.warning("Membro com athlete_id %s não encontrado no grupo %s", member_id, group_id)
         return "Membro não encontrado."
 
-    member_name = membro_removido[0][0]
     logger.info("Removendo membro %s (athlete_id=%s) do grupo %s por %s", member_name, member_id, group_id, autor_remocao)
-    del group.membros[membro_removido[0][0]]
-    for month, sport_dict in group.medalhas.items():
-        for sport_name, sport_data in sport_dict.items():
-            if member_name in sport_data:
-                del group.medalhas[month][sport_name][member_name]
-    group.save()
+    group_repo.remove_member(group, member_name)
     activity_repo.remove_activity_member(group_id, member_id)
+    default_response_cache.bump(group_id)
     return f"{member_name} removido com sucesso por {autor_remocao}."
 
 def handle_reset_command(group_id:int) -> str:
@@ -51,7 +48,6 @@ def handle_reset_command(group_id:int) -> str:
     """
     group_repo = StravaGroup()
     group = group_repo.get_group(group_id)
-    for membro_name in group.membros:
-        group.membros[membro_name]["last_activity_date"] = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0, day=1)
-    group.save()
+    month_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0, day=1)
+    group_repo.reset_member_cursors(group_id, list(group.membros), month_start)
     return "Ranking resetado com sucesso."
\ No newline at end of file
@@ -1,23 +1,36 @@
 import logging
 from datetime import datetime
+from pymongo.errors import OperationFailure
 
-from application.sync_activities import sync_all_activities
+from application.response_cache import default_response_cache
+from application.sync_scheduler import ensure_fresh
 
 logger = logging.getLogger(__name__)
 from domain.services.frequency_service import FrequencyService
 from infrastructure.mongo.strava_activity import StravaActivity
+from infrastructure.mongo.strava_daily_rollup import StravaDailyRollup
 from infrastructure.mongo.strava_group import StravaGroup
 from shared.rank import create_rank
 
 def handle_frequency_command(group_id: int, start:datetime, end:datetime) -> list:
+    try:
+        return StravaDailyRollup().count_active_days(group_id, start, end)
+    except OperationFailure as e:
+        logger.warning("Agregação de frequência falhou para grupo %s, calculando em memória: %s", group_id, e)
+
     activity_repo = StravaActivity()
-    sync_all_activities(group_id)
-    activities = activity_repo.get_activities(group_id, start, end)
+    activities = activity_repo.get_activities(group_id, start, end, fields=FrequencyService.FIELDS)
     logger.info("Calculando frequência para grupo %s (%d atividades)", group_id, len(activities))
     service = FrequencyService(activities)
     return service.calculate()
 
 def handle_year_frequency_command(group_id: int) -> str:
+    ensure_fresh(group_id)
+    return default_response_cache.get_or_render(
+        group_id, "yfrequency", lambda: render_year_frequency(group_id), period=datetime.now().date()
+    )
+
+def render_year_frequency(group_id: int) -> str:
     group_repo = StravaGroup()
     group = group_repo.get_group(group_id)
     now = datetime.now()
@@ -34,6 +47,12 @@ def handle_year_frequency_command(group_id: int) -> str:
     return create_rank(f"Ranking de Frequência - {now.year}", freq_result_rank, group)
 
 def handle_month_frequency_command(group_id: int) -> str:
+    ensure_fresh(group_id)
+    return default_response_cache.get_or_render(
+        group_id, "frequency", lambda: render_month_frequency(group_id), period=datetime.now().date()
+    )
+
+def render_month_frequency(group_id: int) -> str:
     group_repo = StravaGroup()
     group = group_repo.get_group(group_id)
     now = datetime.now()
@@ -1,13 +1,18 @@
 import logging
+from application.response_cache import default_response_cache
 from infrastructure.mongo.strava_group import StravaGroup
 
 logger = logging.getLogger(__name__)
 from domain.services.medal_service import MedalService
 from shared.rank import create_rank
-from shared.user import get_user
+from shared.user import MemberDirectory
 
 
 def handle_medal_command(group_id: int) -> str:
+    return default_response_cache.get_or_render(group_id, "medalhas", lambda: render_medal(group_id))
+
+
+def render_medal(group_id: int) -> str:
     group_repo = StravaGroup()
     group = group_repo.get_group(group_id)
 
@@ -28,8 +33,9 @@ def handle_medal_command(group_id: int) -> str:
     }
 
     medalhas_list = []
+    directory = MemberDirectory(group.membros)
     for user_name, medal_data in medal_result.items():
-        user = get_user(group.membros, user_name=user_name)
+        user = directory.get_user(user_name=user_name)
 
         if not user:
             continue
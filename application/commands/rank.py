@@ -1,33 +1,59 @@
 import logging
 from datetime import datetime
+from pymongo.errors import OperationFailure
 
-from application.sync_activities import sync_all_activities
+from application.response_cache import default_response_cache
+from application.sync_scheduler import ensure_fresh
 
 logger = logging.getLogger(__name__)
+
+# textos da mensagem do menu enquanto o ranking escolhido é calculado
+RANK_PLACEHOLDER = "Calculando o ranking…"
+RANK_FAILED = "Não foi possível calcular o ranking agora, tente novamente."
 from domain.services.rank_service import RankService
 from infrastructure.mongo.strava_activity import StravaActivity
+from infrastructure.mongo.strava_daily_rollup import StravaDailyRollup
 from infrastructure.mongo.strava_group import StravaGroup
 from shared.rank import create_rank
 
+def calculate_rank(group_id: int, sport_type: str, start: datetime, end: datetime) -> list:
+    """
+    Soma por atleta a partir dos totais diários; se o servidor recusar a agregação,
+    cai para o RankService em memória, que produz o mesmo (athlete_id, total).
+    """
+    rank_type = RankService.rank_type_for(sport_type)
+    try:
+        return StravaDailyRollup().sum_by_athlete(group_id, start, end, sport_type, rank_type)
+    except OperationFailure as e:
+        logger.warning("Agregação do rank falhou para grupo %s, calculando em memória: %s", group_id, e)
+
+    activity_repo = StravaActivity()
+    activities = activity_repo.get_activities(group_id, start, end, fields=RankService.FIELDS)
+    logger.info("Calculando rank de %s para grupo %s (%d atividades)", sport_type, group_id, len(activities))
+    return RankService(activities).calculate(sport_type)
+
 def handle_rank_command(group_id: int, sport_type: str, start: datetime, end: datetime) -> str:
+    # fora do render: o acerto no cache também conta o grupo como ativo e respeita o limite de defasagem
+    ensure_fresh(group_id)
+    return default_response_cache.get_or_render(
+        group_id, "rank", lambda: render_rank(group_id, sport_type, start, end),
+        sport_type=sport_type, period=(start, end, datetime.now().date()),
+    )
+
+def render_rank(group_id: int, sport_type: str, start: datetime, end: datetime) -> str:
     now = datetime.now()
-    activity_repo = StravaActivity()
     group_repo = StravaGroup()
     group = group_repo.get_group(group_id)
-
-    sync_all_activities(group_id)
-    activities = activity_repo.get_activities(group_id, start, end)
-    logger.info("Calculando rank de %s para grupo %s (%d atividades)", sport_type, group_id, len(activities))
-    service = RankService(activities)
-    rank_result = service.calculate(sport_type)
+    rank_result = calculate_rank(group_id, sport_type, start, end)
 
     if not rank_result:
         logger.info("Nenhuma atividade de %s encontrada para o grupo %s", sport_type, group_id)
         return "Nenhuma atividade registrada este mês."
 
+    rank_type = RankService.rank_type_for(sport_type)
     return create_rank(
         f"Ranking de {sport_type} - {now.strftime('%B')}",
-        [(user_id, convert_rank(rank, service.get_rank_type())) for user_id, rank in rank_result],
+        [(user_id, convert_rank(rank, rank_type)) for user_id, rank in rank_result],
         group,
         sport_type=sport_type
     )
@@ -47,22 +73,73 @@ def convert_rank(rank: int, rank_params: str) -> str     :
         return convert_rank_to_hour_minute_seconds(rank)
     return convert_rank_to_km(rank)
 
-def handle_rank_year_command(group_id: int, sport_type: str) -> str:
-    now = datetime.now()
-    start = datetime(now.year, 1, 1)
-    end = datetime(now.year + 1, 1, 1)
-    return handle_rank_command(group_id, sport_type, start, end)
+def year_period(now: datetime) -> tuple[datetime, datetime]:
+    return datetime(now.year, 1, 1), datetime(now.year + 1, 1, 1)
 
-def handle_rank_month_command(group_id: int, sport_type: str) -> str:
-    now = datetime.now()
+def month_period(now: datetime) -> tuple[datetime, datetime]:
     start = datetime(now.year, now.month, 1)
     if now.month == 12:
-        end = datetime(now.year + 1, 1, 1)
-    else:
-        end = datetime(now.year, now.month + 1, 1)
-    return handle_rank_command(group_id, sport_type, start, end)
+        return start, datetime(now.year + 1, 1, 1)
+    return start, datetime(now.year, now.month + 1, 1)
+
+def handle_rank_year_command(group_id: int, sport_type: str) -> str:
+    return handle_rank_command(group_id, sport_type, *year_period(datetime.now()))
+
+def handle_rank_month_command(group_id: int, sport_type: str) -> str:
+    return handle_rank_command(group_id, sport_type, *month_period(datetime.now()))
 
 def handle_rank_menu(group_id: int, start: datetime, end: datetime) -> list:
-    sync_all_activities(group_id)
-    activity_repo = StravaActivity()
-    return activity_repo.list_sports(group_id, start, end)
\ No newline at end of file
+    ensure_fresh(group_id)
+    rollup_repo = StravaDailyRollup()
+    return rollup_repo.list_sports(group_id, start, end)
+
+
+async def calculate_rank_async(repository, group_id: int, sport_type: str, start: datetime, end: datetime) -> list:
+    """calculate_rank sobre o AsyncStravaRepository, com o mesmo fallback em memória."""
+    rank_type = RankService.rank_type_for(sport_type)
+    try:
+        return await repository.sum_by_athlete(group_id, start, end, sport_type, rank_type)
+    except OperationFailure as e:
+        logger.warning("Agregação do rank falhou para grupo %s, calculando em memória: %s", group_id, e)
+
+    activities = await repository.get_activities(group_id, start, end, fields=RankService.FIELDS)
+    logger.info("Calculando rank de %s para grupo %s (%d atividades)", sport_type, group_id, len(activities))
+    return RankService(activities).calculate(sport_type)
+
+async def handle_rank_command_async(repository, syncer, group_id: int, sport_type: str, start: datetime, end: datetime) -> str:
+    """
+    handle_rank_command do runtime assíncrono: lê pelo AsyncStravaRepository
+    e sincroniza pelo AsyncSyncer, dividindo o cache de respostas com o runtime em threads.
+    """
+    await syncer.ensure_fresh(group_id)
+    return await default_response_cache.get_or_render_async(
+        group_id, "rank", lambda: render_rank_async(repository, group_id, sport_type, start, end),
+        sport_type=sport_type, period=(start, end, datetime.now().date()),
+    )
+
+async def render_rank_async(repository, group_id: int, sport_type: str, start: datetime, end: datetime) -> str:
+    now = datetime.now()
+    group = await repository.get_group(group_id)
+    rank_result = await calculate_rank_async(repository, group_id, sport_type, start, end)
+
+    if not rank_result:
+        logger.info("Nenhuma atividade de %s encontrada para o grupo %s", sport_type, group_id)
+        return "Nenhuma atividade registrada este mês."
+
+    rank_type = RankService.rank_type_for(sport_type)
+    return create_rank(
+        f"Ranking de {sport_type} - {now.strftime('%B')}",
+        [(user_id, convert_rank(rank, rank_type)) for user_id, rank in rank_result],
+        group,
+        sport_type=sport_type
+    )
+
+async def handle_rank_year_command_async(repository, syncer, group_id: int, sport_type: str) -> str:
+    return await handle_rank_command_async(repository, syncer, group_id, sport_type, *year_period(datetime.now()))
+
+async def handle_rank_month_command_async(repository, syncer, group_id: int, sport_type: str) -> str:
+    return await handle_rank_command_async(repository, syncer, group_id, sport_type, *month_period(datetime.now()))
+
+async def handle_rank_menu_async(repository, syncer, group_id: int, start: datetime, end: datetime) -> list:
+    await syncer.ensure_fresh(group_id)
+    return await repository.list_sports(group_id, start, end)
@@ -1,40 +1,48 @@
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from application.sync_activities import sync_all_activities
+from application.response_cache import default_response_cache
+from application.sync_scheduler import ensure_fresh
 
 logger = logging.getLogger(__name__)
-from domain.services.streak_service import StreakService
-from infrastructure.mongo.strava_activity import StravaActivity
 from infrastructure.mongo.strava_group import StravaGroup
+from infrastructure.mongo.strava_streak import StravaStreak
 from shared.rank import create_rank
 
 def handle_streak_command(group_id: int) -> str:
-    activity_repo = StravaActivity()
+    ensure_fresh(group_id)
+    return default_response_cache.get_or_render(
+        group_id, "streak", lambda: render_streak(group_id), period=datetime.now().date()
+    )
+
+def render_streak(group_id: int) -> str:
+    streak_repo = StravaStreak()
     group_repo = StravaGroup()
     group = group_repo.get_group(group_id)
-    sync_all_activities(group_id)
 
     today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    tomorrow = today + timedelta(days=1)
-    last_60_days = today - timedelta(days=60)
-
-    today_activity_list = activity_repo.get_activities(group_id, today, tomorrow)
-    today_athlete_id_list = list(set(map(lambda x: x["athlete"]["id"], today_activity_list)))
+    streak_result = streak_repo.current_streaks(group_id, today)
 
-    if not today_athlete_id_list:
+    if not streak_result:
         logger.info("Nenhuma atividade hoje para grupo %s", group_id)
         return "Ninguem fez atividade hoje"
 
-    activity_list = activity_repo.get_activities(
-        group_id,
-        last_60_days,
-        today,
-        member_id_list=today_athlete_id_list
-    )
+    logger.info("Exibindo streak de %d membros ativos no grupo %s", len(streak_result), group_id)
+    return create_rank("Sequencia de dias ativos", streak_result, group)
 
-    logger.info("Calculando streak para %d membros ativos no grupo %s", len(today_athlete_id_list), group_id)
-    streak_service = StreakService(activity_list)
-    streak_result = streak_service.calculate()
+def handle_max_streak_command(group_id: int) -> str:
+    ensure_fresh(group_id)
+    return default_response_cache.get_or_render(group_id, "maxstreak", lambda: render_max_streak(group_id))
 
-    return create_rank("Sequencia de dias ativos", streak_result, group)
+def render_max_streak(group_id: int) -> str:
+    streak_repo = StravaStreak()
+    group_repo = StravaGroup()
+    group = group_repo.get_group(group_id)
+
+    streak_result = streak_repo.longest_streaks(group_id)
+
+    if not streak_result:
+        logger.info("Nenhuma sequência registrada para grupo %s", group_id)
+        return "Nenhuma atividade registrada."
+
+    return create_rank("Maiores sequencias de dias ativos", streak_result, group)
@@ -0,0 +1,81 @@
+import logging
+import sys
+from typing import Optional
+
+from application.response_cache import default_response_cache
+from application.sync_activities import LEASE_TTL, lease_owner, wait_for_lease
+from infrastructure.mongo.strava_activity import StravaActivity
+from infrastructure.mongo.strava_daily_rollup import ACTIVITY_FIELDS, StravaDailyRollup
+from infrastructure.mongo.strava_group import StravaGroup
+from infrastructure.mongo.strava_streak import StravaStreak
+from infrastructure.mongo.strava_sync_lease import StravaSyncLease
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_rollups(group_ids: Optional[list[int]] = None) -> dict:
+    """
+    Regenera os totais diários e as sequências a partir das atividades cruas.
+    Cada grupo é recalculado com a lease de sync dele, para nenhum sync gravar
+    atividades entre a leitura e a substituição dos totais; grupos cuja lease
+    não vaga dentro de LEASE_WAIT ficam para a próxima execução.
+    Args:
+        group_ids (list): grupos a recalcular; todos se não informado
+    Returns:
+        dict: group_id -> linhas de rollup geradas
+    """
+    activity_repo = StravaActivity()
+    rollup_repo = StravaDailyRollup()
+    if group_ids is None:
+        group_ids = StravaGroup().list_group_ids()
+
+    lease_repo = StravaSyncLease()
+    owner = lease_owner()
+
+    rows = {}
+    for group_id in group_ids:
+        if not _acquire_lease(lease_repo, group_id, owner):
+            logger.warning("Rollup do grupo %s não recalculado: sync em andamento", group_id)
+            continue
+        try:
+            activities = activity_repo.list_group_activities(group_id, ACTIVITY_FIELDS)
+            rows[group_id] = rollup_repo.rebuild(group_id, activities)
+        finally:
+            lease_repo.release(group_id, owner)
+        default_response_cache.bump(group_id)
+        logger.info("Rollup do grupo %s recalculado: %d linhas", group_id, rows[group_id])
+    return rows
+
+
+def _acquire_lease(lease_repo: StravaSyncLease, group_id: int, owner: str) -> bool:
+    while not lease_repo.acquire(group_id, owner, LEASE_TTL):
+        if not wait_for_lease(lease_repo, group_id):
+            return False
+    return True
+
+
+def ensure_rollups() -> None:
+    """
+    Na primeira subida após a migração as coleções derivadas estão vazias:
+    gera a partir das atividades para os comandos não responderem vazio.
+    """
+    if StravaActivity.objects.first() is None:
+        return
+    if StravaDailyRollup.objects.first() is None or StravaStreak.objects.first() is None:
+        logger.info("Rollups ou sequências vazios, recalculando a partir das atividades")
+        rebuild_rollups()
+
+
+def main() -> int:
+    import mongoengine
+    from config import MONGO_URI
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    mongoengine.connect(host=MONGO_URI)
+    group_ids = [int(arg) for arg in sys.argv[1:]] or None
+    rebuild_rollups(group_ids)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
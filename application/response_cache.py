@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 2048
+# mesmo prazo de COMMAND_MAX_STALENESS: membros vinculados fora do bot aparecem no máximo depois disso
+ENTRY_TTL_SECONDS = 2 * 60 * 60
+
+
+class ResponseCache:
+    """
+    Cache LRU das respostas já renderizadas dos comandos de leitura, por
+    (grupo, comando, modalidade, período). Cada grupo tem uma versão de dados
+    incrementada por bump() quando atividades, medalhas ou membros mudam;
+    entradas gravadas com uma versão anterior deixam de valer.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl_seconds: float = ENTRY_TTL_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._versions: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, group_id: int) -> int:
+        with self._lock:
+            return self._versions.get(group_id, 0)
+
+    def bump(self, group_id: int) -> None:
+        """Invalida todas as respostas do grupo."""
+        with self._lock:
+            self._versions[group_id] = self._versions.get(group_id, 0) + 1
+
+    def get(self, key: tuple) -> Optional[str]:
+        """
+        Args:
+            key (tuple): (group_id, comando, modalidade, período)
+        Returns:
+            str: resposta em cache, ou None se ausente, expirada ou de versão anterior
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            version, stored_at, response = entry
+            if version != self._versions.get(key[0], 0) or self.clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key: tuple, response: str, version: int) -> None:
+        """
+        Grava a resposta com a versão lida antes de renderizar: se o grupo
+        mudou durante a renderização, a entrada já nasce inválida.
+        """
+        with self._lock:
+            self._entries[key] = (version, self.clock(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_render(self, group_id: int, command: str, render: Callable[[], str], sport_type: Optional[str] = None, period: Hashable = None) -> str:
+        key = (group_id, command, sport_type, period)
+        response = self.get(key)
+        if response is not None:
+            logger.debug("Resposta de %s do grupo %s servida do cache", command, group_id)
+            return response
+        version = self.version(group_id)
+        response = render()
+        self.put(key, response, version)
+        return response
+
+    async def get_or_render_async(self, group_id: int, command: str, render: Callable[[], Awaitable[str]], sport_type: Optional[str] = None, period: Hashable = None) -> str:
+        """get_or_render para os handlers do runtime assíncrono."""
+        key = (group_id, command, sport_type, period)
+        response = self.get(key)
+        if response is not None:
+            logger.debug("Resposta de %s do grupo %s servida do cache", command, group_id)
+            return response
+        version = self.version(group_id)
+        response = await render()
+        self.put(key, response, version)
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+default_response_cache = ResponseCache()
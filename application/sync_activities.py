@@ -1,60 +1,470 @@
 import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional
 
-from requests import HTTPError
+from requests import HTTPError, RequestException
+from adapters.strava_budget import PRIORITY_HIGH, PRIORITY_LOW, BudgetExhausted
 from adapters.strava_client import StravaClient
+from adapters.strava_token_cache import StravaTokenCache, default_token_cache
+from application.response_cache import default_response_cache
+from application.single_flight import SingleFlight
 from infrastructure.mongo.strava_activity import StravaActivity
 from infrastructure.mongo.strava_group import StravaGroup
+from infrastructure.mongo.strava_sync_lease import StravaSyncLease
 
 logger = logging.getLogger(__name__)
 
+MAX_WORKERS = 8
+PER_PAGE = 200
+MIN_SYNC_INTERVAL = timedelta(minutes=1)
+BACKFILL_AGE = timedelta(days=7)
+# maior que o sync mais demorado esperado; só vence se o processo dono morrer
+LEASE_TTL = timedelta(minutes=10)
+# folga para gravar o resultado antes de a lease vencer
+LEASE_MARGIN = timedelta(minutes=1)
+LEASE_POLL_SECONDS = 0.5
+LEASE_WAIT = timedelta(minutes=2)
 
-def sync_all_activities(group_id: int):
+group_flights = SingleFlight()
+
+
+def lease_owner() -> str:
+    """Dono único por sync: processos e threads diferentes nunca compartilham a lease."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+
+def lease_deadline() -> float:
+    """Até quando (time.monotonic()) um sync que acabou de tomar a lease pode esperar por orçamento do Strava."""
+    return time.monotonic() + (LEASE_TTL - LEASE_MARGIN).total_seconds()
+
+
+def wait_for_lease(lease_repo: StravaSyncLease, group_id: int, timeout: timedelta = LEASE_WAIT) -> bool:
+    """
+    Espera o sync de outro processo terminar.
+    Returns:
+        bool: se a lease foi liberada dentro do prazo
+    """
+    deadline = time.monotonic() + timeout.total_seconds()
+    while lease_repo.is_held(group_id):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(LEASE_POLL_SECONDS)
+    return True
+
+
+def recently_synced(group, min_interval: timedelta) -> bool:
+    return bool(group.last_sync and group.last_sync > datetime.now() - min_interval)
+
+
+class SyncStamps:
+    """
+    Último last_sync conhecido de cada grupo, em memória. Atualizado sempre que
+    um sync grava ou lê o grupo, permite aos comandos saber se os dados estão
+    velhos sem ir ao MongoDB.
+    """
+
+    def __init__(self):
+        self._stamps: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+
+    def record(self, group_id: int, last_sync: Optional[datetime]) -> None:
+        if last_sync is None:
+            return
+        with self._lock:
+            if last_sync > self._stamps.get(group_id, datetime.min):
+                self._stamps[group_id] = last_sync
+
+    def fresh(self, group_id: int, max_age: timedelta) -> bool:
+        with self._lock:
+            last_sync = self._stamps.get(group_id)
+        return bool(last_sync and last_sync > datetime.now() - max_age)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stamps.clear()
+
+
+sync_stamps = SyncStamps()
+
+
+class MemberSyncResult:
+    """Resultado da sincronização de um membro do grupo."""
+
+    def __init__(self, member_name: str):
+        self.member_name = member_name
+        self.fetched = 0
+        self.pages = 0
+        self.latency = 0.0
+        self.error: Optional[Exception] = None
+        self.tokens: Optional[dict] = None
+        self.last_activity_date = None
+        self.calls = 0
+        self.saved: dict = {}
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def fetch_all_pages(strava_client: StravaClient, access_token: str, after: datetime, per_page: int = PER_PAGE, priority: int = PRIORITY_HIGH) -> tuple[list[dict], int]:
+    """
+    Busca todas as páginas de atividades até receber uma página incompleta.
+    Args:
+        strava_client (StravaClient): cliente do Strava
+        access_token (str): token de acesso do membro
+        after (datetime): data a partir da qual buscar atividades
+        per_page (int): número de atividades por página
+        priority (int): prioridade no orçamento global do Strava
+    Returns:
+        tuple: lista de atividades e quantidade de páginas buscadas
+    """
+    activities = []
+    page = 0
+    while True:
+        page += 1
+        data = strava_client.fetch_activities(access_token, after, page=page, per_page=per_page, priority=priority)
+        activities.extend(data)
+        if len(data) < per_page:
+            return activities, page
+
+
+def parse_activity_date(value):
+    """Converte a data do Strava ('%Y-%m-%dT%H:%M:%SZ') em datetime; datetimes passam direto."""
+    if not value or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ')
+    except ValueError:
+        return datetime.fromisoformat(value)
+
+
+def member_cursor(member_data: dict) -> tuple[datetime, int]:
+    """
+    Returns:
+        tuple: data a partir da qual buscar as atividades do membro e a prioridade da busca
+    """
+    after = parse_activity_date(member_data.get("last_activity_date"))
+    if not after:
+        after = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    # buscas muito antigas (ex.: após /reset) são backfill e cedem orçamento às demais
+    priority = PRIORITY_LOW if after < datetime.now() - BACKFILL_AGE else PRIORITY_HIGH
+    return after, priority
+
+
+def fetch_member(strava_client: StravaClient, member_name: str, member_data: dict, token_cache: Optional[StravaTokenCache] = None) -> tuple[MemberSyncResult, list[dict]]:
+    """
+    Busca as atividades novas de um membro. O token é renovado antes de expirar
+    via cache por atleta e, como último recurso, após um 401.
+    Qualquer erro (HTTP, falta de orçamento ou inesperado) é registrado no
+    resultado em vez de propagado, e nenhuma atividade do membro é devolvida.
+    """
+    token_cache = token_cache or default_token_cache
+    athlete_id = member_data.get("athlete_id")
+    result = MemberSyncResult(member_name)
+    started = time.monotonic()
+    activities = []
+    refresh_calls = 0
+    after, priority = member_cursor(member_data)
+
+    try:
+        tokens, refreshed = token_cache.get_valid(athlete_id, member_data, strava_client)
+        refresh_calls += refreshed
+        try:
+            activities, result.pages = fetch_all_pages(strava_client, tokens["access_token"], after, priority=priority)
+        except HTTPError as e:
+            if e.response is None or e.response.status_code != 401:
+                raise
+            logger.warning("Token expirado para %s, renovando...", member_name)
+            tokens, refreshed = token_cache.force_refresh(athlete_id, tokens, strava_client)
+            refresh_calls += 1 + refreshed
+            activities, result.pages = fetch_all_pages(strava_client, tokens["access_token"], after, priority=priority)
+        finally:
+            if tokens["access_token"] != member_data.get("access_token"):
+                result.tokens = tokens
+
+        result.fetched = len(activities)
+        logger.info("Membro %s: %d atividades encontradas em %d página(s)", member_name, result.fetched, result.pages)
+        if activities:
+            result.last_activity_date = parse_activity_date(activities[-1]["start_date_local"])
+    except RequestException as e:
+        status_code = getattr(e.response, "status_code", None)
+        logger.error("Erro HTTP %s ao buscar atividades de %s: %s", status_code, member_name, e)
+        result.error = e
+    except BudgetExhausted as e:
+        logger.warning("Sem orçamento do Strava para buscar atividades de %s: %s", member_name, e)
+        result.error = e
+    except Exception as e:
+        # um membro com dados inesperados não derruba o sync do grupo inteiro
+        logger.exception("Erro inesperado ao buscar atividades de %s", member_name)
+        result.error = e
+
+    result.calls = max(result.pages, 1) + refresh_calls
+    result.latency = time.monotonic() - started
+    return result, activities if result.ok else []
+
+
+def changed(saved: dict) -> bool:
+    """Se a gravação inseriu ou alterou atividades (e as respostas em cache do grupo ficaram velhas)."""
+    return bool(saved.get("inserted") or saved.get("updated"))
+
+
+def sync_member(strava_client: StravaClient, activity_repo: StravaActivity, group_id: int, member_name: str, member_data: dict) -> MemberSyncResult:
+    """Sincroniza as atividades de um único membro de um grupo."""
+    result, activities = fetch_member(strava_client, member_name, member_data)
+    if activities:
+        result.saved = activity_repo.save_activities(group_id, activities)
+        if changed(result.saved):
+            default_response_cache.bump(group_id)
+    return result
+
+
+def apply_member_result(group_repo: StravaGroup, group_id: int, group, member_name: str, result: MemberSyncResult) -> None:
+    """
+    Grava tokens e cursor do membro com updates por campo, sem reescrever o
+    grupo, e reflete os valores no documento já carregado. Membro com erro não
+    avança o cursor; só os tokens renovados são gravados, pois o Strava
+    invalida o refresh token anterior.
+    """
+    member_data = group.membros[member_name]
+    if result.tokens:
+        group_repo.set_member_fields(group_id, member_name, result.tokens)
+        member_data.update(result.tokens)
+    if result.ok and result.last_activity_date:
+        group_repo.advance_member_cursor(group_id, member_name, result.last_activity_date)
+        member_data["last_activity_date"] = result.last_activity_date
+    group.membros[member_name] = member_data
+
+
+def record_group_sync(group_repo: StravaGroup, group_id: int, group, results: list[MemberSyncResult]) -> None:
+    """Grava tokens e cursores de cada membro e o last_sync do grupo."""
+    for result in results:
+        apply_member_result(group_repo, group_id, group, result.member_name, result)
+
+    group.last_sync = datetime.now()
+    group_repo.set_last_sync(group_id, group.last_sync)
+    sync_stamps.record(group_id, group.last_sync)
+    # membros vinculados fora do add_member passam a ser achados pelo webhook
+    group_repo.reconcile_athlete_ids(group)
+    failed = [result.member_name for result in results if not result.ok]
+    logger.info(
+        "Sync do grupo %s concluído: %d atividades, %d falha(s) %s",
+        group_id, sum(result.fetched for result in results), len(failed), failed
+    )
+
+
+def sync_all_activities(group_id: int, max_workers: int = MAX_WORKERS, min_interval: timedelta = MIN_SYNC_INTERVAL) -> list[MemberSyncResult]:
+    """
+    Sincroniza as atividades de todos os membros do grupo em paralelo.
+    Chamadas concorrentes para o mesmo grupo no processo compartilham um único
+    sync; entre processos, só quem toma a StravaSyncLease sincroniza e os demais
+    esperam ela ser liberada.
+    Args:
+        group_id (int): O ID do grupo.
+        max_workers (int): número máximo de membros sincronizados ao mesmo tempo.
+        min_interval (timedelta): ignora o sync se o último foi há menos que isso.
+    Returns:
+        list: resultado da sincronização de cada membro.
+    """
+    return group_flights.do(group_id, lambda: _sync_group(group_id, max_workers, min_interval))
+
+
+def _sync_group(group_id: int, max_workers: int, min_interval: timedelta) -> list[MemberSyncResult]:
     group_repo = StravaGroup()
-    activity_repo = StravaActivity()
-    strava_client = StravaClient()
+    lease_repo = StravaSyncLease()
     group = group_repo.get_group(group_id)
 
     if not group:
         logger.warning("Grupo %s não encontrado, sync ignorado", group_id)
-        return
+        return []
+
+    sync_stamps.record(group_id, group.last_sync)
+    if recently_synced(group, min_interval):
+        logger.debug("Grupo %s sincronizado há menos de %s, ignorando", group_id, min_interval)
+        return []
+
+    owner = lease_owner()
+    if not lease_repo.acquire(group_id, owner, LEASE_TTL):
+        logger.info("Grupo %s já está sendo sincronizado por outro processo, aguardando", group_id)
+        if not wait_for_lease(lease_repo, group_id):
+            logger.warning("Lease de sync do grupo %s não foi liberada em %s", group_id, LEASE_WAIT)
+        return []
 
-    if group.last_sync and group.last_sync > datetime.now() - timedelta(minutes=1):
-        logger.debug("Grupo %s sincronizado há menos de 1 minuto, ignorando", group_id)
-        return
+    try:
+        # relido com a lease: quem a detinha antes pode ter acabado de gravar last_sync
+        group = group_repo.get_group(group_id)
+        if group:
+            sync_stamps.record(group_id, group.last_sync)
+        if not group or recently_synced(group, min_interval):
+            logger.debug("Grupo %s sincronizado por outro processo, ignorando", group_id)
+            return []
+        return _sync_members(group_repo, group_id, group, max_workers, lease_deadline())
+    finally:
+        lease_repo.release(group_id, owner)
+
+
+def _sync_members(group_repo: StravaGroup, group_id: int, group, max_workers: int, deadline: Optional[float] = None) -> list[MemberSyncResult]:
+    activity_repo = StravaActivity()
+    strava_client = StravaClient(group_id=group_id, deadline=deadline)
 
     logger.info("Iniciando sync do grupo %s (%d membros)", group_id, len(group.membros))
 
-    for member_name, member_data in group.membros.items():
-        after = member_data.get("last_activity_date")
+    members = list(group.membros.items())
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(members)))) as executor:
+        futures = [
+            executor.submit(sync_member, strava_client, activity_repo, group_id, member_name, dict(member_data))
+            for member_name, member_data in members
+        ]
+        results = [future.result() for future in futures]
 
-        if not after:
-            after = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    record_group_sync(group_repo, group_id, group, results)
+    logger.debug("Orçamento do Strava após sync do grupo %s: %s", group_id, strava_client.budget.headroom())
+    return results
 
-        try:
-            activities = strava_client.fetch_activities(member_data["access_token"], after)
-        except HTTPError as e:
-            if e.response.status_code != 401:
-                logger.error("Erro HTTP %s ao buscar atividades de %s", e.response.status_code, member_name)
-                raise e
-            logger.warning("Token expirado para %s, renovando...", member_name)
-            response = strava_client.refresh_access_token(member_data["refresh_token"])
-            member_data["access_token"] = response["access_token"]
-            member_data["refresh_token"] = response["refresh_token"]
-            group.membros[member_name] = member_data
-            activities = strava_client.fetch_activities(member_data["access_token"], after)
-
-        logger.info("Membro %s: %d atividades encontradas", member_name, len(activities))
-
-        for activity in activities:
-            activity_repo.save_activity(group_id, activity)
-
-        if not activities:
-            continue
-        last_activity = activities[-1]
-        member_data["last_activity_date"] = last_activity["start_date_local"]
-        group.membros[member_name] = member_data
+
+class AthleteSyncReport:
+    """Resultado de um ciclo de sync deduplicado por atleta."""
+
+    def __init__(self):
+        self.results: dict = {}
+        self.group_fetched: dict[int, int] = {}
+        self.memberships = 0
+        self.calls_made = 0
+        self.calls_saved = 0
+
+    @property
+    def athletes(self) -> int:
+        return len(self.results)
+
+
+def _sync_athlete(activity_repo: StravaActivity, token_cache: StravaTokenCache, groups: dict, memberships: list[tuple[int, str]], deadline: Optional[float] = None) -> tuple[MemberSyncResult, list[dict]]:
+    """
+    Busca as atividades do atleta uma única vez, a partir do cursor mais
+    antigo entre os grupos, e grava o lote em cada grupo do qual participa.
+    """
+    first_group_id, first_name = memberships[0]
+    member_data = dict(groups[first_group_id].membros[first_name])
+    # cursor vazio vira o padrão de member_cursor antes da comparação: um grupo
+    # sem cursor não pode adiantar a busca de outro com cursor mais antigo
+    member_data["last_activity_date"] = min(
+        member_cursor(groups[group_id].membros[name])[0] for group_id, name in memberships
+    )
+
+    result, activities = fetch_member(StravaClient(group_id=first_group_id, deadline=deadline), first_name, member_data, token_cache)
+    if activities:
+        for group_id, _ in memberships:
+            if changed(activity_repo.save_activities(group_id, activities)):
+                default_response_cache.bump(group_id)
+    return result, activities
+
+
+def sync_athletes(
+    group_ids: list[int],
+    max_workers: int = MAX_WORKERS,
+    min_interval: timedelta = MIN_SYNC_INTERVAL,
+    token_cache: Optional[StravaTokenCache] = None,
+) -> AthleteSyncReport:
+    """
+    Sincroniza vários grupos deduplicando por athlete_id: cada atleta é buscado
+    uma vez por ciclo e o resultado é replicado para todos os seus grupos.
+    Args:
+        group_ids (list): IDs dos grupos, em ordem de prioridade.
+        max_workers (int): número máximo de atletas sincronizados ao mesmo tempo.
+        min_interval (timedelta): ignora grupos sincronizados há menos que isso.
+        token_cache (StravaTokenCache): cache de tokens compartilhado entre syncs.
+    Returns:
+        AthleteSyncReport: resultados por atleta e chamadas economizadas.
+    """
+    group_repo = StravaGroup()
+    lease_repo = StravaSyncLease()
+    token_cache = token_cache or default_token_cache
+    report = AthleteSyncReport()
+    owner = lease_owner()
+    # tomado antes da primeira lease: vale para todas
+    deadline = lease_deadline()
+    leased = []
+    groups = {}
+
+    try:
+        for group_id in group_ids:
+            # a lease vem antes da leitura: last_sync já reflete um sync que acabou de terminar
+            if not lease_repo.acquire(group_id, owner, LEASE_TTL):
+                logger.debug("Grupo %s já está sendo sincronizado, ignorando neste ciclo", group_id)
+                continue
+            leased.append(group_id)
+            group = group_repo.get_group(group_id)
+            if not group:
+                logger.warning("Grupo %s não encontrado, sync ignorado", group_id)
+                continue
+            sync_stamps.record(group_id, group.last_sync)
+            if recently_synced(group, min_interval):
+                logger.debug("Grupo %s sincronizado há menos de %s, ignorando", group_id, min_interval)
+                continue
+            groups[group_id] = group
+
+        if groups:
+            _sync_groups_by_athlete(group_repo, token_cache, report, groups, max_workers, deadline)
+        return report
+    finally:
+        for group_id in leased:
+            lease_repo.release(group_id, owner)
+
+
+def _sync_groups_by_athlete(group_repo: StravaGroup, token_cache: StravaTokenCache, report: AthleteSyncReport, groups: dict, max_workers: int, deadline: Optional[float] = None) -> None:
+    activity_repo = StravaActivity()
+    athletes: dict = {}
+    for group_id, group in groups.items():
+        for member_name, member_data in group.membros.items():
+            key = member_data.get("athlete_id") or (group_id, member_name)
+            athletes.setdefault(key, []).append((group_id, member_name))
+            report.memberships += 1
+
+    logger.info("Iniciando sync de %d atletas em %d grupos (%d vínculos)", len(athletes), len(groups), report.memberships)
+
+    # renova em lote, escalonado, os tokens que expiram em breve antes de buscar atividades
+    refreshed = token_cache.refresh_batch(
+        [
+            (key, groups[memberships[0][0]].membros[memberships[0][1]])
+            for key, memberships in athletes.items() if not isinstance(key, tuple)
+        ],
+        StravaClient(deadline=deadline),
+    )
+    report.calls_made += len(refreshed)
+    for key, tokens in refreshed.items():
+        for group_id, member_name in athletes[key]:
+            group_repo.set_member_fields(group_id, member_name, tokens)
+            member_data = groups[group_id].membros[member_name]
+            member_data.update(tokens)
+            groups[group_id].membros[member_name] = member_data
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(athletes)))) as executor:
+        futures = {
+            key: executor.submit(_sync_athlete, activity_repo, token_cache, groups, memberships, deadline)
+            for key, memberships in athletes.items()
+        }
+        for key, future in futures.items():
+            result, activities = future.result()
+            memberships = athletes[key]
+            report.results[key] = result
+            report.calls_made += result.calls
+            report.calls_saved += result.calls * (len(memberships) - 1)
+            for group_id, member_name in memberships:
+                # o Strava mantém um token por atleta: o token renovado vale para todos os grupos
+                apply_member_result(group_repo, group_id, groups[group_id], member_name, result)
+                report.group_fetched[group_id] = report.group_fetched.get(group_id, 0) + len(activities)
+
+    for group_id, group in groups.items():
         group.last_sync = datetime.now()
+        group_repo.set_last_sync(group_id, group.last_sync)
+        sync_stamps.record(group_id, group.last_sync)
+        group_repo.reconcile_athlete_ids(group)
 
-    logger.info("Sync do grupo %s concluído", group_id)
-    group.save()
\ No newline at end of file
+    logger.info(
+        "Sync por atleta concluído: %d chamadas ao Strava, %d economizadas pela deduplicação",
+        report.calls_made, report.calls_saved
+    )
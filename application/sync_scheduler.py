@@ -0,0 +1,170 @@
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from application.award_medals import award_month, previous_month
+from application.sync_activities import sync_all_activities, sync_athletes, sync_stamps
+from infrastructure.mongo.strava_group import StravaGroup
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_INTERVAL = timedelta(minutes=5)
+IDLE_INTERVAL = timedelta(hours=1)
+ACTIVE_WINDOW = timedelta(days=1)
+POLL_SECONDS = 5
+COMMAND_MAX_STALENESS = timedelta(hours=2)
+# espera após uma premiação com erro: dobra a cada falha seguida até o máximo
+AWARD_RETRY_BASE = timedelta(minutes=1)
+AWARD_RETRY_MAX = timedelta(hours=1)
+
+
+class SyncScheduler:
+    """
+    Sincroniza os grupos em background, fora do caminho dos comandos.
+    Grupos com uso ou atividades recentes são sincronizados a cada
+    ACTIVE_INTERVAL e passam na frente; os demais a cada IDLE_INTERVAL.
+    """
+
+    def __init__(
+        self,
+        active_interval: timedelta = ACTIVE_INTERVAL,
+        idle_interval: timedelta = IDLE_INTERVAL,
+        active_window: timedelta = ACTIVE_WINDOW,
+        poll_seconds: float = POLL_SECONDS,
+    ):
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.active_window = active_window
+        self.poll_seconds = poll_seconds
+        self._last_active: dict[int, datetime] = {}
+        self._next_run: dict[int, datetime] = {}
+        self._awarded_on: Optional[date] = None
+        self._award_failures = 0
+        self._award_retry_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def touch(self, group_id: int, now: Optional[datetime] = None) -> None:
+        """
+        Marca o grupo como ativo (comando recebido ou atividade nova) e
+        antecipa o próximo sync para no máximo ACTIVE_INTERVAL.
+        """
+        now = now or datetime.now()
+        with self._lock:
+            self._last_active[group_id] = now
+            next_run = self._next_run.get(group_id)
+            if next_run and next_run > now + self.active_interval:
+                self._next_run[group_id] = now + self.active_interval
+
+    def is_active(self, group_id: int, now: datetime) -> bool:
+        last_active = self._last_active.get(group_id)
+        return bool(last_active and last_active > now - self.active_window)
+
+    def interval_for(self, group_id: int, now: datetime) -> timedelta:
+        if self.is_active(group_id, now):
+            return self.active_interval
+        return self.idle_interval
+
+    def due_groups(self, now: datetime) -> list[int]:
+        """Grupos com sync vencido, os mais recentemente ativos primeiro."""
+        group_ids = StravaGroup().list_group_ids()
+        with self._lock:
+            due = [group_id for group_id in group_ids if self._next_run.get(group_id, now) <= now]
+            return sorted(due, key=lambda group_id: self._last_active.get(group_id, datetime.min), reverse=True)
+
+    def run_once(self, now: Optional[datetime] = None) -> list[int]:
+        """
+        Executa um ciclo: sincroniza todos os grupos vencidos de uma vez,
+        deduplicando atletas que participam de mais de um grupo.
+        Returns:
+            list: IDs dos grupos sincronizados
+        """
+        now = now or datetime.now()
+        due = self.due_groups(now)
+        if not due:
+            return []
+
+        try:
+            report = sync_athletes(due)
+            group_fetched = report.group_fetched
+        except Exception:
+            logger.exception("Erro no sync em background dos grupos %s", due)
+            group_fetched = {}
+
+        for group_id in due:
+            if group_fetched.get(group_id):
+                self.touch(group_id, now)
+            with self._lock:
+                self._next_run[group_id] = now + self.interval_for(group_id, now)
+        return due
+
+    def award_closed_month(self, now: Optional[datetime] = None) -> Optional[str]:
+        """
+        Premia o mês anterior uma vez por dia. A premiação é idempotente, então
+        repetir nos dias seguintes só incorpora atividades que chegaram atrasadas.
+        Uma falha é registrada e a próxima tentativa espera AWARD_RETRY_BASE,
+        dobrando a cada falha seguida até AWARD_RETRY_MAX.
+        Returns:
+            str: mês premiado ("YYYY-MM"), ou None se já premiado hoje, aguardando
+                nova tentativa ou em caso de erro
+        """
+        now = now or datetime.now()
+        if self._awarded_on == now.date():
+            return None
+        if self._award_retry_at and now < self._award_retry_at:
+            return None
+        month = previous_month(now)
+        try:
+            award_month(month)
+        except Exception:
+            delay = min(AWARD_RETRY_BASE * 2 ** self._award_failures, AWARD_RETRY_MAX)
+            self._award_failures += 1
+            self._award_retry_at = now + delay
+            logger.exception("Erro ao premiar %s (falha %d), nova tentativa em %s", month, self._award_failures, delay)
+            return None
+        self._awarded_on = now.date()
+        self._award_failures = 0
+        self._award_retry_at = None
+        return month
+
+    def _run(self) -> None:
+        logger.info("Agendador de sync iniciado")
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                self.award_closed_month()
+            except Exception:
+                logger.exception("Erro no ciclo do agendador de sync")
+            self._stop.wait(self.poll_seconds)
+        logger.info("Agendador de sync finalizado")
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sync-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+default_scheduler = SyncScheduler()
+
+
+def ensure_fresh(group_id: int, max_age: Optional[timedelta] = COMMAND_MAX_STALENESS) -> None:
+    """
+    Chamado pelos comandos de leitura: marca o grupo como ativo para o
+    agendador e só sincroniza inline se os dados forem mais velhos que max_age.
+    Dados frescos segundo sync_stamps não custam nenhuma ida ao MongoDB; o grupo
+    só é lido quando o último sync conhecido é antigo ou desconhecido.
+    Com max_age=None os comandos leem apenas o que já está no banco.
+    """
+    default_scheduler.touch(group_id)
+    if max_age is None or sync_stamps.fresh(group_id, max_age):
+        return
+    sync_all_activities(group_id, min_interval=max_age)
@@ -0,0 +1,130 @@
+import logging
+import queue
+import threading
+from typing import Optional
+
+from requests import HTTPError, RequestException
+from adapters.strava_budget import BudgetExhausted
+from adapters.strava_client import StravaClient
+from adapters.strava_token_cache import StravaTokenCache, default_token_cache
+from application.response_cache import default_response_cache
+from application.sync_activities import changed
+from infrastructure.mongo.strava_activity import StravaActivity
+from infrastructure.mongo.strava_group import StravaGroup
+from shared.user import MemberDirectory
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookIngestor:
+    """
+    Consome os eventos de webhook do Strava e busca somente as atividades
+    citadas, gravando-as em todos os grupos do atleta via StravaActivity.
+    """
+
+    def __init__(self, events: queue.Queue, token_cache: Optional[StravaTokenCache] = None):
+        self.events = events
+        self.token_cache = token_cache or default_token_cache
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _fetch_activity(self, groups: list, member_name: str, member_data: dict, activity_id: int) -> dict:
+        client = StravaClient(group_id=groups[0].telegram_group_id)
+        athlete_id = member_data.get("athlete_id")
+        tokens, _ = self.token_cache.get_valid(athlete_id, member_data, client)
+        try:
+            return client.fetch_activity(tokens["access_token"], activity_id)
+        except HTTPError as e:
+            if e.response is None or e.response.status_code != 401:
+                raise
+            logger.warning("Token expirado para %s, renovando...", member_name)
+            tokens, _ = self.token_cache.force_refresh(athlete_id, tokens, client)
+            return client.fetch_activity(tokens["access_token"], activity_id)
+        finally:
+            if tokens["access_token"] != member_data.get("access_token"):
+                self._save_tokens(groups, athlete_id, tokens)
+
+    def _save_tokens(self, groups: list, athlete_id: int, tokens: dict) -> None:
+        """
+        Grava os tokens renovados em todos os grupos do atleta, como o
+        sync_athletes: o Strava invalida o refresh token anterior.
+        """
+        group_repo = StravaGroup()
+        for group in groups:
+            member_name, member_data = MemberDirectory(group.membros).get_member(athlete_id)
+            if member_name is None:
+                continue
+            group_repo.set_member_fields(group.telegram_group_id, member_name, tokens)
+            member_data.update(tokens)
+
+    def handle(self, event: dict) -> None:
+        """
+        Processa um evento do Strava (object_type, aspect_type, object_id, owner_id).
+        """
+        if event.get("object_type") != "activity":
+            logger.info("Evento do Strava ignorado: %s", event)
+            return
+
+        aspect_type = event.get("aspect_type")
+        athlete_id = event.get("owner_id")
+        activity_id = event.get("object_id")
+        group_repo = StravaGroup()
+        activity_repo = StravaActivity()
+        groups = group_repo.find_by_athlete(athlete_id)
+
+        if not groups:
+            logger.info("Atleta %s não pertence a nenhum grupo, evento ignorado", athlete_id)
+            return
+
+        if aspect_type == "delete":
+            for group in groups:
+                activity_repo.remove_activity(group.telegram_group_id, activity_id)
+                default_response_cache.bump(group.telegram_group_id)
+            logger.info("Atividade %s removida de %d grupo(s)", activity_id, len(groups))
+            return
+
+        if aspect_type not in ("create", "update"):
+            logger.warning("aspect_type desconhecido no evento do Strava: %s", event)
+            return
+
+        member_name, member_data = MemberDirectory(groups[0].membros).get_member(athlete_id)
+        if member_name is None:
+            # athlete_ids desatualizado em relação a membros (ex.: remoção concorrente)
+            logger.warning("Atleta %s não encontrado nos membros do grupo %s, evento ignorado", athlete_id, groups[0].telegram_group_id)
+            return
+        try:
+            activity = self._fetch_activity(groups, member_name, member_data, activity_id)
+        except BudgetExhausted as e:
+            # o sync periódico busca a atividade depois, a partir do cursor do membro
+            logger.warning("Sem orçamento do Strava para buscar a atividade %s de %s: %s", activity_id, member_name, e)
+            return
+
+        for group in groups:
+            if changed(activity_repo.save_activities(group.telegram_group_id, [activity])):
+                default_response_cache.bump(group.telegram_group_id)
+        logger.info("Atividade %s (%s) gravada em %d grupo(s)", activity_id, aspect_type, len(groups))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                event = self.events.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                self.handle(event)
+            except RequestException as e:
+                logger.error("Erro HTTP ao processar evento do Strava %s: %s", event, e)
+            except Exception:
+                logger.exception("Erro ao processar evento do Strava %s", event)
+            finally:
+                self.events.task_done()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="strava-webhook-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
@@ -0,0 +1,152 @@
+"""
+Compara requisições por segundo do runtime em threads contra o asyncio:
+
+- strava: buscas de atividades em um Strava falso local com latência fixa,
+  StravaClient em um pool de MAX_WORKERS threads contra AsyncStravaClient
+  com asyncio.gather (a mesma sessão HTTP de POOL_SIZE conexões);
+- comandos: updates de chats diferentes com --round-trips idas ao banco de
+  latência simulada cada, UpdateDispatcher com TELEGRAM_WORKERS contra
+  AsyncUpdateDispatcher.
+
+    python -m benchmarks.async_runtime --requests 400 --latency-ms 50
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable
+
+from aiohttp import web
+
+from adapters.async_strava_client import AsyncStravaClient, create_session
+from adapters.strava_budget import StravaBudget
+from adapters.strava_client import StravaClient
+from adapters.strava_transport import StravaTransport
+from adapters.telegram.async_update_dispatcher import AsyncUpdateDispatcher
+from adapters.telegram.update_dispatcher import UpdateDispatcher
+from application.sync_activities import MAX_WORKERS
+
+AFTER = datetime(2025, 8, 1)
+ACTIVITIES = [{"id": index, "sport_type": "Run", "distance": 5000.0} for index in range(20)]
+
+
+def unlimited_budget() -> StravaBudget:
+    return StravaBudget(short_limit=10 ** 9, daily_limit=10 ** 9)
+
+
+def start_fake_strava(latency: float) -> tuple[str, Callable[[], None]]:
+    """Sobe o Strava falso em um event loop próprio e retorna (url, stop)."""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def activities(request):
+        await asyncio.sleep(latency)
+        return web.json_response(ACTIVITIES)
+
+    async def serve():
+        app = web.Application()
+        app.router.add_get("/athlete/activities", activities)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        state["runner"] = runner
+        state["url"] = f"http://127.0.0.1:{runner.addresses[0][1]}"
+        ready.set()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(serve())
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(state["runner"].cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    return state["url"], stop
+
+
+def strava_threaded(url: str, requests: int, workers: int) -> float:
+    client = StravaClient(transport=StravaTransport(), base_url=url, budget=unlimited_budget())
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda _: client.fetch_activities("token", AFTER), range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+def strava_async(url: str, requests: int) -> float:
+    async def main():
+        async with create_session() as session:
+            client = AsyncStravaClient(session, base_url=url, budget=unlimited_budget())
+            started = time.perf_counter()
+            await asyncio.gather(*(client.fetch_activities("token", AFTER) for _ in range(requests)))
+            return requests / (time.perf_counter() - started)
+
+    return asyncio.run(main())
+
+
+def commands_threaded(requests: int, workers: int, latency: float, round_trips: int) -> float:
+    done = threading.Semaphore(0)
+
+    def handle(update):
+        for _ in range(round_trips):
+            time.sleep(latency)
+        done.release()
+
+    dispatcher = UpdateDispatcher(handle, workers=workers, max_backlog=requests)
+    started = time.perf_counter()
+    for chat_id in range(requests):
+        dispatcher.submit(chat_id, SimpleNamespace(chat_id=chat_id))
+    for _ in range(requests):
+        done.acquire()
+    elapsed = time.perf_counter() - started
+    dispatcher.shutdown()
+    return requests / elapsed
+
+
+def commands_async(requests: int, latency: float, round_trips: int) -> float:
+    async def handle(update):
+        for _ in range(round_trips):
+            await asyncio.sleep(latency)
+
+    async def main():
+        dispatcher = AsyncUpdateDispatcher(handle, max_backlog=requests)
+        started = time.perf_counter()
+        for chat_id in range(requests):
+            dispatcher.submit(chat_id, SimpleNamespace(chat_id=chat_id))
+        await dispatcher.shutdown()
+        return requests / (time.perf_counter() - started)
+
+    return asyncio.run(main())
+
+
+def report(label: str, threaded: float, asynchronous: float) -> None:
+    print(f"{label:<9} threads {threaded:>9.1f} req/s   asyncio {asynchronous:>9.1f} req/s   ({asynchronous / threaded:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="threads do runtime em threads (TELEGRAM_WORKERS / MAX_WORKERS)")
+    parser.add_argument("--round-trips", type=int, default=3, help="idas ao banco por comando")
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    url, stop = start_fake_strava(latency)
+    try:
+        report("strava", strava_threaded(url, args.requests, args.workers), strava_async(url, args.requests))
+    finally:
+        stop()
+    report("comandos", commands_threaded(args.requests, args.workers, latency, args.round_trips), commands_async(args.requests, latency, args.round_trips))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compara a leitura completa (documentos MongoEngine) com a leitura projetada
+(fields=... + as_pymongo) de StravaActivity.get_activities em um grupo grande.
+
+    python -m benchmarks.lean_read --activities 5000
+    python -m benchmarks.lean_read --uri mongodb://localhost:27017/strava_bench
+
+Sem --uri usa mongomock, o que mede só o custo do lado Python (hidratação).
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import mongoengine
+
+from domain.services.rank_service import RankService
+from infrastructure.mongo.strava_activity import StravaActivity
+
+GROUP_ID = -1
+SPORTS = ["Run", "Ride", "Walk", "Swim", "WeightTraining"]
+
+
+def seed(count: int, members: int) -> None:
+    StravaActivity.objects(group_id=GROUP_ID).delete()
+    start = datetime(2025, 1, 1)
+    documents = []
+    for activity_id in range(count):
+        documents.append({
+            "group_id": GROUP_ID,
+            "activity_id": activity_id,
+            "athlete": {"id": random.randrange(members)},
+            "sport_type": random.choice(SPORTS),
+            "distance": random.uniform(1000, 40000),
+            "moving_time": random.randrange(600, 10800),
+            "start_date_local": start + timedelta(minutes=activity_id),
+            "activity_map": {"summary_polyline": "x" * 2000},
+            "laps": [{"lap_index": i, "distance": 1000.0} for i in range(10)],
+            "splits_metric": [{"split": i, "distance": 1000.0} for i in range(10)],
+            "segment_efforts": [{"id": i, "name": "segmento"} for i in range(5)],
+        })
+    StravaActivity._get_collection().insert_many(documents)
+
+
+def measure(label: str, load) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    activities = list(load())
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {len(activities):>7} atividades  {elapsed * 1000:>9.1f} ms  pico {peak / 1024 / 1024:>8.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="MongoDB descartável; sem ele usa mongomock")
+    parser.add_argument("--activities", type=int, default=5000)
+    parser.add_argument("--members", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.uri:
+        mongoengine.connect(host=args.uri)
+    else:
+        import mongomock
+        mongoengine.connect("strava_bench", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+
+    seed(args.activities, args.members)
+    start, end = datetime(2000, 1, 1), datetime(2100, 1, 1)
+    repo = StravaActivity()
+    try:
+        measure("completa", lambda: repo.get_activities(GROUP_ID, start, end))
+        measure("projetada", lambda: repo.get_activities(GROUP_ID, start, end, fields=RankService.FIELDS))
+    finally:
+        StravaActivity.objects(group_id=GROUP_ID).delete()
+
+
+if __name__ == "__main__":
+    main()
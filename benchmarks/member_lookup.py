@@ -0,0 +1,60 @@
+"""
+Compara a renderização de um rank com buscas lineares em group.membros
+(get_user por linha) contra o MemberDirectory montado uma vez por grupo.
+
+    python -m benchmarks.member_lookup --members 500
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+from shared.rank import create_rank
+from shared.user import get_user
+
+
+def make_group(members: int, months: int) -> SimpleNamespace:
+    membros = {
+        f"Membro {index}": {"athlete_id": 1000 + index, "access_token": "t", "refresh_token": "r"}
+        for index in range(members)
+    }
+    medalhas = {
+        f"2025-{month:02d}": {"Run": {f"Membro {month}": 1, f"Membro {month + 1}": 2, f"Membro {month + 2}": 3}}
+        for month in range(1, months + 1)
+    }
+    return SimpleNamespace(membros=membros, medalhas=medalhas)
+
+
+def linear_rank(rank_data: list, group) -> str:
+    """Renderização anterior: duas varreduras de membros por linha."""
+    lines = []
+    for user_id, data in rank_data:
+        user = get_user(group.membros, user_id=user_id)
+        get_user(group.membros, user_id=user_id)
+        lines.append(f"<a href='https://www.strava.com/athletes/{user['id']}'>{user['name']}</a> - {data}")
+    return "\n".join(lines)
+
+
+def measure(label: str, render, repeat: int) -> None:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:<10} {elapsed * 1000:>9.2f} ms por rank")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    group = make_group(args.members, args.months)
+    rank_data = [(1000 + index, f"{args.members - index}km") for index in range(args.members)]
+
+    measure("linear", lambda: linear_rank(rank_data, group), args.repeat)
+    measure("diretório", lambda: create_rank("Rank", rank_data, group), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
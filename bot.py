@@ -1,5 +1,5 @@
 import logging
-from adapters.telegram.telegram_bot import start_bot
+from config import TELEGRAM_RUNTIME
 
 logging.basicConfig(
     level=logging.INFO,
@@ -8,6 +8,11 @@ logging.basicConfig(
 )
 
 if __name__ == "__main__":
-    logging.getLogger(__name__).info("Iniciando Strava Bot")
-    start_bot()
-    
\ No newline at end of file
+    logging.getLogger(__name__).info("Iniciando Strava Bot (runtime %s)", TELEGRAM_RUNTIME)
+    # cada runtime conecta ao banco e cria o bot ao ser importado, então só o escolhido é importado
+    if TELEGRAM_RUNTIME == "asyncio":
+        from adapters.telegram.async_telegram_bot import start_async_bot
+        start_async_bot()
+    else:
+        from adapters.telegram.telegram_bot import start_bot
+        start_bot()
@@ -2,6 +2,8 @@ from datetime import datetime
 from collections import defaultdict
 
 class FrequencyService:
+    FIELDS = ("athlete.id", "start_date_local")
+
     def __init__(self, activities: list):
         self.activities = activities
 
@@ -9,7 +11,7 @@ class FrequencyService:
         user_days = defaultdict(set)
 
         for act in self.activities:
-            user_id = act.athlete.id
+            user_id = act["athlete"]["id"]
             date_str = act["start_date_local"]
             date_obj = date_str if isinstance(date_str, datetime) else datetime.fromisoformat(date_str)
             day = date_obj.date()
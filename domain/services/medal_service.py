@@ -1,28 +1,56 @@
+POINTS = {
+    1: 3,
+    2: 2,
+    3: 1
+}
+
+
+def _empty_tally() -> dict:
+    return {"1": 0, "2": 0, "3": 0}
+
+
+def build_medal_summary(medalhas: dict) -> dict:
+    """
+    Consolida o histórico de medalhas em contagens por membro, no total e por modalidade.
+    Args:
+        medalhas (dict): {"YYYY-MM": {modalidade: {nome: posição}}}
+    Returns:
+        dict: {nome: {"total": {"1", "2", "3", "points"}, "sports": {modalidade: {"1", "2", "3"}}}}
+        (chaves em string porque o resumo é gravado no MongoDB)
+    """
+    summary = {}
+    for sport_dict in medalhas.values():
+        for sport_type, podium in sport_dict.items():
+            for user_name, position in podium.items():
+                if position not in POINTS:
+                    continue
+                user_summary = summary.setdefault(user_name, {"total": {**_empty_tally(), "points": 0}, "sports": {}})
+                user_summary["total"][str(position)] += 1
+                user_summary["total"]["points"] += POINTS[position]
+                user_summary["sports"].setdefault(sport_type, _empty_tally())[str(position)] += 1
+    return summary
+
+
+def medal_summary_for(group) -> dict:
+    """
+    Resumo gravado no grupo; grupos ainda sem resumo (anteriores ao campo) montam na hora.
+    """
+    return group.medal_summary or build_medal_summary(group.medalhas)
+
 
 class MedalService:
     def __init__(self, group):
         self.group = group
 
     def calculate(self) -> dict:
-        points_dict = {
-            1: 3,
-            2: 2,
-            3: 1
-        }
-        medalhas = self.group.medalhas
         user_dict = {}
-        for sport_ride_data in medalhas.values():
-            for medal_data in sport_ride_data.values():
-              for user_id, user_data in medal_data.items():
-                if user_id not in user_dict:
-                      user_dict[user_id] = {
-                          1:0,
-                          2:0,
-                          3:0,
-                          "points":0
-                  }
-
-                user_dict[user_id][user_data] += 1
-                user_dict[user_id]["points"] += points_dict.get(user_data, 0)
+        for user_id, user_summary in medal_summary_for(self.group).items():
+            total = user_summary["total"]
+            user_dict[user_id] = {
+                1: total["1"],
+                2: total["2"],
+                3: total["3"],
+                "points": total["points"]
+            }
         sorted_users = sorted(user_dict.items(), key=lambda x: x[1]["points"], reverse=True)
-        return {user[0]: user[1] for user in sorted_users}
\ No newline at end of file
+        return {user[0]: user[1] for user in sorted_users}
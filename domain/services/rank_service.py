@@ -2,6 +2,8 @@ from datetime import datetime
 from collections import defaultdict
 
 class RankService:
+    FIELDS = ("athlete.id", "sport_type", "distance", "moving_time")
+
     sport_rank_by_time_list = [
         "workout",
         "weighttraining",
@@ -16,11 +18,15 @@ class RankService:
     def __init__(self, activities: list):
         self.activities = activities
 
-    def get_rank_type(self):
-        if self.sport_type.lower() in self.sport_rank_by_time_list:
+    @classmethod
+    def rank_type_for(cls, sport_type: str) -> str:
+        if sport_type.lower() in cls.sport_rank_by_time_list:
             return "moving_time"
         return "distance"
 
+    def get_rank_type(self):
+        return self.rank_type_for(self.sport_type)
+
     def calculate(self, sport_type: str):
         self.sport_type = sport_type
         self.rank_params = self.get_rank_type()
@@ -31,8 +37,8 @@ class RankService:
             if act['sport_type'] != self.sport_type:
                 continue
 
-            user_id = act.athlete.id
-            rank_params = getattr(act, self.rank_params)
+            user_id = act["athlete"]["id"]
+            rank_params = act.get(self.rank_params) or 0
 
             if not user_id in user_rank:
                 user_rank[user_id] = 0
@@ -43,4 +49,4 @@ class RankService:
         
 
     def list_sports(self):
-        return list(set([act.sport_type for act in self.activities]))
\ No newline at end of file
+        return list(set([act["sport_type"] for act in self.activities]))
\ No newline at end of file
@@ -1,34 +1,40 @@
 from datetime import datetime, timedelta
+from typing import Optional
 
-class StreakService:
-    def __init__(self, activities: list):
-        self.activities = activities
 
-    def calculate(self):
-        user_streak = {}
-        streak_result = []
-        today = datetime.now().date()
-        for act in self.activities:
-            user_id = act.athlete.id
-            date_str = act["start_date_local"]
-            date_obj = date_str if isinstance(date_str, datetime) else datetime.fromisoformat(date_str)
-            day = date_obj.date()
+def advance_streak(state: Optional[dict], day: datetime) -> Optional[dict]:
+    """
+    Avança o estado de sequência com um novo dia ativo, em O(1).
+    Args:
+        state (dict): current, last_day, longest e longest_end; None se o atleta não tem estado
+        day (datetime): dia local (meia-noite) da atividade
+    Returns:
+        dict: novo estado, ou None se o dia é anterior ao último (exige recálculo)
+    """
+    if state is None:
+        return {"current": 1, "last_day": day, "longest": 1, "longest_end": day}
 
-            if user_id not in user_streak:
-                user_streak[user_id] = {}
+    last_day = state["last_day"]
+    if day == last_day:
+        return dict(state)
+    if day < last_day:
+        return None
 
-            user_streak[user_id][day] = True
+    current = state["current"] + 1 if day - last_day == timedelta(days=1) else 1
+    new_state = {"current": current, "last_day": day, "longest": state["longest"], "longest_end": state["longest_end"]}
+    if current > state["longest"]:
+        new_state["longest"] = current
+        new_state["longest_end"] = day
+    return new_state
 
-        for user_id, streak_days in user_streak.items():
-            today = datetime.now().date()
-            streak = 0
-            while today in streak_days.keys():
-                streak += 1
-                today -= timedelta(days=1)
 
-            if streak == 0:
-                continue
-
-            streak_result.append((user_id, streak))
-        sorted_streak_result = sorted(streak_result, key=lambda x: x[1], reverse=True)
-        return sorted_streak_result
\ No newline at end of file
+def streak_from_days(days) -> Optional[dict]:
+    """
+    Recalcula o estado de sequência a partir de todos os dias ativos do atleta.
+    Returns:
+        dict: estado no mesmo formato de advance_streak, ou None se não há dias
+    """
+    state = None
+    for day in sorted(set(days)):
+        state = advance_streak(state, day)
+    return state
@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Optional
+
+from infrastructure.mongo.strava_activity import StravaActivity, activities_query
+from infrastructure.mongo.strava_daily_rollup import StravaDailyRollup, period_query, sum_by_athlete_pipeline
+from infrastructure.mongo.strava_group import StravaGroup
+
+
+def sort_spec(sort: str) -> list[tuple]:
+    """Converte a ordenação do mongoengine ("-start_date_local") para a do pymongo."""
+    return [(sort.lstrip("-+"), -1 if sort.startswith("-") else 1)]
+
+
+class AsyncStravaRepository:
+    """
+    Leituras do caminho de /rank e /yrank sobre um banco do pymongo
+    AsyncMongoClient, para o runtime assíncrono. Usa as mesmas coleções,
+    filtros e pipelines dos Documents (e portanto os mesmos índices);
+    escritas continuam nos Documents.
+    """
+
+    def __init__(self, database):
+        self.groups = database[StravaGroup._get_collection_name()]
+        self.activities = database[StravaActivity._get_collection_name()]
+        self.rollups = database[StravaDailyRollup._get_collection_name()]
+
+    async def get_group(self, group_id: int) -> Optional[StravaGroup]:
+        document = await self.groups.find_one({"telegram_group_id": group_id})
+        return StravaGroup._from_son(document) if document else None
+
+    async def get_activities(self, group_id: int, start: datetime, end: datetime, member_id_list: Optional[list] = None, sort: str = "-start_date_local", fields: Optional[tuple] = None) -> list[dict]:
+        """
+        Mesmo filtro de StravaActivity.get_activities, sempre como dicts crus.
+        Args:
+            fields (tuple): se informado, projeta só esses campos (ex.: "athlete.id")
+        """
+        projection = {"_id": 0, **{field: 1 for field in fields}} if fields else None
+        cursor = self.activities.find(activities_query(group_id, start, end, member_id_list), projection).sort(sort_spec(sort))
+        return await cursor.to_list(None)
+
+    async def list_sports(self, group_id: int, start_date: datetime, end_date: datetime) -> list[str]:
+        return await self.rollups.distinct("sport_type", period_query(group_id, start_date, end_date))
+
+    async def sum_by_athlete(self, group_id: int, start: datetime, end: datetime, sport_type: str, field: str) -> list[tuple]:
+        """
+        Returns:
+            list: (athlete_id, total) em ordem decrescente de total
+        """
+        cursor = await self.rollups.aggregate(sum_by_athlete_pipeline(group_id, start, end, sport_type, field))
+        return [(row["_id"], row["total"]) async for row in cursor]
@@ -0,0 +1,122 @@
+import logging
+import sys
+from datetime import datetime
+from typing import Callable
+
+from infrastructure.mongo.strava_activity import StravaActivity
+from infrastructure.mongo.strava_daily_rollup import StravaDailyRollup
+from infrastructure.mongo.strava_group import StravaGroup
+from infrastructure.mongo.strava_streak import StravaStreak
+from infrastructure.mongo.strava_sync_lease import StravaSyncLease
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS = (StravaActivity, StravaDailyRollup, StravaStreak, StravaGroup, StravaSyncLease)
+
+_START = datetime(2000, 1, 1)
+_END = datetime(2000, 2, 1)
+
+# Mesmo formato de filtro/ordenação das consultas dos repositórios.
+# StravaGroup.list_group_ids percorre todos os grupos por definição e fica de fora.
+QUERIES: dict[str, Callable] = {
+    "StravaActivity.get_activities": lambda: StravaActivity().get_activities(0, _START, _END),
+    "StravaActivity.get_activities(member_id_list)": lambda: StravaActivity().get_activities(0, _START, _END, [1, 2]),
+    "StravaActivity.exists": lambda: StravaActivity.objects(activity_id=0, group_id=0),
+    "StravaActivity.remove_activity": lambda: StravaActivity.objects(__raw__={"group_id": 0, "activity_id": 0}),
+    "StravaActivity.remove_activity_member": lambda: StravaActivity.objects(__raw__={"group_id": 0, "athlete.id": 0}),
+    "StravaActivity.list_group_activities": lambda: StravaActivity.objects(__raw__={"group_id": 0}),
+    "StravaDailyRollup.sum_by_athlete": lambda: StravaDailyRollup.objects(
+        __raw__={"group_id": 0, "local_day": {"$gte": _START, "$lt": _END}, "sport_type": "Run"}
+    ),
+    "StravaDailyRollup.count_active_days": lambda: StravaDailyRollup.objects(
+        __raw__={"group_id": 0, "local_day": {"$gte": _START, "$lt": _END}}
+    ),
+    "StravaDailyRollup.monthly_podiums": lambda: StravaDailyRollup.objects(
+        __raw__={"local_day": {"$gte": _START, "$lt": _END}}
+    ),
+    "StravaDailyRollup.athlete_days": lambda: StravaDailyRollup.objects(__raw__={"group_id": 0, "athlete_id": 0}),
+    "StravaDailyRollup.remove_member": lambda: StravaDailyRollup.objects(__raw__={"group_id": 0, "athlete_id": 0}),
+    "StravaStreak.current_streaks": lambda: StravaStreak.objects(group_id=0, last_day=_START).order_by("-current"),
+    "StravaStreak.longest_streaks": lambda: StravaStreak.objects(group_id=0).order_by("-longest"),
+    "StravaStreak.advance": lambda: StravaStreak.objects(__raw__={"group_id": 0, "athlete_id": 0}),
+    "StravaGroup.get_group": lambda: StravaGroup.objects(telegram_group_id=0),
+    "StravaGroup.find_by_athlete": lambda: StravaGroup.objects(athlete_ids=0),
+    "StravaSyncLease.is_held": lambda: StravaSyncLease.objects(__raw__={"group_id": 0, "expires_at": {"$gt": _START}}),
+    "StravaGroup.award_month": lambda: StravaGroup.objects(telegram_group_id__in=[0, 1]),
+}
+
+
+class IndexCheckError(Exception):
+    pass
+
+
+def plan_stages(plan) -> list[str]:
+    """
+    Lista todos os estágios de um plano do explain(), incluindo os aninhados.
+    """
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in plan_stages(item)]
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan["stage"]] if "stage" in plan else []
+    for value in plan.values():
+        stages.extend(plan_stages(value))
+    return stages
+
+
+def uses_collscan(explain: dict) -> bool:
+    winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    return "COLLSCAN" in plan_stages(winning_plan)
+
+
+def ensure_indexes() -> None:
+    """
+    Cria os índices declarados nos modelos que ainda não existem no banco.
+    """
+    for document in DOCUMENTS:
+        document.ensure_indexes()
+        logger.info("Índices de %s garantidos", document._get_collection_name())
+
+
+def find_collscans() -> list[str]:
+    """
+    Returns:
+        list: nomes das consultas cujo plano vencedor é um COLLSCAN
+    """
+    collscans = []
+    for name, build_query in QUERIES.items():
+        if uses_collscan(build_query().explain()):
+            logger.error("Consulta %s fazendo COLLSCAN", name)
+            collscans.append(name)
+    return collscans
+
+
+def check_indexes(create_missing: bool = True) -> None:
+    """
+    Garante os índices e valida com explain() que nenhuma consulta dos
+    repositórios faz varredura completa da coleção.
+    """
+    if create_missing:
+        ensure_indexes()
+    collscans = find_collscans()
+    if collscans:
+        raise IndexCheckError(f"Consultas sem índice: {', '.join(collscans)}")
+    logger.info("Todas as %d consultas usam índice", len(QUERIES))
+
+
+def main() -> int:
+    import mongoengine
+    from config import MONGO_URI
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    mongoengine.connect(host=MONGO_URI)
+    try:
+        check_indexes(create_missing="--no-create" not in sys.argv[1:])
+    except IndexCheckError as e:
+        logger.error(str(e))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
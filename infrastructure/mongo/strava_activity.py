@@ -1,5 +1,7 @@
 from datetime import datetime
 from typing import Optional
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from mongoengine import (
     Document,
     EmbeddedDocumentField,
@@ -12,9 +14,47 @@ from mongoengine import (
     DateTimeField,
 )
 from infrastructure.mongo.athlete import Athlete
+from infrastructure.mongo.strava_daily_rollup import (
+    ACTIVITY_FIELDS as ROLLUP_ACTIVITY_FIELDS,
+    StravaDailyRollup,
+    rollup_key,
+    rollup_values,
+)
+
+
+DUPLICATE_KEY_ERROR = 11000
+# campos do documento que alimentam o rollup (athlete.id vem dentro de athlete)
+ROLLUP_DOCUMENT_FIELDS = {field.split(".")[0] for field in ROLLUP_ACTIVITY_FIELDS}
+
+
+def same_rollup(group_id: int, old: dict, new: dict) -> bool:
+    return (rollup_key(group_id, old), rollup_values(old)) == (rollup_key(group_id, new), rollup_values(new))
+
+
+def activities_query(group_id: int, start: datetime, end: datetime, member_id_list: Optional[list] = None) -> dict:
+    """Filtro de get_activities, compartilhado com o repositório assíncrono."""
+    query = {
+        "group_id": group_id,
+        "start_date_local": {"$gte": start, "$lt": end}
+    }
+    if member_id_list:
+        query["athlete.id"] = {"$in": member_id_list}
+    return query
 
 
 class StravaActivity(Document):
+    meta = {
+        "indexes": [
+            # exists, remove_activity e os upserts de save_activities
+            {"fields": ["group_id", "activity_id"], "unique": True},
+            # get_activities (período + $in opcional de atletas, ordenado por data) e list_sports
+            {"fields": ["group_id", "start_date_local", "athlete.id"]},
+            # remove_activity_member
+            {"fields": ["group_id", "athlete.id"]},
+        ],
+        "index_background": True,
+    }
+
     resource_state = IntField()
     athlete = EmbeddedDocumentField(Athlete)
     name = StringField()
@@ -88,18 +128,23 @@ class StravaActivity(Document):
     segment_leaderboard_opt_out = BooleanField(required=False)
     leaderboard_opt_out = BooleanField(required=False)
 
-    def get_activities(self, group_id: int, start: datetime, end: datetime, member_id_list:Optional[list] = None, sort = "-start_date_local"):
-        query = {
-            "group_id": group_id,
-            "start_date_local": {"$gte": start, "$lt": end}
-        }
+    def get_activities(self, group_id: int, start: datetime, end: datetime, member_id_list:Optional[list] = None, sort = "-start_date_local", fields: Optional[tuple] = None):
+        """
+        Busca as atividades do grupo no período.
+        Args:
+            fields (tuple): se informado, projeta só esses campos (ex.: "athlete.id")
+                e retorna dicts crus do pymongo em vez de documentos
+        """
+        activities = StravaActivity.objects(
+            __raw__=activities_query(group_id, start, end, member_id_list)
+        ).order_by(sort)
 
-        if member_id_list:
-            query["athlete.id"] = {"$in": member_id_list}
+        if fields:
+            return activities.only(*fields).exclude("id").as_pymongo()
+        return activities.all()
 
-        return StravaActivity.objects(
-            __raw__=query
-        ).order_by(sort).all()
+    def list_group_activities(self, group_id: int, fields: tuple):
+        return StravaActivity.objects(group_id=group_id).only(*fields).exclude("id").as_pymongo()
 
     def exists(self, activity_id: str, group_id: int) -> bool:
         return StravaActivity.objects(activity_id=activity_id, group_id=group_id).count() > 0
@@ -110,32 +155,154 @@ class StravaActivity(Document):
         return True
 
 
-    def save_activity(self, group_id: int, activity_data: dict):
-        if not self.rules(activity_data):
-            return
-
+    def normalize(self, group_id: int, activity_data: dict) -> dict:
+        """
+        Converte a atividade do formato da API do Strava para o documento do banco,
+        sem alterar o dicionário recebido.
+        """
+        activity_data = self.known_fields(activity_data)
         activity_data["group_id"] = group_id
-        activity_data["activity_type"] = activity_data["type"]
-        activity_data["activity_id"] = activity_data["id"]
-        activity_data["activity_map"] = activity_data["map"]
-        del activity_data["type"]
-        del activity_data["id"]
-        del activity_data["map"]
-        activity_data['start_date'] = datetime.strptime(activity_data["start_date"], '%Y-%m-%dT%H:%M:%SZ')
-        activity_data['start_date_local'] = datetime.strptime(activity_data["start_date_local"], '%Y-%m-%dT%H:%M:%SZ')
-
-        if self.exists(activity_data["activity_id"], group_id):
-            return
-
-        StravaActivity(**activity_data).save()
-
-    def list_sports(self, group_id:int, start_date:datetime, end_date:datetime) -> list[str]:
-        return StravaActivity.objects(
-            __raw__={
-                "group_id": group_id,
-                "start_date_local": {"$gte": start_date, "$lt": end_date}
-            }
-        ).only("sport_type").distinct("sport_type")
+        activity_data["activity_type"] = activity_data.pop("type", None)
+        activity_data["activity_id"] = activity_data.pop("id")
+        activity_data["activity_map"] = activity_data.pop("map", None) or {}
+        for date_field in ("start_date", "start_date_local"):
+            if isinstance(activity_data.get(date_field), str):
+                activity_data[date_field] = datetime.strptime(activity_data[date_field], '%Y-%m-%dT%H:%M:%SZ')
+
+        document = StravaActivity(**activity_data).to_mongo().to_dict()
+        document.pop("_id", None)
+        return document
+
+    def save_activities(self, group_id: int, activities: list[dict]) -> dict:
+        """
+        Grava um lote de atividades, apoiado no índice único (group_id, activity_id),
+        e mantém StravaDailyRollup com a diferença exata de cada gravação, mesmo
+        com um sync e o webhook gravando a mesma atividade ao mesmo tempo:
+        - novas vão em um bulk_write não ordenado de upserts com $setOnInsert, e só
+          quem de fato inseriu soma a atividade no rollup;
+        - já gravadas sem mudança nos campos do rollup atualizam só os demais
+          campos no mesmo bulk_write, sem mexer no rollup;
+        - as que mudaram dia, modalidade ou totais, e as novas que outro sync
+          inseriu antes, são gravadas uma a uma com find_one_and_update, e a
+          diferença sai do documento que a gravação de fato substituiu.
+        Returns:
+            dict: contagem de inserted, updated, skipped e flagged
+        """
+        counts = {"inserted": 0, "updated": 0, "skipped": 0, "flagged": 0}
+        documents = []
+        seen = set()
+
+        for activity_data in activities:
+            if not self.rules(activity_data):
+                counts["flagged"] += 1
+                continue
+
+            document = self.normalize(group_id, activity_data)
+            if document["activity_id"] in seen:
+                counts["skipped"] += 1
+                continue
+            seen.add(document["activity_id"])
+            documents.append(document)
+
+        if not documents:
+            return counts
+
+        collection = StravaActivity._get_collection()
+        previous = {
+            existing["activity_id"]: existing for existing in collection.find(
+                {"group_id": group_id, "activity_id": {"$in": list(seen)}},
+                {field: 1 for field in ("activity_id",) + ROLLUP_ACTIVITY_FIELDS}
+            )
+        }
+        new, unchanged, rewrite = [], [], []
+        for document in documents:
+            old = previous.get(document["activity_id"])
+            if old is None:
+                new.append(document)
+            elif same_rollup(group_id, old, document):
+                unchanged.append(document)
+            else:
+                rewrite.append(document)
+
+        added, removed = [], []
+        if new or unchanged:
+            operations = [
+                UpdateOne({"group_id": group_id, "activity_id": document["activity_id"]}, {"$setOnInsert": document}, upsert=True)
+                for document in new
+            ] + [
+                UpdateOne(
+                    {"group_id": group_id, "activity_id": document["activity_id"]},
+                    {"$set": {field: value for field, value in document.items() if field not in ROLLUP_DOCUMENT_FIELDS}},
+                )
+                for document in unchanged
+            ]
+            try:
+                result = collection.bulk_write(operations, ordered=False).bulk_api_result
+            except BulkWriteError as e:
+                # upserts concorrentes da mesma atividade: o outro sync inseriu primeiro
+                if any(error.get("code") != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                    raise
+                result = e.details
+
+            inserted = {upserted["index"] for upserted in result.get("upserted", [])}
+            for index, document in enumerate(new):
+                if index in inserted:
+                    added.append(document)
+                else:
+                    rewrite.append(document)
+            counts["inserted"] += len(inserted)
+            counts["updated"] += result.get("nModified", 0)
+            counts["skipped"] += len(unchanged) - result.get("nModified", 0)
+
+        for document in rewrite:
+            old = self._replace(collection, group_id, document)
+            if old is None:
+                counts["inserted"] += 1
+                added.append(document)
+            elif same_rollup(group_id, old, document):
+                counts["skipped"] += 1
+            else:
+                counts["updated"] += 1
+                removed.append(old)
+                added.append(document)
+
+        rollup_repo = StravaDailyRollup()
+        rollup_repo.apply(group_id, removed, sign=-1)
+        rollup_repo.apply(group_id, added)
+        return counts
+
+    def _replace(self, collection, group_id: int, document: dict) -> Optional[dict]:
+        """
+        Grava a atividade e retorna os campos do rollup do documento substituído
+        (None se ela foi inserida agora).
+        """
+        query = {"group_id": group_id, "activity_id": document["activity_id"]}
+        projection = {field: 1 for field in ROLLUP_ACTIVITY_FIELDS}
+        for attempt in range(2):
+            try:
+                return collection.find_one_and_update(
+                    query, {"$set": document}, projection=projection, upsert=True, return_document=ReturnDocument.BEFORE
+                )
+            except DuplicateKeyError:
+                # outro upsert inseriu entre a busca e a inserção; na segunda vez o filtro casa
+                if attempt:
+                    raise
+
+    def save_activity(self, group_id: int, activity_data: dict) -> dict:
+        return self.save_activities(group_id, [activity_data])
+
+    def known_fields(self, activity_data: dict) -> dict:
+        """Descarta campos retornados pelo Strava que não existem no modelo."""
+        raw_fields = ("id", "type", "map")
+        return {key: value for key, value in activity_data.items() if key in StravaActivity._fields or key in raw_fields}
+
+    def remove_activity(self, group_id: int, activity_id: int):
+        removed = StravaActivity._get_collection().find_one_and_delete(
+            {"group_id": group_id, "activity_id": activity_id},
+            projection={field: 1 for field in ROLLUP_ACTIVITY_FIELDS}
+        )
+        if removed:
+            StravaDailyRollup().apply(group_id, [removed], sign=-1)
 
     def remove_activity_member(self, group_id: int, member_id: int):
         StravaActivity.objects(
@@ -144,3 +311,4 @@ class StravaActivity(Document):
                 "athlete.id": member_id
             }
         ).delete()
+        StravaDailyRollup().remove_member(group_id, member_id)
@@ -0,0 +1,226 @@
+from datetime import datetime
+from typing import Optional
+from pymongo import ReplaceOne, UpdateOne
+from mongoengine import Document, IntField, StringField, FloatField, DateTimeField
+
+from infrastructure.mongo.strava_streak import StravaStreak
+
+
+SUM_FIELDS = ("distance", "moving_time", "elapsed_time", "total_elevation_gain")
+KEY_FIELDS = ("group_id", "athlete_id", "local_day", "sport_type")
+# campos de StravaActivity que alimentam o rollup
+ACTIVITY_FIELDS = ("athlete.id", "sport_type", "start_date_local") + SUM_FIELDS
+
+
+def local_day(start_date_local: datetime) -> datetime:
+    return datetime(start_date_local.year, start_date_local.month, start_date_local.day)
+
+
+def rollup_key(group_id: int, activity: dict) -> Optional[dict]:
+    """
+    Chave (group_id, athlete_id, local_day, sport_type) de uma atividade já
+    normalizada (formato do banco). Atividades sem atleta ou data não entram no rollup.
+    """
+    athlete_id = (activity.get("athlete") or {}).get("id")
+    start_date_local = activity.get("start_date_local")
+    if athlete_id is None or not isinstance(start_date_local, datetime):
+        return None
+    return {
+        "group_id": group_id,
+        "athlete_id": athlete_id,
+        "local_day": local_day(start_date_local),
+        "sport_type": activity.get("sport_type"),
+    }
+
+
+def rollup_values(activity: dict) -> dict:
+    return {field: activity.get(field) or 0 for field in SUM_FIELDS}
+
+
+def period_query(group_id: int, start: datetime, end: datetime, **extra) -> dict:
+    return {"group_id": group_id, "local_day": {"$gte": local_day(start), "$lt": end}, **extra}
+
+
+def sum_by_athlete_pipeline(group_id: int, start: datetime, end: datetime, sport_type: str, field: str) -> list[dict]:
+    """Pipeline de sum_by_athlete, compartilhado com o repositório assíncrono."""
+    return [
+        {"$match": period_query(group_id, start, end, sport_type=sport_type)},
+        {"$group": {"_id": "$athlete_id", "total": {"$sum": f"${field}"}}},
+        {"$sort": {"total": -1}},
+    ]
+
+
+class StravaDailyRollup(Document):
+    """
+    Totais diários por (grupo, atleta, dia local, modalidade), mantidos com $inc
+    a cada atividade gravada ou removida em StravaActivity.
+    """
+    meta = {
+        "indexes": [
+            {"fields": ["group_id", "athlete_id", "local_day", "sport_type"], "unique": True},
+            # rank, frequência e menu de modalidades por período
+            {"fields": ["group_id", "local_day", "sport_type"]},
+            # premiação mensal: o mês de todos os grupos de uma vez
+            {"fields": ["local_day"]},
+        ],
+        "index_background": True,
+    }
+
+    group_id = IntField()
+    athlete_id = IntField()
+    local_day = DateTimeField()
+    sport_type = StringField()
+    count = IntField(default=0)
+    distance = FloatField(default=0)
+    moving_time = IntField(default=0)
+    elapsed_time = IntField(default=0)
+    total_elevation_gain = FloatField(default=0)
+
+    def apply(self, group_id: int, activities: list[dict], sign: int = 1) -> None:
+        """
+        Soma (sign=1) ou subtrai (sign=-1) as atividades dos totais diários
+        com um único bulk_write de $inc, e mantém StravaStreak: cada dia novo
+        avança a sequência do atleta; remoções recalculam a partir dos dias restantes.
+        """
+        keys = []
+        operations = []
+        for activity in activities:
+            key = rollup_key(group_id, activity)
+            if key is None:
+                continue
+            increments = {field: sign * value for field, value in rollup_values(activity).items()}
+            increments["count"] = sign
+            keys.append(key)
+            operations.append(UpdateOne(key, {"$inc": increments}, upsert=True))
+
+        if not operations:
+            return
+
+        collection = StravaDailyRollup._get_collection()
+        result = collection.bulk_write(operations, ordered=False)
+        streak_repo = StravaStreak()
+
+        if sign < 0:
+            collection.delete_many({"group_id": group_id, "count": {"$lte": 0}})
+            for athlete_id in {key["athlete_id"] for key in keys}:
+                streak_repo.recompute(group_id, athlete_id, self.athlete_days(group_id, athlete_id))
+            return
+
+        new_days = sorted({(keys[index]["local_day"], keys[index]["athlete_id"]) for index in result.upserted_ids})
+        for day, athlete_id in new_days:
+            streak_repo.advance(group_id, athlete_id, day, lambda athlete_id=athlete_id: self.athlete_days(group_id, athlete_id))
+
+    def rebuild(self, group_id: int, activities) -> int:
+        """
+        Recalcula do zero os totais do grupo a partir das atividades cruas.
+        Cada linha é substituída por upsert e só depois saem as chaves que não
+        existem mais: a coleção nunca fica vazia no meio do rebuild e um $inc
+        concorrente não esbarra em uma chave sendo reinserida.
+        Returns:
+            int: quantidade de linhas de rollup geradas
+        """
+        totals = {}
+        for activity in activities:
+            key = rollup_key(group_id, activity)
+            if key is None:
+                continue
+            row = totals.setdefault(tuple(key[field] for field in KEY_FIELDS), {**key, "count": 0, **{field: 0 for field in SUM_FIELDS}})
+            row["count"] += 1
+            for field, value in rollup_values(activity).items():
+                row[field] += value
+
+        collection = StravaDailyRollup._get_collection()
+        if totals:
+            collection.bulk_write([
+                ReplaceOne({field: row[field] for field in KEY_FIELDS}, row, upsert=True)
+                for row in totals.values()
+            ], ordered=False)
+        stale = [
+            row["_id"] for row in collection.find({"group_id": group_id}, {field: 1 for field in KEY_FIELDS})
+            if tuple(row.get(field) for field in KEY_FIELDS) not in totals
+        ]
+        if stale:
+            collection.delete_many({"_id": {"$in": stale}})
+
+        days_by_athlete = {}
+        for row in totals.values():
+            days_by_athlete.setdefault(row["athlete_id"], set()).add(row["local_day"])
+        StravaStreak().rebuild(group_id, days_by_athlete)
+        return len(totals)
+
+    def athlete_days(self, group_id: int, athlete_id: int) -> list[datetime]:
+        return StravaDailyRollup.objects(
+            __raw__={
+                "group_id": group_id,
+                "athlete_id": athlete_id
+            }
+        ).distinct("local_day")
+
+    def sum_by_athlete(self, group_id: int, start: datetime, end: datetime, sport_type: str, field: str) -> list[tuple]:
+        """
+        Returns:
+            list: (athlete_id, total) em ordem decrescente de total
+        """
+        pipeline = sum_by_athlete_pipeline(group_id, start, end, sport_type, field)
+        return [(row["_id"], row["total"]) for row in StravaDailyRollup.objects.aggregate(pipeline)]
+
+    def count_active_days(self, group_id: int, start: datetime, end: datetime) -> list[tuple]:
+        """
+        Returns:
+            list: (athlete_id, dias) em ordem decrescente de dias
+        """
+        pipeline = [
+            {"$match": period_query(group_id, start, end)},
+            {"$group": {"_id": {"athlete_id": "$athlete_id", "day": "$local_day"}}},
+            {"$group": {"_id": "$_id.athlete_id", "days": {"$sum": 1}}},
+            {"$sort": {"days": -1}},
+        ]
+        return [(row["_id"], row["days"]) for row in StravaDailyRollup.objects.aggregate(pipeline)]
+
+    def monthly_podiums(self, start: datetime, end: datetime, time_sports: list[str], size: int = 3):
+        """
+        Pódio de cada (grupo, modalidade) do período em um único aggregate sobre
+        todos os grupos. Modalidades em time_sports são ranqueadas por moving_time,
+        as demais por distância; empates saem pelo menor athlete_id.
+        Returns:
+            iterator: {"group_id", "sport_type", "podium": [{"athlete_id", "total"}]} em ordem de grupo
+        """
+        pipeline = [
+            {"$match": {"local_day": {"$gte": local_day(start), "$lt": end}}},
+            {"$group": {
+                "_id": {"group_id": "$group_id", "sport_type": "$sport_type", "athlete_id": "$athlete_id"},
+                "distance": {"$sum": "$distance"},
+                "moving_time": {"$sum": "$moving_time"},
+            }},
+            {"$project": {
+                "total": {"$cond": [{"$in": [{"$toLower": "$_id.sport_type"}, time_sports]}, "$moving_time", "$distance"]},
+            }},
+            {"$match": {"total": {"$gt": 0}}},
+            {"$sort": {"_id.group_id": 1, "_id.sport_type": 1, "total": -1, "_id.athlete_id": 1}},
+            {"$group": {
+                "_id": {"group_id": "$_id.group_id", "sport_type": "$_id.sport_type"},
+                "ranking": {"$push": {"athlete_id": "$_id.athlete_id", "total": "$total"}},
+            }},
+            {"$project": {
+                "_id": 0,
+                "group_id": "$_id.group_id",
+                "sport_type": "$_id.sport_type",
+                "podium": {"$slice": ["$ranking", size]},
+            }},
+            {"$sort": {"group_id": 1, "sport_type": 1}},
+        ]
+        return StravaDailyRollup.objects.aggregate(pipeline, allowDiskUse=True)
+
+    def list_sports(self, group_id: int, start_date: datetime, end_date: datetime) -> list[str]:
+        return StravaDailyRollup.objects(
+            __raw__=period_query(group_id, start_date, end_date)
+        ).distinct("sport_type")
+
+    def remove_member(self, group_id: int, athlete_id: int):
+        StravaDailyRollup.objects(
+            __raw__={
+                "group_id": group_id,
+                "athlete_id": athlete_id
+            }
+        ).delete()
+        StravaStreak().remove_member(group_id, athlete_id)
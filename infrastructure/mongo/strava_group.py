@@ -1,13 +1,281 @@
+from datetime import datetime
+from typing import Optional
+from pymongo import UpdateOne
 from mongoengine import Document, IntField, DictField, ListField, DateTimeField
 
+from domain.services.medal_service import build_medal_summary
+from shared.user import MemberDirectory
+
+
+def is_safe_key(key: str) -> bool:
+    """Chaves com "." ou iniciadas por "$" não podem ser endereçadas com a notação de ponto."""
+    return bool(key) and "." not in key and not key.startswith("$")
+
+
+def _get_expr(input_expr, path: tuple):
+    for key in path:
+        input_expr = {"$getField": {"field": {"$literal": key}, "input": input_expr}}
+    return input_expr
+
+
+def _set_expr(input_expr, path: tuple, value):
+    if not path:
+        return value
+    field = {"$literal": path[0]}
+    child = {"$getField": {"field": field, "input": input_expr}}
+    return {"$setField": {"field": field, "input": input_expr, "value": _set_expr(child, path[1:], value)}}
+
+
+def _unset_expr(input_expr, path: tuple):
+    field = {"$literal": path[0]}
+    if len(path) == 1:
+        return {"$unsetField": {"field": field, "input": input_expr}}
+    child = {"$getField": {"field": field, "input": input_expr}}
+    return {"$setField": {"field": field, "input": input_expr, "value": _unset_expr(child, path[1:])}}
+
 
 class StravaGroup(Document):
+    meta = {
+        "indexes": ["telegram_group_id", "athlete_ids"],
+        "index_background": True,
+    }
+
     telegram_group_id = IntField()
     metas = DictField(default={})
     membros = DictField(default={})
     segments_ids = ListField(required=False, default=[])
     medalhas = DictField(default={}, required=False)
+    medal_summary = DictField(default={}, required=False)
     last_sync = DateTimeField(required=False)
+    # athlete_id dos membros, indexado para o webhook achar os grupos do atleta
+    athlete_ids = ListField(IntField(), default=[])
 
     def get_group(self, group_id: int):
         return StravaGroup.objects(telegram_group_id=group_id).first()
+
+    def backfill_medal_summaries(self) -> int:
+        """
+        Grava medal_summary nos grupos com medalhas anteriores ao campo.
+        Returns:
+            int: quantidade de grupos atualizados
+        """
+        groups = StravaGroup.objects(
+            __raw__={"medal_summary": {"$in": [{}, None]}, "medalhas": {"$nin": [{}, None]}}
+        ).only("medalhas")
+        updated = 0
+        for group in groups:
+            StravaGroup.objects(id=group.id).update_one(set__medal_summary=build_medal_summary(group.medalhas))
+            updated += 1
+        return updated
+
+    def backfill_athlete_ids(self) -> int:
+        """
+        Alinha athlete_ids com os membros de todos os grupos (ex.: grupos
+        anteriores ao campo ou membros vinculados sem add_member).
+        Returns:
+            int: quantidade de grupos atualizados
+        """
+        groups = StravaGroup.objects.only("telegram_group_id", "membros", "athlete_ids")
+        return sum(self.reconcile_athlete_ids(group) for group in groups)
+
+    def reconcile_athlete_ids(self, group) -> bool:
+        """
+        Acrescenta a athlete_ids os atletas dos membros do grupo já carregado e
+        remove os que não são mais membros, só quando há diferença.
+        Returns:
+            bool: se o grupo foi atualizado
+        """
+        expected = {data.get("athlete_id") for data in group.membros.values()} - {None}
+        current = set(group.athlete_ids or [])
+        if expected == current:
+            return False
+        return self._update(
+            group.telegram_group_id,
+            add_to_set={"athlete_ids": sorted(expected - current)},
+            pull={"athlete_ids": sorted(current - expected)},
+        )
+
+    def award_month(self, month: str, podiums_by_group: dict) -> int:
+        """
+        Grava os pódios do mês em medalhas.<month>, substituindo o mês inteiro,
+        e o medal_summary recalculado, em um único bulk_write. Reexecutar com os
+        mesmos pódios produz o mesmo documento. A posição é a ordem da lista, sem
+        posições compartilhadas: empates já chegam desfeitos pelo menor athlete_id
+        (StravaDailyRollup.monthly_podiums), e atletas que não são mais membros
+        são ignorados sem deixar buraco no pódio.
+        Args:
+            month (str): "YYYY-MM"
+            podiums_by_group (dict): {group_id: {modalidade: [athlete_id, ...]}} em ordem de posição
+        Returns:
+            int: quantidade de grupos gravados
+        """
+        operations = []
+        groups = StravaGroup.objects(telegram_group_id__in=list(podiums_by_group)).only(
+            "telegram_group_id", "membros", "medalhas"
+        )
+        for group in groups:
+            directory = MemberDirectory(group.membros)
+            month_medals = {}
+            for sport_type, athlete_ids in podiums_by_group[group.telegram_group_id].items():
+                podium = {}
+                for athlete_id in athlete_ids:
+                    member_name, _ = directory.get_member(athlete_id)
+                    if member_name is not None:
+                        podium[member_name] = len(podium) + 1
+                if podium:
+                    month_medals[sport_type] = podium
+
+            medalhas = {**group.medalhas, month: month_medals}
+            operations.append(UpdateOne(
+                {"_id": group.id},
+                {"$set": {f"medalhas.{month}": month_medals, "medal_summary": build_medal_summary(medalhas)}},
+            ))
+
+        if operations:
+            StravaGroup._get_collection().bulk_write(operations, ordered=False)
+        return len(operations)
+
+    def _update(
+        self,
+        group_id: int,
+        set_paths: Optional[dict] = None,
+        max_paths: Optional[dict] = None,
+        unset_paths: tuple = (),
+        member_name: Optional[str] = None,
+        add_to_set: Optional[dict] = None,
+        pull: Optional[dict] = None,
+    ) -> bool:
+        """
+        Atualiza só os caminhos informados (tuplas de chaves a partir da raiz do
+        documento) em um único update_one; add_to_set e pull acrescentam e removem
+        listas de valores de arrays da raiz. Com member_name, só atualiza se o membro
+        ainda existir, para um sync concorrente não recriar um membro removido.
+        Caminhos com chaves que a notação de ponto não endereça (ex.: nomes com ".")
+        viram um update por pipeline com $setField/$unsetField (MongoDB 5.0+).
+        Returns:
+            bool: se o grupo (e o membro) foi encontrado
+        """
+        set_paths = set_paths or {}
+        max_paths = max_paths or {}
+        add_to_set = {field: values for field, values in (add_to_set or {}).items() if values}
+        pull = {field: values for field, values in (pull or {}).items() if values}
+        if not (set_paths or max_paths or unset_paths or add_to_set or pull):
+            return False
+        query = {"telegram_group_id": group_id}
+        paths = [*set_paths, *max_paths, *unset_paths] + ([("membros", member_name)] if member_name else [])
+
+        if all(is_safe_key(key) for path in paths for key in path):
+            update = {}
+            if set_paths:
+                update["$set"] = {".".join(path): value for path, value in set_paths.items()}
+            if max_paths:
+                update["$max"] = {".".join(path): value for path, value in max_paths.items()}
+            if unset_paths:
+                update["$unset"] = {".".join(path): "" for path in unset_paths}
+            if add_to_set:
+                update["$addToSet"] = {field: {"$each": values} for field, values in add_to_set.items()}
+            if pull:
+                update["$pullAll"] = pull
+            if member_name:
+                query[f"membros.{member_name}"] = {"$exists": True}
+        else:
+            update = []
+            for path, value in set_paths.items():
+                update.append({"$set": {path[0]: _set_expr(f"${path[0]}", path[1:], {"$literal": value})}})
+            for path, value in max_paths.items():
+                current = _get_expr(f"${path[0]}", path[1:])
+                update.append({"$set": {path[0]: _set_expr(f"${path[0]}", path[1:], {"$max": [current, {"$literal": value}]})}})
+            for path in unset_paths:
+                update.append({"$set": {path[0]: _unset_expr(f"${path[0]}", path[1:])}})
+            for field, values in add_to_set.items():
+                update.append({"$set": {field: {"$setUnion": [{"$ifNull": [f"${field}", []]}, {"$literal": values}]}}})
+            for field, values in pull.items():
+                update.append({"$set": {field: {"$setDifference": [{"$ifNull": [f"${field}", []]}, {"$literal": values}]}}})
+            if member_name:
+                query["$expr"] = {"$ne": [{"$type": _get_expr("$membros", (member_name,))}, "missing"]}
+
+        return StravaGroup._get_collection().update_one(query, update).matched_count > 0
+
+    def add_member(self, group_id: int, member_name: str, member_data: dict) -> bool:
+        """
+        Vincula (ou substitui) o membro e registra seu athlete_id em athlete_ids
+        no mesmo update. Quem vincula membros fora do bot deve usar este método.
+        """
+        athlete_id = member_data.get("athlete_id")
+        return self._update(
+            group_id,
+            set_paths={("membros", member_name): member_data},
+            add_to_set={"athlete_ids": [athlete_id] if athlete_id is not None else []},
+        )
+
+    def set_member_fields(self, group_id: int, member_name: str, values: dict) -> bool:
+        """
+        Grava campos do membro (ex.: tokens renovados) sem reescrever os demais membros.
+        """
+        return self._update(
+            group_id,
+            set_paths={("membros", member_name, field): value for field, value in values.items()},
+            member_name=member_name,
+        )
+
+    def advance_member_cursor(self, group_id: int, member_name: str, last_activity_date: datetime) -> bool:
+        """
+        Avança o cursor de sync do membro com $max: um sync concorrente que
+        terminou depois com um cursor mais antigo não o faz voltar.
+        """
+        return self._update(
+            group_id,
+            max_paths={("membros", member_name, "last_activity_date"): last_activity_date},
+            member_name=member_name,
+        )
+
+    def reset_member_cursors(self, group_id: int, member_names: list[str], last_activity_date: datetime) -> bool:
+        """
+        Volta o cursor de sync de cada membro, um update por membro com a mesma
+        guarda de existência de advance_member_cursor: um membro removido no
+        meio do reset não é recriado só com last_activity_date.
+        Returns:
+            bool: se algum membro foi atualizado
+        """
+        results = [
+            self._update(
+                group_id,
+                set_paths={("membros", member_name, "last_activity_date"): last_activity_date},
+                member_name=member_name,
+            )
+            for member_name in member_names
+        ]
+        return any(results)
+
+    def set_last_sync(self, group_id: int, last_sync: datetime) -> bool:
+        return self._update(group_id, set_paths={("last_sync",): last_sync})
+
+    def remove_member(self, group, member_name: str) -> bool:
+        """
+        Remove o membro, suas medalhas em cada mês/modalidade, sua entrada no
+        medal_summary e seu athlete_id (se nenhum outro membro usar o mesmo) em
+        um único update, sem reescrever o restante do grupo.
+        """
+        athlete_id = group.membros.get(member_name, {}).get("athlete_id")
+        shared = any(
+            data.get("athlete_id") == athlete_id
+            for name, data in group.membros.items() if name != member_name
+        )
+        medal_paths = tuple(
+            ("medalhas", month, sport_type, member_name)
+            for month, sport_dict in group.medalhas.items()
+            for sport_type, podium in sport_dict.items()
+            if member_name in podium
+        )
+        return self._update(
+            group.telegram_group_id,
+            unset_paths=(("membros", member_name), ("medal_summary", member_name)) + medal_paths,
+            pull={"athlete_ids": [athlete_id] if athlete_id is not None and not shared else []},
+        )
+
+    def list_group_ids(self) -> list[int]:
+        return list(StravaGroup.objects.scalar("telegram_group_id"))
+
+    def find_by_athlete(self, athlete_id: int) -> list:
+        """Grupos dos quais o atleta é membro, pelo índice de athlete_ids."""
+        return list(StravaGroup.objects(athlete_ids=athlete_id))
@@ -0,0 +1,117 @@
+import logging
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from mongoengine import Document, IntField, DateTimeField
+
+from domain.services.streak_service import advance_streak, streak_from_days
+
+logger = logging.getLogger(__name__)
+
+MAX_ADVANCE_ATTEMPTS = 5
+
+
+class StravaStreak(Document):
+    """
+    Sequência atual e maior sequência de dias ativos por (grupo, atleta),
+    avançadas a cada novo dia ingerido.
+    """
+    meta = {
+        "indexes": [
+            {"fields": ["group_id", "athlete_id"], "unique": True},
+            # /streak: quem treinou hoje, pela sequência atual
+            {"fields": ["group_id", "last_day", "-current"]},
+            # /maxstreak
+            {"fields": ["group_id", "-longest"]},
+        ],
+        "index_background": True,
+    }
+
+    group_id = IntField()
+    athlete_id = IntField()
+    current = IntField(default=0)
+    last_day = DateTimeField()
+    longest = IntField(default=0)
+    longest_end = DateTimeField()
+
+    def advance(self, group_id: int, athlete_id: int, day: datetime, athlete_days: Callable[[], Iterable[datetime]]) -> None:
+        """
+        Avança a sequência com um novo dia ativo. A gravação é condicionada ao
+        last_day lido, então ingestões concorrentes do mesmo atleta tentam de novo
+        em vez de se sobrescreverem. Dias fora de ordem recalculam a partir de athlete_days.
+        """
+        collection = StravaStreak._get_collection()
+        key = {"group_id": group_id, "athlete_id": athlete_id}
+
+        for _ in range(MAX_ADVANCE_ATTEMPTS):
+            state = collection.find_one(key, {"_id": 0, "current": 1, "last_day": 1, "longest": 1, "longest_end": 1})
+            new_state = advance_streak(state, day)
+            if new_state is None:
+                break
+            if new_state == state:
+                return
+            if state is None:
+                try:
+                    collection.insert_one({**key, **new_state})
+                    return
+                except DuplicateKeyError:
+                    continue
+            if collection.update_one({**key, "last_day": state["last_day"]}, {"$set": new_state}).matched_count:
+                return
+
+        self.recompute(group_id, athlete_id, athlete_days())
+
+    def recompute(self, group_id: int, athlete_id: int, days: Iterable[datetime]) -> None:
+        key = {"group_id": group_id, "athlete_id": athlete_id}
+        state = streak_from_days(days)
+        collection = StravaStreak._get_collection()
+        if state is None:
+            collection.delete_one(key)
+            return
+        collection.update_one(key, {"$set": state}, upsert=True)
+        logger.info("Sequência do atleta %s no grupo %s recalculada: %s", athlete_id, group_id, state)
+
+    def rebuild(self, group_id: int, days_by_athlete: dict) -> None:
+        """Substitui as sequências do grupo por upsert e remove depois as de atletas sem dias."""
+        collection = StravaStreak._get_collection()
+        operations = []
+        for athlete_id, days in days_by_athlete.items():
+            state = streak_from_days(days)
+            if state:
+                key = {"group_id": group_id, "athlete_id": athlete_id}
+                operations.append(ReplaceOne(key, {**key, **state}, upsert=True))
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+        collection.delete_many({
+            "group_id": group_id,
+            "athlete_id": {"$nin": [operation._filter["athlete_id"] for operation in operations]},
+        })
+
+    def current_streaks(self, group_id: int, day: datetime) -> list[tuple]:
+        """
+        Returns:
+            list: (athlete_id, sequência atual) de quem teve atividade em day
+        """
+        return [
+            (streak.athlete_id, streak.current)
+            for streak in StravaStreak.objects(group_id=group_id, last_day=day).order_by("-current").only("athlete_id", "current")
+        ]
+
+    def longest_streaks(self, group_id: int, limit: Optional[int] = None) -> list[tuple]:
+        """
+        Returns:
+            list: (athlete_id, maior sequência) em ordem decrescente
+        """
+        streaks = StravaStreak.objects(group_id=group_id).order_by("-longest").only("athlete_id", "longest")
+        if limit:
+            streaks = streaks.limit(limit)
+        return [(streak.athlete_id, streak.longest) for streak in streaks]
+
+    def remove_member(self, group_id: int, athlete_id: int):
+        StravaStreak.objects(
+            __raw__={
+                "group_id": group_id,
+                "athlete_id": athlete_id
+            }
+        ).delete()
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from mongoengine import Document, IntField, StringField, DateTimeField
+
+
+def utcnow() -> datetime:
+    # o índice TTL do MongoDB compara com UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class StravaSyncLease(Document):
+    """
+    Lease de sync por grupo, compartilhada entre processos do bot: só quem
+    detém a lease sincroniza o grupo. Leases de processos que morreram
+    expiram em expires_at e são apagadas pelo índice TTL.
+    """
+    meta = {
+        "indexes": [
+            {"fields": ["group_id"], "unique": True},
+            {"fields": ["expires_at"], "expireAfterSeconds": 0},
+        ],
+        "index_background": True,
+    }
+
+    group_id = IntField()
+    owner = StringField()
+    expires_at = DateTimeField()
+
+    def acquire(self, group_id: int, owner: str, ttl: timedelta) -> bool:
+        """
+        Toma a lease se estiver livre, expirada ou já for de owner. Com a lease
+        ativa de outro dono, o upsert colide no índice único e retorna False.
+        """
+        now = utcnow()
+        try:
+            StravaSyncLease._get_collection().update_one(
+                {"group_id": group_id, "$or": [{"expires_at": {"$lte": now}}, {"owner": owner}]},
+                {"$set": {"owner": owner, "expires_at": now + ttl}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def release(self, group_id: int, owner: str) -> None:
+        StravaSyncLease._get_collection().delete_one({"group_id": group_id, "owner": owner})
+
+    def is_held(self, group_id: int) -> bool:
+        return StravaSyncLease._get_collection().find_one(
+            {"group_id": group_id, "expires_at": {"$gt": utcnow()}}, {"_id": 1}
+        ) is not None
@@ -1,54 +1,45 @@
 from typing import Optional
 
-from shared.user import get_user
+from domain.services.medal_service import medal_summary_for
+from shared.user import MemberDirectory
 
 def create_rank(title:str, rank_data:list, group, sport_type:Optional[str] = None):
     rank_position = 0
     value = 0
     lines = [title]
+    directory = MemberDirectory(group.membros)
+    summary = medal_summary_for(group) if sport_type else {}
     for (user_id, data) in rank_data:
         if data != value:
             value = data
             rank_position += 1
-        lines.append(f"{rank_position}º - {get_user_link(user_id, group.membros)}{get_medalhas(user_id, group, sport_type)} - {data}")
+        lines.append(f"{rank_position}º - {get_user_link(user_id, directory)}{get_medalhas(user_id, group, sport_type, directory, summary)} - {data}")
 
     return "\n".join(lines)
 
-def get_user_link(user_id:int, membros:dict):
-    user = get_user(membros,user_id=user_id)
+def get_user_link(user_id:int, directory:MemberDirectory):
+    user = directory.get_user(user_id=user_id)
     return f"<a href='https://www.strava.com/athletes/{user['id']}'>{user['name']}</a>"
 
-def get_medalhas(user_id:int, group, sport_type:Optional[str] = None):
-    user = get_user(group.membros, user_id=user_id)
-    user_name = user.get("name")
-
+def get_medalhas(user_id:int, group, sport_type:Optional[str] = None, directory:Optional[MemberDirectory] = None, summary:Optional[dict] = None):
     if not sport_type:
         return ""
-    
-    emoji_dict = {
-        1: "🥇",
-        2: "🥈",
-        3: "🥉"
-    }
-
-    medalha_dict = {
-        1: 0,
-        2: 0,
-        3: 0
-    }
-    
-    for medalha in group.medalhas.values():
-        if not medalha.get(sport_type):
-            continue
 
-        sport_type_medalhas = medalha.get(sport_type)
+    directory = directory or MemberDirectory(group.membros)
+    user = directory.get_user(user_id=user_id)
+    summary = summary if summary is not None else medal_summary_for(group)
+    sport_medalhas = summary.get(user.get("name"), {}).get("sports", {}).get(sport_type, {})
 
-        if sport_type_medalhas.get(user_name):
-            medalha_dict[sport_type_medalhas.get(user_name)] += 1
+    emoji_dict = {
+        "1": "🥇",
+        "2": "🥈",
+        "3": "🥉"
+    }
 
     medalhas_str = ""
-    for medalha, count in medalha_dict.items():
+    for medalha, emoji in emoji_dict.items():
+        count = sport_medalhas.get(medalha, 0)
         if count == 0:
             continue
-        medalhas_str += f"{emoji_dict.get(medalha, '')}{count}"
+        medalhas_str += f"{emoji}{count}"
     return medalhas_str.strip()
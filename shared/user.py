@@ -1,17 +1,42 @@
 from typing import Optional
 
+
+class MemberDirectory:
+    """
+    Índice dos membros de um grupo por athlete_id e por nome.
+    Montado uma vez por grupo carregado; cada busca é O(1).
+    """
+
+    def __init__(self, membros: dict):
+        self.membros = membros
+        self._names_by_id = {}
+        for member_name, member_data in membros.items():
+            self._names_by_id.setdefault(member_data.get("athlete_id"), member_name)
+
+    def get_member(self, athlete_id: int) -> tuple:
+        """
+        Returns:
+            tuple: (nome, dados) do membro, ou (None, None) se não existir
+        """
+        member_name = self._names_by_id.get(athlete_id)
+        if member_name is None:
+            return None, None
+        return member_name, self.membros[member_name]
+
+    def get_user(self, user_id: Optional[int] = None, user_name: Optional[str] = None) -> dict:
+        if user_id:
+            user_name = self._names_by_id.get(user_id)
+        elif not user_name:
+            return {}
+
+        if user_name not in self.membros:
+            return {}
+
+        return {
+          "id": self.membros[user_name]['athlete_id'],
+          "name": user_name
+        }
+
+
 def get_user(membros:dict, user_id:Optional[int] = None, user_name:Optional[str] = None) -> dict:
-    if user_id:
-        user = list(filter(lambda x: x[1]['athlete_id'] == user_id, membros.items()))
-    elif user_name:
-        user = list(filter(lambda x: x[0] == user_name, membros.items()))
-    else:
-        return {}
-    
-    if not user:
-        return {}
-
-    return {
-      "id": user[0][1]['athlete_id'],
-      "name": user[0][0]
-    }
\ No newline at end of file
+    return MemberDirectory(membros).get_user(user_id=user_id, user_name=user_name)
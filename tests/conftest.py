@@ -1,10 +1,38 @@
 import sys
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+
+import pytest
 
 mock_config = MagicMock()
 mock_config.STRAVA_CLIENT_ID = "test_client_id"
 mock_config.STRAVA_CLIENT_SECRET = "test_client_secret"
-mock_config.TELEGRAM_TOKEN = "test_token"
+mock_config.TELEGRAM_TOKEN = "123456:test_token"
 mock_config.MONGO_URI = "mongodb://localhost:27017/test"
 mock_config.REDIRECT_URI = "http://test/{}"
+mock_config.STRAVA_WEBHOOK_VERIFY_TOKEN = "test_verify_token"
+mock_config.STRAVA_WEBHOOK_PORT = 0
+mock_config.TELEGRAM_WORKERS = 4
+mock_config.TELEGRAM_MAX_BACKLOG = 50
+mock_config.TELEGRAM_MODE = "polling"
+mock_config.TELEGRAM_WEBHOOK_URL = "https://test/telegram/webhook"
+mock_config.TELEGRAM_WEBHOOK_SECRET = "test_webhook_secret"
+mock_config.TELEGRAM_WEBHOOK_PORT = 0
+mock_config.TELEGRAM_RUNTIME = "threaded"
 sys.modules["config"] = mock_config
+
+
+def _apply_bulk(collection, operations, ordered=True):
+    # bulk_write do mongomock não aceita os argumentos do pymongo atual
+    from pymongo import ReplaceOne
+    for operation in operations:
+        if isinstance(operation, ReplaceOne):
+            collection.replace_one(operation._filter, operation._doc, upsert=operation._upsert)
+        else:
+            collection.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+
+
+@pytest.fixture
+def mongomock_bulk_write():
+    mongomock = pytest.importorskip("mongomock")
+    with patch.object(mongomock.collection.Collection, "bulk_write", autospec=True, side_effect=_apply_bulk) as mock_bulk_write:
+        yield mock_bulk_write
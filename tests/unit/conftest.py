@@ -1,9 +1,23 @@
+import pytest
 from datetime import datetime
 from unittest.mock import MagicMock
 
+from application.response_cache import default_response_cache
+from application.sync_activities import sync_stamps
+
+
+@pytest.fixture(autouse=True)
+def empty_response_cache():
+    """Cada teste começa sem respostas em cache nem carimbos de sync de testes anteriores."""
+    default_response_cache.clear()
+    sync_stamps.clear()
+    yield
+    default_response_cache.clear()
+    sync_stamps.clear()
+
 
 class MockActivity:
-    """Simula um documento StravaActivity suportando acesso por atributo e por chave."""
+    """Simula uma atividade, como documento StravaActivity (atributo) ou dict do as_pymongo (chave)."""
 
     def __init__(self, athlete_id, start_date_local, sport_type="Run", distance=0.0, moving_time=0):
         self.athlete = MagicMock()
@@ -15,6 +29,8 @@ class MockActivity:
             "start_date_local": start_date_local,
             "sport_type": sport_type,
             "athlete": {"id": athlete_id},
+            "distance": distance,
+            "moving_time": moving_time,
         }
 
     def __getitem__(self, key):
@@ -24,12 +40,13 @@ class MockActivity:
         return self._data.get(key, default)
 
 
-def make_group(membros=None, medalhas=None):
+def make_group(membros=None, medalhas=None, last_sync=None):
     group = MagicMock()
     group.membros = membros or {
         "Joao": {"athlete_id": 1, "access_token": "tok1", "refresh_token": "ref1", "last_activity_date": None},
         "Maria": {"athlete_id": 2, "access_token": "tok2", "refresh_token": "ref2", "last_activity_date": None},
     }
     group.medalhas = medalhas or {}
-    group.last_sync = None
+    group.medal_summary = {}
+    group.last_sync = last_sync
     return group
@@ -0,0 +1,194 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+mongomock = pytest.importorskip("mongomock")
+
+from mongoengine import connect, disconnect
+from domain.services.frequency_service import FrequencyService
+from domain.services.rank_service import RankService
+from application.rebuild_rollups import rebuild_rollups
+from infrastructure.mongo.strava_activity import StravaActivity
+from infrastructure.mongo.strava_daily_rollup import StravaDailyRollup
+from infrastructure.mongo.strava_streak import StravaStreak
+from infrastructure.mongo.strava_sync_lease import StravaSyncLease
+
+START = datetime(2025, 8, 1)
+END = datetime(2025, 9, 1)
+
+
+@pytest.fixture(autouse=True)
+def mongo(mongomock_bulk_write):
+    connect("strava_bot_test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+    yield
+    StravaActivity.drop_collection()
+    StravaDailyRollup.drop_collection()
+    StravaStreak.drop_collection()
+    StravaSyncLease.drop_collection()
+    disconnect()
+
+
+def _insert(activity_id, athlete_id, sport_type, start_date_local, group_id=123, **values):
+    StravaActivity._get_collection().insert_one({
+        "group_id": group_id,
+        "activity_id": activity_id,
+        "athlete": {"id": athlete_id},
+        "sport_type": sport_type,
+        "start_date_local": start_date_local,
+        **values,
+    })
+
+
+def _seed(seed):
+    rng = random.Random(seed)
+    for activity_id in range(300):
+        values = {}
+        if rng.random() > 0.1:
+            values["distance"] = float(rng.randrange(500, 40000))
+        if rng.random() > 0.1:
+            values["moving_time"] = rng.randrange(300, 10000)
+        _insert(
+            activity_id,
+            athlete_id=rng.randrange(1, 15),
+            sport_type=rng.choice(["Run", "Ride", "Yoga", "Walk"]),
+            start_date_local=START + timedelta(hours=rng.randrange(-24 * 10, 24 * 40)),
+            group_id=rng.choice([123, 123, 123, 456]),
+            **values,
+        )
+    rebuild_rollups([123, 456])
+
+
+def _in_memory(sport_type):
+    activities = StravaActivity().get_activities(123, START, END, fields=RankService.FIELDS)
+    return RankService(list(activities)).calculate(sport_type)
+
+
+def _current_streaks(activities, today):
+    """Sequência que termina hoje, contada dia a dia sobre as atividades cruas."""
+    days_by_athlete = {}
+    for activity in activities:
+        days_by_athlete.setdefault(activity["athlete"]["id"], set()).add(activity["start_date_local"].date())
+    streaks = []
+    for athlete_id, days in days_by_athlete.items():
+        day, streak = today.date(), 0
+        while day in days:
+            streak, day = streak + 1, day - timedelta(days=1)
+        if streak:
+            streaks.append((athlete_id, streak))
+    return streaks
+
+
+def _aggregated(sport_type):
+    return StravaDailyRollup().sum_by_athlete(123, START, END, sport_type, RankService.rank_type_for(sport_type))
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("sport_type", ["Run", "Ride", "Yoga", "Swim"])
+def test_aggregation_matches_in_memory_rank(seed, sport_type):
+    _seed(seed)
+
+    expected = _in_memory(sport_type)
+    result = _aggregated(sport_type)
+
+    assert sorted(result) == sorted(expected)
+    assert [total for _, total in result] == [total for _, total in expected]
+
+
+def test_aggregation_ignores_other_groups_sports_and_period():
+    _insert(1, 1, "Run", START, distance=1000.0)
+    _insert(2, 1, "Run", START + timedelta(days=3), distance=2000.0)
+    _insert(3, 2, "Run", START, distance=5000.0)
+    _insert(4, 2, "Ride", START, distance=90000.0)
+    _insert(5, 3, "Run", END, distance=90000.0)
+    _insert(6, 3, "Run", START, group_id=456, distance=90000.0)
+    rebuild_rollups([123, 456])
+
+    assert _aggregated("Run") == [(2, 5000.0), (1, 3000.0)]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_active_days_match_in_memory_frequency(seed):
+    _seed(seed)
+
+    activities = StravaActivity().get_activities(123, START, END, fields=FrequencyService.FIELDS)
+    expected = FrequencyService(list(activities)).calculate()
+    result = StravaDailyRollup().count_active_days(123, START, END)
+
+    assert sorted(result) == sorted(expected)
+    assert [days for _, days in result] == [days for _, days in expected]
+
+
+def test_active_days_count_each_calendar_day_once():
+    _insert(1, 1, "Run", START.replace(hour=6))
+    _insert(2, 1, "Ride", START.replace(hour=18))
+    _insert(3, 1, "Run", START + timedelta(days=1, hours=23, minutes=59))
+    _insert(4, 2, "Run", START + timedelta(days=5))
+    _insert(5, 2, "Run", END)
+    rebuild_rollups([123])
+
+    assert StravaDailyRollup().count_active_days(123, START, END) == [(1, 2), (2, 1)]
+
+
+def test_rebuild_removes_rows_of_deleted_activities():
+    _insert(1, 1, "Run", START.replace(hour=6))
+    _insert(2, 2, "Run", START + timedelta(days=5))
+    rebuild_rollups([123])
+    StravaActivity.objects(activity_id=2).delete()
+
+    assert rebuild_rollups([123]) == {123: 1}
+    assert StravaDailyRollup().count_active_days(123, START, END) == [(1, 1)]
+    assert StravaStreak().longest_streaks(123) == [(1, 1)]
+
+
+@patch("application.rebuild_rollups.wait_for_lease", return_value=False)
+def test_rebuild_skips_group_while_sync_holds_the_lease(mock_wait):
+    _insert(1, 1, "Run", START.replace(hour=6))
+    StravaSyncLease().acquire(123, "sync", timedelta(minutes=10))
+
+    assert rebuild_rollups([123]) == {}
+    assert StravaDailyRollup.objects.count() == 0
+    assert StravaSyncLease().is_held(123)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_sports_match_raw_activities(seed):
+    _seed(seed)
+
+    raw = StravaActivity.objects(
+        __raw__={"group_id": 123, "start_date_local": {"$gte": START, "$lt": END}}
+    ).distinct("sport_type")
+
+    assert sorted(StravaDailyRollup().list_sports(123, START, END)) == sorted(raw)
+
+
+def test_streak_state_matches_raw_activities():
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    rng = random.Random(7)
+    for activity_id in range(200):
+        _insert(activity_id, rng.randrange(1, 8), "Run", today - timedelta(days=rng.randrange(0, 12), hours=-rng.randrange(0, 23)))
+    rebuild_rollups([123])
+
+    raw = StravaActivity().get_activities(123, today - timedelta(days=60), today + timedelta(days=1), fields=("athlete.id", "start_date_local"))
+
+    assert sorted(StravaStreak().current_streaks(123, today)) == sorted(_current_streaks(raw, today))
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_monthly_podiums_match_in_memory_rank_for_every_group(seed):
+    _seed(seed)
+
+    expected = {}
+    for group_id in (123, 456):
+        activities = list(StravaActivity().get_activities(group_id, START, END, fields=RankService.FIELDS))
+        service = RankService(activities)
+        for sport_type in service.list_sports():
+            ranking = [athlete_id for athlete_id, total in service.calculate(sport_type) if total > 0]
+            if ranking:
+                expected[(group_id, sport_type)] = ranking[:3]
+
+    rows = list(StravaDailyRollup().monthly_podiums(START, END, RankService.sport_rank_by_time_list))
+    result = {(row["group_id"], row["sport_type"]): [entry["athlete_id"] for entry in row["podium"]] for row in rows}
+
+    assert result == expected
+    assert [row["group_id"] for row in rows] == sorted(row["group_id"] for row in rows)
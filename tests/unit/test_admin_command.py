@@ -1,4 +1,4 @@
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from datetime import datetime
 from application.commands.admin import (
     handle_admin_command,
@@ -26,15 +26,15 @@ def test_admin_callback_removes_member(mock_group_repo, mock_activity_repo):
         membros={"Joao": {"athlete_id": 1, "access_token": "t", "refresh_token": "r", "last_activity_date": None}},
         medalhas={"2025-01": {"Run": {"Joao": 1}}}
     )
+    group.medal_summary = {"Joao": {"total": {"1": 1, "2": 0, "3": 0, "points": 3}, "sports": {}}}
     mock_group_repo.return_value.get_group.return_value = group
 
     result = handle_admin_callback(123, member_id=1, autor_remocao="Admin")
 
-    assert "Joao" not in group.membros
-    assert "Joao" not in group.medalhas["2025-01"]["Run"]
     assert "removido com sucesso" in result
+    mock_group_repo.return_value.remove_member.assert_called_once_with(group, "Joao")
     mock_activity_repo.return_value.remove_activity_member.assert_called_once_with(123, 1)
-    group.save.assert_called_once()
+    group.save.assert_not_called()
 
 
 @patch("application.commands.admin.StravaActivity")
@@ -57,11 +57,10 @@ def test_reset_command_sets_first_of_month(mock_group_repo):
     result = handle_reset_command(123)
 
     now = datetime.now()
-    for member_data in group.membros.values():
-        reset_date = member_data["last_activity_date"]
-        assert reset_date.day == 1
-        assert reset_date.month == now.month
-        assert reset_date.year == now.year
+    group_id, member_names, reset_date = mock_group_repo.return_value.reset_member_cursors.call_args.args
+    assert group_id == 123
+    assert member_names == list(group.membros)
+    assert reset_date == datetime(now.year, now.month, 1)
 
     assert "sucesso" in result.lower()
-    group.save.assert_called_once()
+    group.save.assert_not_called()
@@ -0,0 +1,129 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+
+mongomock = pytest.importorskip("mongomock")
+
+from mongoengine import connect, disconnect, get_db
+from domain.services.rank_service import RankService
+from application.rebuild_rollups import rebuild_rollups
+from infrastructure.mongo.async_repository import AsyncStravaRepository, sort_spec
+from infrastructure.mongo.strava_activity import StravaActivity
+from infrastructure.mongo.strava_daily_rollup import StravaDailyRollup
+from infrastructure.mongo.strava_group import StravaGroup
+from infrastructure.mongo.strava_streak import StravaStreak
+
+START = datetime(2025, 8, 1)
+END = datetime(2025, 9, 1)
+
+
+class _AsyncCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, spec):
+        self.cursor = self.cursor.sort(spec)
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.cursor)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.cursor:
+            yield document
+
+
+class _AsyncCollection:
+    """Mesma interface do AsyncCollection do pymongo sobre uma coleção do mongomock."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def find_one(self, *args, **kwargs):
+        return self.collection.find_one(*args, **kwargs)
+
+    def find(self, *args, **kwargs):
+        return _AsyncCursor(self.collection.find(*args, **kwargs))
+
+    async def distinct(self, key, query=None):
+        return self.collection.distinct(key, query)
+
+    async def aggregate(self, pipeline):
+        return _AsyncCursor(self.collection.aggregate(pipeline))
+
+
+class _AsyncDatabase:
+    def __init__(self, database):
+        self.database = database
+
+    def __getitem__(self, name):
+        return _AsyncCollection(self.database[name])
+
+
+@pytest.fixture
+def repository(mongomock_bulk_write):
+    connect("strava_bot_test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+    yield AsyncStravaRepository(_AsyncDatabase(get_db()))
+    for document in (StravaGroup, StravaActivity, StravaDailyRollup, StravaStreak):
+        document.drop_collection()
+    disconnect()
+
+
+def _seed():
+    for activity_id in range(120):
+        StravaActivity._get_collection().insert_one({
+            "group_id": 123,
+            "activity_id": activity_id,
+            "athlete": {"id": activity_id % 7},
+            "sport_type": ["Run", "Ride", "Yoga"][activity_id % 3],
+            "start_date_local": START + timedelta(hours=activity_id * 7 - 100),
+            "distance": float(activity_id * 100),
+            "moving_time": activity_id * 60,
+        })
+    rebuild_rollups([123])
+
+
+def test_sort_spec():
+    assert sort_spec("-start_date_local") == [("start_date_local", -1)]
+    assert sort_spec("start_date_local") == [("start_date_local", 1)]
+
+
+def test_get_group_returns_document(repository):
+    StravaGroup(telegram_group_id=123, membros={"Ana": {"athlete_id": 1}}).save()
+
+    group = asyncio.run(repository.get_group(123))
+
+    assert isinstance(group, StravaGroup)
+    assert group.membros == {"Ana": {"athlete_id": 1}}
+    assert asyncio.run(repository.get_group(999)) is None
+
+
+@pytest.mark.parametrize("sport_type", ["Run", "Ride", "Yoga", "Swim"])
+def test_sum_by_athlete_matches_sync_repository(repository, sport_type):
+    _seed()
+    field = RankService.rank_type_for(sport_type)
+
+    expected = StravaDailyRollup().sum_by_athlete(123, START, END, sport_type, field)
+
+    assert asyncio.run(repository.sum_by_athlete(123, START, END, sport_type, field)) == expected
+
+
+def test_list_sports_matches_sync_repository(repository):
+    _seed()
+
+    expected = StravaDailyRollup().list_sports(123, START, END)
+
+    assert sorted(asyncio.run(repository.list_sports(123, START, END))) == sorted(expected)
+
+
+def test_get_activities_matches_sync_repository(repository):
+    _seed()
+
+    expected = list(StravaActivity().get_activities(123, START, END, member_id_list=[1, 2], fields=RankService.FIELDS))
+    result = asyncio.run(repository.get_activities(123, START, END, member_id_list=[1, 2], fields=RankService.FIELDS))
+
+    assert result == expected
+    assert result and all("_id" not in activity for activity in result)
@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+import time
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from adapters.async_strava_client import AsyncStravaClient, create_session
+from adapters.strava_budget import PRIORITY_LOW, BudgetExhausted, StravaBudget
+
+
+def _run(responses, check, budget=None):
+    """Sobe um Strava falso que responde a sequência de (status, json, headers) e roda check(client, requests)."""
+    requests = []
+    responses = iter(responses)
+
+    async def activities(request):
+        requests.append(request)
+        status, body, headers = next(responses)
+        return web.json_response(body, status=status, headers=headers)
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/athlete/activities", activities)
+        async with TestServer(app) as server, create_session() as session:
+            client = AsyncStravaClient(session, base_url=str(server.make_url("")).rstrip("/"), budget=budget or MagicMock(), backoff_base=0)
+            return await check(client, requests)
+
+    return asyncio.run(main())
+
+
+def test_fetch_activities_success():
+    async def check(client, requests):
+        result = await client.fetch_activities("valid_token", datetime(2025, 8, 1, 12), page=2, per_page=50)
+        assert result == [{"id": 1}]
+        assert requests[0].headers["Authorization"] == "Bearer valid_token"
+        assert requests[0].query["after"] == str(int(datetime(2025, 8, 1, 12).timestamp()))
+        assert requests[0].query["page"] == "2"
+        assert requests[0].query["per_page"] == "50"
+
+    _run([(200, [{"id": 1}], {})], check)
+
+
+def test_fetch_activities_updates_rate_limit():
+    headers = {"X-RateLimit-Limit": "100,1000", "X-RateLimit-Usage": "12,340"}
+
+    async def check(client, requests):
+        await client.fetch_activities("token", datetime(2025, 8, 1))
+        assert client.rate_limit.short_remaining == 88
+        assert client.rate_limit.daily_remaining == 660
+
+    _run([(200, [], headers)], check)
+
+
+def test_fetch_activities_retries_on_503():
+    async def check(client, requests):
+        assert await client.fetch_activities("token", datetime(2025, 8, 1)) == [{"id": 1}]
+        assert len(requests) == 2
+
+    _run([(503, {}, {}), (200, [{"id": 1}], {})], check)
+
+
+def test_fetch_activities_raises_on_401_without_retry():
+    async def check(client, requests):
+        with pytest.raises(aiohttp.ClientResponseError) as error:
+            await client.fetch_activities("expired", datetime(2025, 8, 1))
+        assert error.value.status == 401
+        assert len(requests) == 1
+
+    _run([(401, {"message": "Authorization Error"}, {})], check)
+
+
+def test_fetch_activities_reserves_shared_budget_per_attempt():
+    budget = StravaBudget(short_limit=100, daily_limit=1000)
+
+    async def check(client, requests):
+        await client.fetch_activities("token", datetime(2025, 8, 1), priority=PRIORITY_LOW)
+        assert budget.headroom()["short_remaining"] == 98
+
+    _run([(429, {}, {"Retry-After": "0"}), (200, [], {})], check, budget=budget)
+
+
+def test_acquire_times_out_at_deadline_and_leaves_no_ticket_queued():
+    budget = StravaBudget(short_limit=1, daily_limit=1000)
+    budget.acquire(None)
+
+    async def main():
+        async with create_session() as session:
+            client = AsyncStravaClient(session, budget=budget, deadline=time.monotonic() + 0.1)
+            with pytest.raises(BudgetExhausted):
+                await client.fetch_activities("token", datetime(2025, 8, 1))
+
+    asyncio.run(main())
+    assert budget.headroom()["queued"] == 0
+
+
+def test_cancelled_acquire_leaves_no_ticket_queued():
+    budget = StravaBudget(short_limit=1, daily_limit=1000)
+    budget.acquire(None)
+
+    async def main():
+        async with create_session() as session:
+            client = AsyncStravaClient(session, budget=budget)
+            task = asyncio.ensure_future(client.fetch_activities("token", datetime(2025, 8, 1)))
+            await asyncio.sleep(0.1)
+            assert budget.headroom()["queued"] == 1
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(main())
+    assert budget.headroom()["queued"] == 0
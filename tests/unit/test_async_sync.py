@@ -0,0 +1,204 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+
+from adapters.strava_budget import BudgetExhausted
+from adapters.strava_token_cache import StravaTokenCache
+from application.async_sync import AsyncSyncer
+
+
+@pytest.fixture(autouse=True)
+def sync_lease():
+    with patch("application.async_sync.StravaSyncLease") as mock_lease_repo:
+        mock_lease_repo.return_value.acquire.return_value = True
+        yield mock_lease_repo.return_value
+
+
+@pytest.fixture(autouse=True)
+def repos():
+    with patch("application.async_sync.StravaActivity") as mock_activity_repo, \
+         patch("application.async_sync.StravaGroup") as mock_group_repo, \
+         patch("application.async_sync.StravaClient") as mock_refresh_client:
+        mock_activity_repo.return_value.save_activities.return_value = {"inserted": 1}
+        yield mock_activity_repo.return_value, mock_group_repo.return_value, mock_refresh_client.return_value
+
+
+def _group(last_sync=None, membros=None):
+    group = MagicMock()
+    group.telegram_group_id = 123
+    group.last_sync = last_sync
+    group.membros = membros or {
+        "user1": {"athlete_id": 1, "access_token": "tok1", "refresh_token": "ref1", "last_activity_date": None},
+        "user2": {"athlete_id": 2, "access_token": "tok2", "refresh_token": "ref2", "last_activity_date": None},
+    }
+    return group
+
+
+def _syncer(group):
+    repository = MagicMock()
+    repository.get_group = AsyncMock(return_value=group)
+    return AsyncSyncer(MagicMock(), repository, token_cache=StravaTokenCache())
+
+
+def _response_error(status):
+    return aiohttp.ClientResponseError(MagicMock(), (), status=status)
+
+
+@patch("application.async_sync.AsyncStravaClient")
+def test_sync_fetches_members_concurrently_and_saves(mock_client, repos):
+    activity_repo, group_repo, _ = repos
+    barrier = asyncio.Barrier(2)
+
+    async def fetch_activities(access_token, after, page, per_page, priority):
+        # só passa quando os dois membros estão buscando ao mesmo tempo
+        await asyncio.wait_for(barrier.wait(), timeout=1)
+        return [{"id": access_token, "start_date_local": "2025-01-01T12:00:00Z"}]
+
+    mock_client.return_value.fetch_activities.side_effect = fetch_activities
+
+    results = asyncio.run(_syncer(_group()).sync_group(123))
+
+    assert sorted(result.member_name for result in results) == ["user1", "user2"]
+    assert all(result.ok and result.fetched == 1 for result in results)
+    saved = sorted(call.args[1][0]["id"] for call in activity_repo.save_activities.call_args_list)
+    assert saved == ["tok1", "tok2"]
+    assert group_repo.advance_member_cursor.call_count == 2
+    group_repo.set_last_sync.assert_called_once()
+
+
+@patch("application.async_sync.wait_for_lease")
+@patch("application.async_sync.AsyncStravaClient")
+def test_sync_waits_when_lease_held_elsewhere(mock_client, mock_wait, sync_lease):
+    sync_lease.acquire.return_value = False
+
+    assert asyncio.run(_syncer(_group()).sync_group(123)) == []
+
+    mock_wait.assert_called_once()
+    mock_client.assert_not_called()
+    sync_lease.release.assert_not_called()
+
+
+@patch("application.async_sync.AsyncStravaClient")
+def test_sync_skips_group_synced_by_previous_lease_holder(mock_client, sync_lease):
+    assert asyncio.run(_syncer(_group(last_sync=datetime.now())).sync_group(123)) == []
+
+    mock_client.assert_not_called()
+    sync_lease.release.assert_called_once()
+
+
+@patch("application.async_sync.AsyncStravaClient")
+def test_concurrent_syncs_of_a_group_share_one_run(mock_client):
+    async def fetch_activities(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return []
+
+    mock_client.return_value.fetch_activities.side_effect = fetch_activities
+    syncer = _syncer(_group())
+
+    async def main():
+        return await asyncio.gather(*(syncer.sync_group(123) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert mock_client.call_count == 1
+    assert syncer.coalesced == 4
+    assert all(result is results[0] for result in results)
+
+
+@patch("application.async_sync.AsyncStravaClient")
+def test_sync_refreshes_token_on_401(mock_client, repos):
+    _, group_repo, refresh_client = repos
+    refresh_client.refresh_access_token.return_value = {"access_token": "new", "refresh_token": "ref_new", "expires_at": None}
+    mock_client.return_value.fetch_activities = AsyncMock(side_effect=[_response_error(401), []])
+
+    results = asyncio.run(_syncer(_group(membros={
+        "user1": {"athlete_id": 1, "access_token": "old", "refresh_token": "ref1", "last_activity_date": None},
+    })).sync_group(123))
+
+    assert results[0].ok
+    assert results[0].tokens["access_token"] == "new"
+    refresh_client.refresh_access_token.assert_called_once_with("ref1")
+    assert mock_client.return_value.fetch_activities.call_args.args[0] == "new"
+    group_repo.set_member_fields.assert_called_once()
+
+
+@patch("application.async_sync.AsyncStravaClient")
+def test_sync_records_member_errors(mock_client, repos):
+    activity_repo, _, _ = repos
+    mock_client.return_value.fetch_activities = AsyncMock(side_effect=_response_error(500))
+
+    results = asyncio.run(_syncer(_group()).sync_group(123))
+
+    assert all(not result.ok for result in results)
+    activity_repo.save_activities.assert_not_called()
+
+
+@patch("application.async_sync.default_scheduler")
+@patch("application.async_sync.AsyncStravaClient")
+def test_ensure_fresh_touches_group_and_skips_fresh_data(mock_client, mock_scheduler):
+    syncer = _syncer(_group(last_sync=datetime.now() - timedelta(minutes=30)))
+
+    asyncio.run(syncer.ensure_fresh(123))
+    asyncio.run(syncer.ensure_fresh(123))
+
+    assert mock_scheduler.touch.call_count == 2
+    # o last_sync lido na primeira chamada fica em memória: a segunda não lê o grupo
+    syncer.repository.get_group.assert_awaited_once_with(123)
+    mock_client.assert_not_called()
+
+
+@patch("application.async_sync.AsyncStravaClient")
+def test_sync_records_budget_exhausted_as_member_error(mock_client, repos):
+    activity_repo, group_repo, _ = repos
+    mock_client.return_value.fetch_activities = AsyncMock(side_effect=BudgetExhausted("sem orçamento"))
+
+    results = asyncio.run(_syncer(_group()).sync_group(123))
+
+    assert all(isinstance(result.error, BudgetExhausted) for result in results)
+    group_repo.advance_member_cursor.assert_not_called()
+    assert mock_client.call_args.kwargs["deadline"] is not None
+
+
+@patch("application.async_sync.AsyncStravaClient")
+def test_sync_unexpected_member_error_does_not_abort_group(mock_client, repos):
+    activity_repo, group_repo, _ = repos
+
+    async def fetch_activities(access_token, after, page, per_page, priority):
+        if access_token == "tok1":
+            return [{"id": "a1"}]
+        return [{"id": "b1", "start_date_local": "2025-01-02T12:00:00Z"}]
+
+    mock_client.return_value.fetch_activities.side_effect = fetch_activities
+
+    results = {result.member_name: result for result in asyncio.run(_syncer(_group()).sync_group(123))}
+
+    assert isinstance(results["user1"].error, KeyError)
+    assert results["user2"].ok
+    activity_repo.save_activities.assert_called_once_with(123, [{"id": "b1", "start_date_local": "2025-01-02T12:00:00Z"}])
+    group_repo.advance_member_cursor.assert_called_once_with(123, "user2", datetime(2025, 1, 2, 12, 0, 0))
+
+
+@patch("application.async_sync.AsyncStravaClient")
+def test_sync_bounds_concurrent_member_fetches(mock_client, repos):
+    running = []
+    peak = []
+
+    async def fetch_activities(access_token, after, page, per_page, priority):
+        running.append(access_token)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(access_token)
+        return []
+
+    mock_client.return_value.fetch_activities.side_effect = fetch_activities
+    repository = MagicMock()
+    repository.get_group = AsyncMock(return_value=_group())
+    syncer = AsyncSyncer(MagicMock(), repository, token_cache=StravaTokenCache(), concurrency=1)
+
+    results = asyncio.run(syncer.sync_group(123))
+
+    assert all(result.ok for result in results)
+    assert max(peak) == 1
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, call, patch
+
+from application.commands.rank import RANK_PLACEHOLDER
+from tests.unit.test_telegram_bot import _callback
+
+with patch("mongoengine.connect"):
+    from adapters.telegram import async_telegram_bot
+
+
+@patch("adapters.telegram.async_telegram_bot.handle_rank_month_command_async")
+def test_rank_callback_acknowledges_then_edits_menu_in_place(mock_rank):
+    events = MagicMock()
+    events.answer, events.edit = AsyncMock(), AsyncMock()
+
+    async def render(repository, syncer, group_id, sport_type):
+        assert events.mock_calls == [call.answer("cb1"), call.edit(RANK_PLACEHOLDER, -100, 42)]
+        return "ranking"
+
+    mock_rank.side_effect = render
+
+    with patch.object(async_telegram_bot.bot, "answer_callback_query", events.answer), \
+         patch.object(async_telegram_bot.bot, "edit_message_text", events.edit):
+        asyncio.run(async_telegram_bot.rank_month_callback_handler(_callback("rank_Run")))
+
+    assert mock_rank.call_args.args[2:] == (-100, "Run")
+    assert events.mock_calls[-1] == call.edit("ranking", -100, 42, parse_mode="HTML", disable_web_page_preview=True)
+
+
+def test_threaded_commands_run_in_their_own_executor():
+    sent = AsyncMock()
+
+    with patch.object(async_telegram_bot, "send_html", sent):
+        asyncio.run(async_telegram_bot.send_threaded(-100, lambda group_id: threading.current_thread().name))
+
+    group_id, thread_name = sent.await_args.args
+    assert group_id == -100
+    assert thread_name.startswith("telegram-command")
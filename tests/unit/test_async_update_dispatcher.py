@@ -0,0 +1,96 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from adapters.telegram.async_update_dispatcher import AsyncDispatchingTeleBot, AsyncUpdateDispatcher
+from adapters.telegram.outbound_queue import PRIORITY_INTERACTIVE
+from adapters.telegram.update_dispatcher import BUSY_MESSAGE
+from tests.unit.test_update_dispatcher import _callback_update, _update
+
+
+def test_updates_of_same_chat_run_in_order_and_chats_run_concurrently():
+    async def main():
+        release = asyncio.Event()
+        handled = []
+
+        async def handle(update):
+            if update.chat == "lento":
+                await release.wait()
+            handled.append((update.chat, update.seq))
+
+        dispatcher = AsyncUpdateDispatcher(handle, concurrency=2)
+        dispatcher.submit("lento", SimpleNamespace(chat="lento", seq=0))
+        for seq in range(5):
+            dispatcher.submit("rapido", SimpleNamespace(chat="rapido", seq=seq))
+            dispatcher.submit("lento", SimpleNamespace(chat="lento", seq=seq + 1))
+
+        while len(handled) < 5:
+            await asyncio.sleep(0)
+        assert handled == [("rapido", seq) for seq in range(5)]
+        assert dispatcher.gauges() == {"queue_depth": 5, "in_flight": 1, "chats": 1, "shed": 0}
+
+        release.set()
+        await dispatcher.shutdown()
+        assert [seq for chat, seq in handled if chat == "lento"] == list(range(6))
+        assert dispatcher.gauges() == {"queue_depth": 0, "in_flight": 0, "chats": 0, "shed": 0}
+
+    asyncio.run(main())
+
+
+def test_backlog_over_limit_is_shed_with_busy_callback():
+    async def main():
+        release = asyncio.Event()
+        on_busy = AsyncMock()
+
+        async def handle(update):
+            await release.wait()
+
+        dispatcher = AsyncUpdateDispatcher(handle, max_backlog=2, on_busy=on_busy)
+        accepted = [dispatcher.submit("chat", seq) for seq in range(4)]
+
+        assert accepted == [True, True, False, False]
+        release.set()
+        await dispatcher.shutdown()
+        assert dispatcher.gauges()["shed"] == 2
+        assert [call.args[0] for call in on_busy.await_args_list] == [2, 3]
+
+    asyncio.run(main())
+
+
+def test_handler_errors_do_not_stop_the_chat_queue():
+    async def main():
+        handled = []
+
+        async def handle(update):
+            if update == 0:
+                raise RuntimeError("falhou")
+            handled.append(update)
+
+        dispatcher = AsyncUpdateDispatcher(handle)
+        for update in range(3):
+            dispatcher.submit("chat", update)
+        await dispatcher.shutdown()
+        assert handled == [1, 2]
+
+    asyncio.run(main())
+
+
+def test_bot_routes_updates_through_dispatcher_and_replies_busy():
+    async def main():
+        bot = AsyncDispatchingTeleBot("123:abc", max_backlog=0)
+        bot.queue_message = MagicMock()
+        bot.answer_callback_query = AsyncMock()
+        bot.outbound = MagicMock()
+
+        await bot.process_new_updates([_update(1, -100), _update(2, -100, text="oi"), _callback_update(3, -200)])
+        await bot.dispatcher.shutdown()
+
+        bot.queue_message.assert_called_once_with(-100, BUSY_MESSAGE, priority=PRIORITY_INTERACTIVE)
+        bot.answer_callback_query.assert_not_called()
+        chat_id, answer, priority = bot.outbound.submit.call_args.args
+        assert (chat_id, priority) == (-200, PRIORITY_INTERACTIVE)
+        await answer()
+        bot.answer_callback_query.assert_awaited_once_with("cb1", BUSY_MESSAGE)
+        assert bot.dispatcher.gauges()["shed"] == 3
+
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+from datetime import datetime
+from application.award_medals import award_month, month_range, previous_month
+
+
+def _row(group_id, sport_type, *athlete_ids):
+    return {"group_id": group_id, "sport_type": sport_type, "podium": [{"athlete_id": athlete_id, "total": 1} for athlete_id in athlete_ids]}
+
+
+def test_month_range_crosses_year():
+    assert month_range("2025-08") == (datetime(2025, 8, 1), datetime(2025, 9, 1))
+    assert month_range("2025-12") == (datetime(2025, 12, 1), datetime(2026, 1, 1))
+
+
+def test_previous_month_crosses_year():
+    assert previous_month(datetime(2025, 8, 15)) == "2025-07"
+    assert previous_month(datetime(2026, 1, 1)) == "2025-12"
+
+
+@patch("application.award_medals.StravaGroup")
+@patch("application.award_medals.StravaDailyRollup")
+def test_award_month_aggregates_once_and_groups_rows(mock_rollup_repo, mock_group_repo):
+    mock_rollup_repo.return_value.monthly_podiums.return_value = iter([
+        _row(1, "Ride", 3),
+        _row(1, "Run", 2, 1),
+        _row(2, "Run", 5, 6, 7),
+    ])
+    mock_group_repo.return_value.award_month.return_value = 2
+
+    assert award_month("2025-08") == 2
+
+    mock_rollup_repo.return_value.monthly_podiums.assert_called_once()
+    start, end, time_sports = mock_rollup_repo.return_value.monthly_podiums.call_args.args
+    assert (start, end) == (datetime(2025, 8, 1), datetime(2025, 9, 1))
+    assert "yoga" in time_sports
+    mock_group_repo.return_value.award_month.assert_called_once_with("2025-08", {
+        1: {"Ride": [3], "Run": [2, 1]},
+        2: {"Run": [5, 6, 7]},
+    })
+
+
+@patch("application.award_medals.GROUP_BATCH_SIZE", 2)
+@patch("application.award_medals.StravaGroup")
+@patch("application.award_medals.StravaDailyRollup")
+def test_award_month_writes_in_group_batches(mock_rollup_repo, mock_group_repo):
+    mock_rollup_repo.return_value.monthly_podiums.return_value = iter([
+        _row(1, "Run", 1), _row(2, "Run", 2), _row(2, "Ride", 2), _row(3, "Run", 3),
+    ])
+    mock_group_repo.return_value.award_month.side_effect = lambda month, batch: len(batch)
+
+    assert award_month("2025-08") == 3
+
+    batches = [call.args[1] for call in mock_group_repo.return_value.award_month.call_args_list]
+    assert [sorted(batch) for batch in batches] == [[1, 2], [3]]
+    assert batches[0][2] == {"Run": [2], "Ride": [2]}
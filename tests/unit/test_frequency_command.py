@@ -1,5 +1,6 @@
 from unittest.mock import patch
 from datetime import datetime
+from pymongo.errors import OperationFailure
 from application.commands.frequency import (
     handle_frequency_command,
     handle_month_frequency_command,
@@ -8,9 +9,22 @@ from application.commands.frequency import (
 from tests.unit.conftest import MockActivity, make_group
 
 
-@patch("application.commands.frequency.sync_all_activities")
+@patch("application.commands.frequency.ensure_fresh")
+@patch("application.commands.frequency.StravaDailyRollup")
+def test_handle_frequency_command_uses_aggregation(mock_rollup_repo, mock_ensure_fresh):
+    mock_rollup_repo.return_value.count_active_days.return_value = [(1, 2), (2, 1)]
+
+    result = handle_frequency_command(123, datetime(2025, 8, 1), datetime(2025, 9, 1))
+
+    assert result == [(1, 2), (2, 1)]
+    mock_rollup_repo.return_value.count_active_days.assert_called_once_with(123, datetime(2025, 8, 1), datetime(2025, 9, 1))
+
+
+@patch("application.commands.frequency.ensure_fresh")
 @patch("application.commands.frequency.StravaActivity")
-def test_handle_frequency_command_returns_sorted_list(mock_activity_repo, mock_sync):
+@patch("application.commands.frequency.StravaDailyRollup")
+def test_handle_frequency_command_falls_back_to_memory(mock_rollup_repo, mock_activity_repo, mock_ensure_fresh):
+    mock_rollup_repo.return_value.count_active_days.side_effect = OperationFailure("$group não suportado")
     mock_activity_repo.return_value.get_activities.return_value = [
         MockActivity(1, datetime(2025, 8, 1)),
         MockActivity(1, datetime(2025, 8, 2)),
@@ -24,16 +38,14 @@ def test_handle_frequency_command_returns_sorted_list(mock_activity_repo, mock_s
 
 
 @patch("application.commands.frequency.create_rank")
-@patch("application.commands.frequency.sync_all_activities")
-@patch("application.commands.frequency.StravaActivity")
+@patch("application.commands.frequency.ensure_fresh")
+@patch("application.commands.frequency.StravaDailyRollup")
 @patch("application.commands.frequency.StravaGroup")
 def test_handle_month_frequency_formats_days_over_current_day(
-    mock_group_repo, mock_activity_repo, mock_sync, mock_create_rank
+    mock_group_repo, mock_rollup_repo, mock_ensure_fresh, mock_create_rank
 ):
     mock_group_repo.return_value.get_group.return_value = make_group()
-    mock_activity_repo.return_value.get_activities.return_value = [
-        MockActivity(1, datetime(2025, 8, 1)),
-    ]
+    mock_rollup_repo.return_value.count_active_days.return_value = [(1, 1)]
     mock_create_rank.return_value = "formatted"
 
     handle_month_frequency_command(123)
@@ -44,12 +56,12 @@ def test_handle_month_frequency_formats_days_over_current_day(
     assert rank_data[0][1].endswith(f"/{now.day}")
 
 
-@patch("application.commands.frequency.sync_all_activities")
-@patch("application.commands.frequency.StravaActivity")
+@patch("application.commands.frequency.ensure_fresh")
+@patch("application.commands.frequency.StravaDailyRollup")
 @patch("application.commands.frequency.StravaGroup")
-def test_handle_month_frequency_no_activities(mock_group_repo, mock_activity_repo, mock_sync):
+def test_handle_month_frequency_no_activities(mock_group_repo, mock_rollup_repo, mock_ensure_fresh):
     mock_group_repo.return_value.get_group.return_value = make_group()
-    mock_activity_repo.return_value.get_activities.return_value = []
+    mock_rollup_repo.return_value.count_active_days.return_value = []
 
     result = handle_month_frequency_command(123)
 
@@ -57,16 +69,14 @@ def test_handle_month_frequency_no_activities(mock_group_repo, mock_activity_rep
 
 
 @patch("application.commands.frequency.create_rank")
-@patch("application.commands.frequency.sync_all_activities")
-@patch("application.commands.frequency.StravaActivity")
+@patch("application.commands.frequency.ensure_fresh")
+@patch("application.commands.frequency.StravaDailyRollup")
 @patch("application.commands.frequency.StravaGroup")
 def test_handle_year_frequency_formats_days_over_year_day(
-    mock_group_repo, mock_activity_repo, mock_sync, mock_create_rank
+    mock_group_repo, mock_rollup_repo, mock_ensure_fresh, mock_create_rank
 ):
     mock_group_repo.return_value.get_group.return_value = make_group()
-    mock_activity_repo.return_value.get_activities.return_value = [
-        MockActivity(1, datetime(2025, 8, 1)),
-    ]
+    mock_rollup_repo.return_value.count_active_days.return_value = [(1, 1)]
     mock_create_rank.return_value = "formatted"
 
     handle_year_frequency_command(123)
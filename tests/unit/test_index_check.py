@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from infrastructure.mongo import index_check
+from infrastructure.mongo.index_check import IndexCheckError, check_indexes, uses_collscan
+
+
+def _explain(winning_plan):
+    return {"queryPlanner": {"winningPlan": winning_plan}}
+
+
+IXSCAN_PLAN = _explain({"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "group_id_1"}})
+COLLSCAN_PLAN = _explain({"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}})
+
+
+def _query(explain):
+    return lambda: MagicMock(**{"explain.return_value": explain})
+
+
+def test_uses_collscan_walks_nested_stages():
+    assert not uses_collscan(IXSCAN_PLAN)
+    assert uses_collscan(COLLSCAN_PLAN)
+    assert uses_collscan(_explain({"queryPlan": {"stage": "OR", "inputStages": [{"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}}))
+
+
+@patch.object(index_check, "ensure_indexes")
+def test_check_indexes_passes_when_every_query_uses_an_index(mock_ensure):
+    with patch.dict(index_check.QUERIES, {"a": _query(IXSCAN_PLAN), "b": _query(IXSCAN_PLAN)}, clear=True):
+        check_indexes()
+
+    mock_ensure.assert_called_once()
+
+
+@patch.object(index_check, "ensure_indexes")
+def test_check_indexes_fails_on_collscan(mock_ensure):
+    with patch.dict(index_check.QUERIES, {"ok": _query(IXSCAN_PLAN), "lenta": _query(COLLSCAN_PLAN)}, clear=True):
+        with pytest.raises(IndexCheckError, match="lenta"):
+            check_indexes(create_missing=False)
+
+    mock_ensure.assert_not_called()
+
+
+def test_every_repository_query_builds_a_queryset():
+    mongomock = pytest.importorskip("mongomock")
+    from mongoengine import connect, disconnect
+
+    connect("strava_bot_test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+    try:
+        for name, build_query in index_check.QUERIES.items():
+            assert hasattr(build_query(), "explain"), name
+    finally:
+        disconnect()
@@ -1,10 +1,11 @@
 from unittest.mock import MagicMock
-from domain.services.medal_service import MedalService
+from domain.services.medal_service import MedalService, build_medal_summary
 
 
 def _make_group(medalhas):
     group = MagicMock()
     group.medalhas = medalhas
+    group.medal_summary = {}
     return group
 
 
@@ -70,3 +71,25 @@ def test_medal_only_user_in_result():
     })
     result = MedalService(group).calculate()
     assert list(result.keys()) == ["Joao"]
+
+
+def test_build_medal_summary_counts_per_user_and_sport():
+    summary = build_medal_summary({
+        "2025-01": {"Run": {"Joao": 1, "Maria": 2}, "Ride": {"Joao": 3}},
+        "2025-02": {"Run": {"Joao": 1}},
+    })
+    assert summary["Joao"] == {
+        "total": {"1": 2, "2": 0, "3": 1, "points": 7},
+        "sports": {"Run": {"1": 2, "2": 0, "3": 0}, "Ride": {"1": 0, "2": 0, "3": 1}},
+    }
+    assert summary["Maria"]["total"]["points"] == 2
+
+
+def test_medal_service_reads_stored_summary_without_history():
+    group = _make_group({})
+    group.medal_summary = build_medal_summary({"2025-01": {"Run": {"Joao": 2, "Maria": 1}}})
+
+    result = MedalService(group).calculate()
+
+    assert list(result) == ["Maria", "Joao"]
+    assert result["Joao"] == {1: 0, 2: 1, 3: 0, "points": 2}
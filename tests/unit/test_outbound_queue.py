@@ -0,0 +1,192 @@
+import asyncio
+import pytest
+import threading
+from unittest.mock import MagicMock
+
+from telebot.apihelper import ApiTelegramException
+
+from adapters.telegram.outbound_queue import (
+    PRIORITY_BROADCAST,
+    PRIORITY_INTERACTIVE,
+    AsyncOutboundQueue,
+    OutboundMessage,
+    OutboundQueue,
+    OutboundScheduler,
+    retry_after,
+)
+from adapters.telegram.update_dispatcher import DispatchingTeleBot
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _too_many_requests(seconds):
+    return ApiTelegramException("sendMessage", None, {"error_code": 429, "description": "Too Many Requests", "parameters": {"retry_after": seconds}})
+
+
+def _scheduler(**kwargs):
+    clock = FakeClock()
+    return OutboundScheduler(clock=clock, **kwargs), clock
+
+
+def _put(scheduler, chat_id, label, priority=PRIORITY_INTERACTIVE):
+    message = OutboundMessage(chat_id, label, priority, scheduler.clock())
+    scheduler.put(message)
+    return message
+
+
+def _drain(scheduler, now):
+    """Envia (e conclui) tudo o que pode sair no instante now."""
+    sent = []
+    while True:
+        message, _ = scheduler.next_ready(now)
+        if message is None:
+            return sent
+        scheduler.finished(message, now)
+        sent.append(message.call)
+
+
+def test_retry_after_reads_429_parameters_only():
+    assert retry_after(_too_many_requests(7)) == 7
+    assert retry_after(ApiTelegramException("sendMessage", None, {"error_code": 400, "description": "Bad Request"})) is None
+    assert retry_after(RuntimeError("falhou")) is None
+
+
+def test_chat_bucket_limits_burst_and_refills():
+    scheduler, _ = _scheduler(chat_rate=1, chat_burst=2)
+    for seq in range(4):
+        _put(scheduler, "grupo", seq)
+
+    assert _drain(scheduler, 0) == [0, 1]
+    assert scheduler.next_ready(0) == (None, 1)
+    assert _drain(scheduler, 1) == [2]
+    assert _drain(scheduler, 2) == [3]
+
+
+def test_global_bucket_limits_across_chats():
+    scheduler, _ = _scheduler(global_rate=2, global_burst=3)
+    for chat_id in range(5):
+        _put(scheduler, chat_id, chat_id)
+
+    assert _drain(scheduler, 0) == [0, 1, 2]
+    assert scheduler.next_ready(0) == (None, 0.5)
+    assert _drain(scheduler, 0.5) == [3]
+
+
+def test_interactive_lane_goes_ahead_of_broadcasts_and_chats_round_robin():
+    scheduler, _ = _scheduler()
+    for seq in range(2):
+        _put(scheduler, "a", f"aviso-a{seq}", PRIORITY_BROADCAST)
+        _put(scheduler, "b", f"aviso-b{seq}", PRIORITY_BROADCAST)
+    _put(scheduler, "c", "rank")
+
+    assert _drain(scheduler, 0) == ["rank", "aviso-a0", "aviso-b0", "aviso-a1", "aviso-b1"]
+
+
+def test_chat_in_flight_keeps_its_order():
+    scheduler, _ = _scheduler()
+    first = _put(scheduler, "grupo", "placeholder")
+    _put(scheduler, "grupo", "ranking")
+    _put(scheduler, "outro", "medalhas")
+
+    assert scheduler.next_ready(0)[0] is first
+    assert scheduler.next_ready(0)[0].call == "medalhas"
+    assert scheduler.next_ready(0) == (None, None)
+    scheduler.finished(first, 0)
+    assert scheduler.next_ready(0)[0].call == "ranking"
+
+
+def test_429_pauses_chat_and_retries_message_first():
+    scheduler, _ = _scheduler()
+    first = _put(scheduler, "grupo", "primeira")
+    _put(scheduler, "grupo", "segunda")
+    _put(scheduler, "outro", "outra")
+
+    assert scheduler.next_ready(0)[0] is first
+    assert scheduler.finished(first, 0, _too_many_requests(3)) is True
+
+    assert _drain(scheduler, 1) == ["outra"]
+    assert scheduler.next_ready(1) == (None, 2)
+    assert _drain(scheduler, 3) == ["primeira", "segunda"]
+    assert first.attempts == 2
+    assert scheduler.stats()["retried"] == 1
+
+
+def test_429_gives_up_after_max_retries():
+    scheduler, _ = _scheduler(max_retries=1)
+    message = _put(scheduler, "grupo", "mensagem")
+
+    scheduler.next_ready(0)
+    assert scheduler.finished(message, 0, _too_many_requests(1)) is True
+    scheduler.next_ready(1)
+    assert scheduler.finished(message, 1, _too_many_requests(1)) is False
+    assert scheduler.stats()["failed"] == 1
+
+
+def test_stats_report_queue_latency_per_lane():
+    scheduler, clock = _scheduler(chat_rate=1, chat_burst=1)
+    for seq in range(3):
+        _put(scheduler, "grupo", seq, PRIORITY_BROADCAST)
+
+    _drain(scheduler, 0)
+    _drain(scheduler, 1)
+    clock.now = 2
+    stats = scheduler.stats()
+
+    assert stats["sent"] == 2
+    assert stats["broadcast"] == {"queued": 1, "latency_p50": 1, "latency_p95": 1, "latency_max": 1}
+    assert stats["interactive"]["latency_max"] == 0.0
+
+
+def test_outbound_queue_sends_on_sender_threads_and_retries_429():
+    queue = OutboundQueue(OutboundScheduler(max_retries=2), senders=2)
+    calls = []
+
+    def send():
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            raise _too_many_requests(0)
+        return "message"
+
+    assert queue.call(-100, send) == "message"
+    assert len(calls) == 2 and all(name.startswith("telegram-send") for name in calls)
+    with pytest.raises(RuntimeError):
+        queue.call(-100, MagicMock(side_effect=RuntimeError("falhou")))
+    assert queue.stats()["sent"] == 1 and queue.stats()["failed"] == 1
+    queue.shutdown()
+
+
+def test_async_outbound_queue_awaits_send_and_retries_429():
+    async def main():
+        queue = AsyncOutboundQueue(OutboundScheduler())
+        attempts = []
+
+        async def send():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise _too_many_requests(0)
+            return "message"
+
+        assert await queue.call(-100, send) == "message"
+        assert len(attempts) == 2
+        await queue.shutdown()
+
+    asyncio.run(main())
+
+
+def test_bot_sends_through_outbound_queue():
+    outbound = MagicMock()
+    bot = DispatchingTeleBot("123:abc", outbound=outbound)
+
+    bot.send_message(-100, "ranking", parse_mode="HTML")
+    bot.queue_message(-200, "aviso")
+
+    assert outbound.call.call_args.args[0] == -100
+    assert outbound.call.call_args.args[2] == PRIORITY_INTERACTIVE
+    assert outbound.submit.call_args.args[0] == -200
+    assert outbound.submit.call_args.args[2] == PRIORITY_BROADCAST
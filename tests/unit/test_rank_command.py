@@ -1,13 +1,20 @@
-from unittest.mock import patch, MagicMock
+import asyncio
+from unittest.mock import AsyncMock, patch, MagicMock
 from datetime import datetime
+from pymongo.errors import OperationFailure
+from application.response_cache import default_response_cache
 from application.commands.rank import (
     convert_rank_to_km,
     convert_rank_to_hour_minute_seconds,
     convert_rank,
     handle_rank_command,
+    handle_rank_command_async,
+    handle_rank_menu,
+    handle_rank_menu_async,
     handle_rank_month_command,
     handle_rank_year_command,
 )
+from domain.services.rank_service import RankService
 from tests.unit.conftest import MockActivity, make_group
 
 
@@ -32,12 +39,12 @@ def test_convert_rank_dispatches_time():
     assert convert_rank(3600, "moving_time") == "1:0:0"
 
 
-@patch("application.commands.rank.sync_all_activities")
-@patch("application.commands.rank.StravaActivity")
+@patch("application.commands.rank.ensure_fresh")
+@patch("application.commands.rank.StravaDailyRollup")
 @patch("application.commands.rank.StravaGroup")
-def test_handle_rank_command_no_activities(mock_group_repo, mock_activity_repo, mock_sync):
+def test_handle_rank_command_no_activities(mock_group_repo, mock_rollup_repo, mock_ensure_fresh):
     mock_group_repo.return_value.get_group.return_value = make_group()
-    mock_activity_repo.return_value.get_activities.return_value = []
+    mock_rollup_repo.return_value.sum_by_athlete.return_value = []
 
     result = handle_rank_command(123, "Run", datetime(2025, 8, 1), datetime(2025, 9, 1))
 
@@ -45,21 +52,52 @@ def test_handle_rank_command_no_activities(mock_group_repo, mock_activity_repo,
 
 
 @patch("application.commands.rank.create_rank")
-@patch("application.commands.rank.sync_all_activities")
+@patch("application.commands.rank.ensure_fresh")
 @patch("application.commands.rank.StravaActivity")
+@patch("application.commands.rank.StravaDailyRollup")
 @patch("application.commands.rank.StravaGroup")
-def test_handle_rank_command_with_activities(mock_group_repo, mock_activity_repo, mock_sync, mock_create_rank):
+def test_handle_rank_command_with_activities(mock_group_repo, mock_rollup_repo, mock_activity_repo, mock_ensure_fresh, mock_create_rank):
     group = make_group()
     mock_group_repo.return_value.get_group.return_value = group
+    mock_rollup_repo.return_value.sum_by_athlete.return_value = [(1, 10000)]
+    mock_create_rank.return_value = "formatted_rank"
+
+    result = handle_rank_command(123, "Run", datetime(2025, 8, 1), datetime(2025, 9, 1))
+
+    assert result == "formatted_rank"
+    mock_rollup_repo.return_value.sum_by_athlete.assert_called_once_with(
+        123, datetime(2025, 8, 1), datetime(2025, 9, 1), "Run", "distance"
+    )
+    mock_activity_repo.return_value.get_activities.assert_not_called()
+    assert mock_create_rank.call_args.args[1] == [(1, "10.00km")]
+
+
+@patch("application.commands.rank.create_rank")
+@patch("application.commands.rank.ensure_fresh")
+@patch("application.commands.rank.StravaActivity")
+@patch("application.commands.rank.StravaDailyRollup")
+@patch("application.commands.rank.StravaGroup")
+def test_handle_rank_command_falls_back_to_memory(mock_group_repo, mock_rollup_repo, mock_activity_repo, mock_ensure_fresh, mock_create_rank):
+    mock_group_repo.return_value.get_group.return_value = make_group()
+    mock_rollup_repo.return_value.sum_by_athlete.side_effect = OperationFailure("$group não suportado")
     mock_activity_repo.return_value.get_activities.return_value = [
-        MockActivity(1, "2025-08-01T10:00:00", sport_type="Run", distance=10000),
+        MockActivity(1, "2025-08-01T10:00:00", sport_type="Yoga", moving_time=3600),
     ]
     mock_create_rank.return_value = "formatted_rank"
 
-    result = handle_rank_command(123, "Run", datetime(2025, 8, 1), datetime(2025, 9, 1))
+    result = handle_rank_command(123, "Yoga", datetime(2025, 8, 1), datetime(2025, 9, 1))
 
     assert result == "formatted_rank"
-    mock_create_rank.assert_called_once()
+    assert mock_activity_repo.return_value.get_activities.call_args.kwargs["fields"] == RankService.FIELDS
+    assert mock_create_rank.call_args.args[1] == [(1, "1:0:0")]
+
+
+@patch("application.commands.rank.ensure_fresh")
+@patch("application.commands.rank.StravaDailyRollup")
+def test_handle_rank_menu_reads_sports_from_rollups(mock_rollup_repo, mock_ensure_fresh):
+    mock_rollup_repo.return_value.list_sports.return_value = ["Run", "Ride"]
+
+    assert handle_rank_menu(123, datetime(2025, 8, 1), datetime(2025, 9, 1)) == ["Run", "Ride"]
 
 
 @patch("application.commands.rank.handle_rank_command")
@@ -84,3 +122,124 @@ def test_handle_rank_year_command_calls_with_correct_dates(mock_handle):
 
     args = mock_handle.call_args[0]
     assert args[2] == datetime(now.year, 1, 1)
+
+
+@patch("application.commands.rank.create_rank")
+@patch("application.commands.rank.ensure_fresh")
+@patch("application.commands.rank.StravaDailyRollup")
+@patch("application.commands.rank.StravaGroup")
+def test_handle_rank_command_serves_repeats_from_cache(mock_group_repo, mock_rollup_repo, mock_ensure_fresh, mock_create_rank):
+    mock_group_repo.return_value.get_group.return_value = make_group()
+    mock_rollup_repo.return_value.sum_by_athlete.return_value = [(1, 5000.0)]
+    mock_create_rank.side_effect = ["primeiro", "depois do bump"]
+    start, end = datetime(2025, 8, 1), datetime(2025, 9, 1)
+
+    assert handle_rank_command(123, "Run", start, end) == "primeiro"
+    mock_group_repo.reset_mock()
+    mock_rollup_repo.reset_mock()
+    assert handle_rank_command(123, "Run", start, end) == "primeiro"
+    mock_group_repo.assert_not_called()
+    mock_rollup_repo.assert_not_called()
+    # o acerto no cache ainda marca o grupo como ativo e respeita a defasagem máxima
+    assert mock_ensure_fresh.call_count == 2
+
+    default_response_cache.bump(123)
+    assert handle_rank_command(123, "Run", start, end) == "depois do bump"
+
+
+@patch("application.sync_activities.StravaGroup")
+@patch("application.commands.rank.create_rank")
+@patch("application.commands.rank.StravaDailyRollup")
+@patch("application.commands.rank.StravaGroup")
+def test_handle_rank_command_cache_hit_does_not_touch_mongo(mock_group_repo, mock_rollup_repo, mock_create_rank, mock_sync_group_repo):
+    mock_sync_group_repo.return_value.get_group.return_value = make_group(last_sync=datetime.now())
+    mock_group_repo.return_value.get_group.return_value = make_group()
+    mock_rollup_repo.return_value.sum_by_athlete.return_value = [(1, 5000.0)]
+    mock_create_rank.return_value = "ranking"
+    start, end = datetime(2025, 8, 1), datetime(2025, 9, 1)
+
+    # primeira chamada: sem carimbo de sync, lê o grupo uma vez e renderiza
+    assert handle_rank_command(123, "Run", start, end) == "ranking"
+    assert mock_sync_group_repo.return_value.get_group.call_count == 1
+
+    for repo in (mock_sync_group_repo, mock_group_repo, mock_rollup_repo):
+        repo.reset_mock()
+    assert handle_rank_command(123, "Run", start, end) == "ranking"
+    assert mock_sync_group_repo.mock_calls == mock_group_repo.mock_calls == mock_rollup_repo.mock_calls == []
+
+
+@patch("application.async_sync.default_scheduler")
+@patch("application.commands.rank.create_rank")
+def test_handle_rank_command_async_cache_hit_does_not_touch_mongo(mock_create_rank, mock_scheduler):
+    from application.async_sync import AsyncSyncer
+
+    repository = _async_repository(make_group(last_sync=datetime.now()), [(1, 5000.0)])
+    syncer = AsyncSyncer(MagicMock(), repository)
+    mock_create_rank.return_value = "ranking"
+    start, end = datetime(2025, 8, 1), datetime(2025, 9, 1)
+
+    assert asyncio.run(handle_rank_command_async(repository, syncer, 123, "Run", start, end)) == "ranking"
+    repository.reset_mock()
+    assert asyncio.run(handle_rank_command_async(repository, syncer, 123, "Run", start, end)) == "ranking"
+
+    assert repository.mock_calls == []
+    assert mock_scheduler.touch.call_count == 2
+
+
+def _async_repository(group, totals=None):
+    repository = MagicMock()
+    repository.get_group = AsyncMock(return_value=group)
+    repository.sum_by_athlete = AsyncMock(return_value=totals or [])
+    repository.list_sports = AsyncMock(return_value=["Run", "Ride"])
+    repository.get_activities = AsyncMock(return_value=[])
+    return repository
+
+
+@patch("application.commands.rank.create_rank")
+def test_handle_rank_command_async_shares_cache_with_threaded_handler(mock_create_rank):
+    group = make_group()
+    repository = _async_repository(group, [(1, 5000.0)])
+    syncer = MagicMock()
+    syncer.ensure_fresh = AsyncMock()
+    mock_create_rank.return_value = "ranking"
+    start, end = datetime(2025, 8, 1), datetime(2025, 9, 1)
+
+    assert asyncio.run(handle_rank_command_async(repository, syncer, 123, "Run", start, end)) == "ranking"
+    syncer.ensure_fresh.assert_awaited_once_with(123)
+    repository.get_group.assert_awaited_once_with(123)
+    repository.sum_by_athlete.assert_awaited_once_with(123, start, end, "Run", "distance")
+    assert mock_create_rank.call_args.args[1] == [(1, "5.00km")]
+
+    with patch("application.commands.rank.StravaGroup") as mock_group_repo, \
+         patch("application.commands.rank.ensure_fresh") as mock_ensure_fresh:
+        assert handle_rank_command(123, "Run", start, end) == "ranking"
+        mock_group_repo.assert_not_called()
+        mock_ensure_fresh.assert_called_once_with(123)
+
+    assert asyncio.run(handle_rank_command_async(repository, syncer, 123, "Run", start, end)) == "ranking"
+    assert syncer.ensure_fresh.await_count == 2
+
+
+@patch("application.commands.rank.create_rank")
+def test_handle_rank_command_async_falls_back_to_memory(mock_create_rank):
+    repository = _async_repository(make_group())
+    repository.sum_by_athlete.side_effect = OperationFailure("$group not allowed")
+    repository.get_activities.return_value = [{"athlete": {"id": 1}, "sport_type": "Run", "distance": 3000.0}]
+    syncer = MagicMock()
+    syncer.ensure_fresh = AsyncMock()
+
+    asyncio.run(handle_rank_command_async(repository, syncer, 123, "Run", datetime(2025, 8, 1), datetime(2025, 9, 1)))
+
+    assert repository.get_activities.await_args.kwargs["fields"] == RankService.FIELDS
+    assert mock_create_rank.call_args.args[1] == [(1, "3.00km")]
+
+
+def test_handle_rank_menu_async_reads_sports_from_rollups():
+    group = make_group()
+    repository = _async_repository(group)
+    syncer = MagicMock()
+    syncer.ensure_fresh = AsyncMock()
+
+    assert asyncio.run(handle_rank_menu_async(repository, syncer, 123, datetime(2025, 8, 1), datetime(2025, 9, 1))) == ["Run", "Ride"]
+    syncer.ensure_fresh.assert_awaited_once_with(123)
+    repository.get_group.assert_not_awaited()
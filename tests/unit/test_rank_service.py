@@ -67,3 +67,12 @@ def test_list_sports():
     activities = _make_activities()
     sports = RankService(activities).list_sports()
     assert set(sports) == {"Run", "Ride"}
+
+
+def test_rank_accepts_projected_dicts():
+    activities = [
+        {"athlete": {"id": 1}, "sport_type": "Run", "distance": 3000.0},
+        {"athlete": {"id": 1}, "sport_type": "Run"},
+        {"athlete": {"id": 2}, "sport_type": "Run", "distance": 1000.0},
+    ]
+    assert RankService(activities).calculate("Run") == [(1, 3000.0), (2, 1000.0)]
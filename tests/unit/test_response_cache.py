@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock
+from application.response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_or_render_renders_once_until_bump():
+    cache = ResponseCache()
+    render = MagicMock(side_effect=["v1", "v2"])
+
+    assert cache.get_or_render(1, "rank", render, sport_type="Run", period="2025-08") == "v1"
+    assert cache.get_or_render(1, "rank", render, sport_type="Run", period="2025-08") == "v1"
+    cache.bump(2)
+    assert cache.get_or_render(1, "rank", render, sport_type="Run", period="2025-08") == "v1"
+    cache.bump(1)
+    assert cache.get_or_render(1, "rank", render, sport_type="Run", period="2025-08") == "v2"
+
+    assert render.call_count == 2
+    assert cache.stats() == {"entries": 1, "hits": 2, "misses": 2, "evictions": 0, "hit_rate": 0.5}
+
+
+def test_keys_include_command_sport_and_period():
+    cache = ResponseCache()
+
+    cache.get_or_render(1, "rank", lambda: "run", sport_type="Run", period="2025-08")
+    cache.get_or_render(1, "rank", lambda: "ride", sport_type="Ride", period="2025-08")
+    cache.get_or_render(1, "rank", lambda: "year", sport_type="Run", period="2025")
+    cache.get_or_render(1, "streak", lambda: "streak")
+
+    assert cache.stats()["entries"] == 4
+    assert cache.get((1, "rank", "Ride", "2025-08")) == "ride"
+
+
+def test_bump_during_render_keeps_entry_stale():
+    cache = ResponseCache()
+
+    def render():
+        cache.bump(1)
+        return "renderizado com dados antigos"
+
+    cache.get_or_render(1, "medalhas", render)
+
+    assert cache.get((1, "medalhas", None, None)) is None
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put((1, "rank", None, None), "a", 0)
+    cache.put((2, "rank", None, None), "b", 0)
+    cache.get((1, "rank", None, None))
+    cache.put((3, "rank", None, None), "c", 0)
+
+    assert cache.get((2, "rank", None, None)) is None
+    assert cache.get((1, "rank", None, None)) == "a"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(ttl_seconds=60, clock=clock)
+    cache.put((1, "streak", None, None), "a", 0)
+
+    clock.now = 59
+    assert cache.get((1, "streak", None, None)) == "a"
+    clock.now = 121
+    assert cache.get((1, "streak", None, None)) is None
@@ -1,6 +1,6 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from shared.rank import create_rank, get_user_link, get_medalhas
-from tests.unit.conftest import make_group
+from shared.user import MemberDirectory
 
 MEMBROS = {
     "Joao": {"athlete_id": 1, "access_token": "t", "refresh_token": "r", "last_activity_date": None},
@@ -13,6 +13,7 @@ def _group_with_medalhas(medalhas):
     group = MagicMock()
     group.membros = MEMBROS
     group.medalhas = medalhas
+    group.medal_summary = {}
     return group
 
 
@@ -40,7 +41,7 @@ def test_create_rank_increments_position_after_tie():
 
 
 def test_get_user_link_contains_athlete_id():
-    link = get_user_link(1, MEMBROS)
+    link = get_user_link(1, MemberDirectory(MEMBROS))
     assert "strava.com/athletes/1" in link
     assert "Joao" in link
 
@@ -67,3 +68,20 @@ def test_get_medalhas_no_medals_for_user():
     group = _group_with_medalhas(medalhas)
     result = get_medalhas(1, group, sport_type="Run")
     assert result == ""
+
+
+def test_create_rank_builds_member_directory_once():
+    group = _group_with_medalhas({"2025-01": {"Run": {"Joao": 1}}})
+    with patch("shared.rank.MemberDirectory", wraps=MemberDirectory) as directory:
+        result = create_rank("Titulo", [(1, "10km"), (2, "8km"), (3, "5km")], group, sport_type="Run")
+
+    directory.assert_called_once_with(MEMBROS)
+    assert "Joao</a>🥇1 - 10km" in result
+
+
+def test_get_medalhas_reads_summary_instead_of_history():
+    group = _group_with_medalhas({})
+    group.medal_summary = {"Joao": {"total": {"1": 5, "2": 0, "3": 2, "points": 17}, "sports": {"Run": {"1": 5, "2": 0, "3": 2}}}}
+
+    assert get_medalhas(1, group, sport_type="Run") == "🥇5🥉2"
+    assert get_medalhas(1, group, sport_type="Ride") == ""
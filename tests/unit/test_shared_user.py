@@ -1,4 +1,4 @@
-from shared.user import get_user
+from shared.user import MemberDirectory, get_user
 
 MEMBROS = {
     "Joao": {"athlete_id": 1, "access_token": "t1", "refresh_token": "r1", "last_activity_date": None},
@@ -34,3 +34,33 @@ def test_get_user_no_params():
 def test_get_user_empty_membros():
     result = get_user({}, user_id=1)
     assert result == {}
+
+
+def test_member_directory_lookups():
+    directory = MemberDirectory(MEMBROS)
+    assert directory.get_user(user_id=2) == {"id": 2, "name": "Maria"}
+    assert directory.get_user(user_name="Joao") == {"id": 1, "name": "Joao"}
+    assert directory.get_member(1) == ("Joao", MEMBROS["Joao"])
+
+
+def test_member_directory_missing_member():
+    directory = MemberDirectory(MEMBROS)
+    assert directory.get_user(user_id=999) == {}
+    assert directory.get_user(user_name="Pedro") == {}
+    assert directory.get_user() == {}
+    assert directory.get_member(999) == (None, None)
+
+
+def test_member_directory_keeps_first_member_for_duplicated_athlete_id():
+    membros = {
+        "Joao": {"athlete_id": 1},
+        "Joao (conta antiga)": {"athlete_id": 1},
+    }
+    assert MemberDirectory(membros).get_user(user_id=1) == {"id": 1, "name": "Joao"}
+
+
+def test_member_directory_tolerates_legacy_member_without_athlete_id():
+    membros = {"Legado": {"access_token": "t"}, "Maria": {"athlete_id": 2}}
+    directory = MemberDirectory(membros)
+    assert directory.get_user(user_id=2) == {"id": 2, "name": "Maria"}
+    assert directory.get_user(user_id=None) == {}
@@ -0,0 +1,82 @@
+import threading
+import time
+import pytest
+from application.single_flight import SingleFlight
+
+
+def _run_concurrently(flight, key, fn, callers):
+    results = []
+    errors = []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "resultado"
+
+    leader, results, _ = _run_concurrently(flight, 1, work, 1)
+    started.wait(5)
+    followers, results_followers, _ = _run_concurrently(flight, 1, work, 4)
+    _wait_until(lambda: flight.coalesced == 4)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results + results_followers == ["resultado"] * 5
+    assert flight.coalesced == 4
+
+
+def test_error_is_shared_and_next_call_runs_again():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("Strava fora do ar")
+
+    leader, _, leader_errors = _run_concurrently(flight, 1, failing, 1)
+    started.wait(5)
+    followers, _, follower_errors = _run_concurrently(flight, 1, failing, 2)
+    _wait_until(lambda: flight.coalesced == 2)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert [str(e) for e in leader_errors + follower_errors] == ["Strava fora do ar"] * 3
+    assert flight.do(1, lambda: "ok") == "ok"
+
+
+def test_different_keys_do_not_wait_on_each_other():
+    flight = SingleFlight()
+
+    assert flight.do(1, lambda: flight.do(2, lambda: "aninhado")) == "aninhado"
+    with pytest.raises(ValueError):
+        flight.do(3, lambda: int("x"))
+    assert flight.coalesced == 0
@@ -0,0 +1,197 @@
+import pytest
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+from pymongo.errors import BulkWriteError
+from infrastructure.mongo.strava_activity import StravaActivity
+
+
+def _activity(activity_id, name="Corrida", **extra):
+    activity = {
+        "id": activity_id,
+        "name": name,
+        "type": "Run",
+        "sport_type": "Run",
+        "athlete": {"id": 1, "resource_state": 1},
+        "distance": 5000.0,
+        "start_date_local": "2025-01-01T12:00:00Z",
+        "map": {"id": "m1"},
+        "campo_novo_da_api": True,
+    }
+    activity.update(extra)
+    return activity
+
+
+def _collection(**bulk_api_result):
+    collection = MagicMock()
+    collection.bulk_write.return_value.bulk_api_result = bulk_api_result
+    return collection
+
+
+def test_normalize_does_not_mutate_input():
+    activity = _activity(1)
+
+    document = StravaActivity().normalize(123, activity)
+
+    assert activity["id"] == 1 and "activity_id" not in activity
+    assert document["activity_id"] == 1
+    assert document["group_id"] == 123
+    assert document["activity_type"] == "Run"
+    assert document["activity_map"] == {"id": "m1"}
+    assert document["start_date_local"] == datetime(2025, 1, 1, 12, 0, 0)
+    assert "campo_novo_da_api" not in document
+
+
+def _stored(activity_id, distance=5000.0, sport_type="Run"):
+    return {
+        "activity_id": activity_id, "athlete": {"id": 1}, "sport_type": sport_type,
+        "start_date_local": datetime(2025, 1, 1, 12), "distance": distance,
+    }
+
+
+@patch("infrastructure.mongo.strava_activity.StravaDailyRollup")
+@patch.object(StravaActivity, "_get_collection")
+def test_save_activities_sends_one_unordered_bulk_write(mock_collection, mock_rollup):
+    mock_collection.return_value = _collection(
+        nUpserted=2, nMatched=0, nModified=0, upserted=[{"index": 0, "_id": "a"}, {"index": 1, "_id": "b"}]
+    )
+
+    counts = StravaActivity().save_activities(123, [_activity(1), _activity(2), _activity(2), _activity(3, flagged=True)])
+
+    mock_collection.return_value.bulk_write.assert_called_once()
+    operations = mock_collection.return_value.bulk_write.call_args.args[0]
+    assert mock_collection.return_value.bulk_write.call_args.kwargs["ordered"] is False
+    assert [op._filter for op in operations] == [
+        {"group_id": 123, "activity_id": 1},
+        {"group_id": 123, "activity_id": 2},
+    ]
+    assert all(op._upsert and "$setOnInsert" in op._doc for op in operations)
+    mock_collection.return_value.find_one_and_update.assert_not_called()
+    assert counts == {"inserted": 2, "updated": 0, "skipped": 1, "flagged": 1}
+
+
+@patch.object(StravaActivity, "_get_collection")
+def test_save_activities_counts_unchanged_as_skipped(mock_collection):
+    mock_collection.return_value = _collection(nUpserted=0, nMatched=2, nModified=1)
+    mock_collection.return_value.find.return_value = [_stored(1), _stored(2)]
+
+    counts = StravaActivity().save_activities(123, [_activity(1), _activity(2, name="Corrida editada")])
+
+    operations = mock_collection.return_value.bulk_write.call_args.args[0]
+    assert not any(op._upsert for op in operations)
+    assert all("distance" not in op._doc["$set"] and "name" in op._doc["$set"] for op in operations)
+    assert counts == {"inserted": 0, "updated": 1, "skipped": 1, "flagged": 0}
+
+
+@patch("infrastructure.mongo.strava_activity.StravaDailyRollup")
+@patch.object(StravaActivity, "_get_collection")
+def test_save_activities_rewrites_duplicate_key_with_find_one_and_update(mock_collection, mock_rollup):
+    mock_collection.return_value.bulk_write.side_effect = BulkWriteError({
+        "writeErrors": [{"code": 11000, "index": 0}],
+        "nUpserted": 1, "nMatched": 0, "nModified": 0, "upserted": [{"index": 1, "_id": "b"}],
+    })
+    mock_collection.return_value.find_one_and_update.return_value = _stored(1)
+
+    counts = StravaActivity().save_activities(123, [_activity(1), _activity(2)])
+
+    call = mock_collection.return_value.find_one_and_update.call_args
+    assert call.args[0] == {"group_id": 123, "activity_id": 1}
+    assert call.kwargs["upsert"] is True
+    assert counts == {"inserted": 1, "updated": 0, "skipped": 1, "flagged": 0}
+
+
+@patch.object(StravaActivity, "_get_collection")
+def test_save_activities_raises_other_write_errors(mock_collection):
+    mock_collection.return_value.bulk_write.side_effect = BulkWriteError({
+        "writeErrors": [{"code": 121, "index": 0}],
+    })
+
+    with pytest.raises(BulkWriteError):
+        StravaActivity().save_activities(123, [_activity(1)])
+
+
+@patch.object(StravaActivity, "_get_collection")
+def test_save_activities_skips_bulk_write_when_everything_is_flagged(mock_collection):
+    counts = StravaActivity().save_activities(123, [_activity(1, flagged=True)])
+
+    mock_collection.return_value.bulk_write.assert_not_called()
+    assert counts["flagged"] == 1
+
+
+@patch("infrastructure.mongo.strava_activity.StravaDailyRollup")
+@patch.object(StravaActivity, "_get_collection")
+def test_save_activities_feeds_rollup_with_inserted_and_changed(mock_collection, mock_rollup):
+    mock_collection.return_value = _collection(
+        nUpserted=1, nMatched=1, nModified=0, upserted=[{"index": 0, "_id": "x"}]
+    )
+    mock_collection.return_value.find.return_value = [_stored(2), _stored(3, distance=4000.0)]
+    mock_collection.return_value.find_one_and_update.return_value = _stored(3, distance=4000.0)
+
+    StravaActivity().save_activities(123, [_activity(1), _activity(2), _activity(3, sport_type="Walk")])
+
+    apply_calls = mock_rollup.return_value.apply.call_args_list
+    removed = apply_calls[0]
+    added = apply_calls[1]
+    assert removed.kwargs["sign"] == -1
+    assert [activity["activity_id"] for activity in removed.args[1]] == [3]
+    assert [activity["activity_id"] for activity in added.args[1]] == [1, 3]
+    assert added.args[1][1]["sport_type"] == "Walk"
+
+
+@patch("infrastructure.mongo.strava_activity.StravaDailyRollup")
+@patch.object(StravaActivity, "_get_collection")
+def test_save_activities_takes_delta_from_the_replaced_document(mock_collection, mock_rollup):
+    # outro sync já gravou a edição entre a leitura de previous e a gravação
+    mock_collection.return_value.find.return_value = [_stored(3, distance=4000.0)]
+    mock_collection.return_value.find_one_and_update.return_value = _stored(3, sport_type="Walk")
+
+    counts = StravaActivity().save_activities(123, [_activity(3, sport_type="Walk")])
+
+    removed, added = mock_rollup.return_value.apply.call_args_list
+    assert removed.args[1] == [] and added.args[1] == []
+    assert counts["skipped"] == 1
+
+
+@patch("infrastructure.mongo.strava_activity.StravaDailyRollup")
+@patch.object(StravaActivity, "_get_collection")
+def test_remove_activity_decrements_rollup(mock_collection, mock_rollup):
+    removed = {"athlete": {"id": 1}, "sport_type": "Run", "start_date_local": datetime(2025, 1, 1, 12)}
+    mock_collection.return_value.find_one_and_delete.return_value = removed
+
+    StravaActivity().remove_activity(123, 1)
+
+    mock_rollup.return_value.apply.assert_called_once_with(123, [removed], sign=-1)
+
+
+@patch("infrastructure.mongo.strava_activity.StravaDailyRollup")
+@patch.object(StravaActivity, "_get_collection")
+def test_remove_unknown_activity_leaves_rollup(mock_collection, mock_rollup):
+    mock_collection.return_value.find_one_and_delete.return_value = None
+
+    StravaActivity().remove_activity(123, 1)
+
+    mock_rollup.return_value.apply.assert_not_called()
+
+
+def test_unique_index_on_group_and_activity():
+    assert {"fields": ["group_id", "activity_id"], "unique": True} in StravaActivity._meta["indexes"]
+
+
+def test_get_activities_with_fields_returns_projected_dicts():
+    mongomock = pytest.importorskip("mongomock")
+    from mongoengine import connect, disconnect
+
+    connect("strava_bot_test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+    try:
+        StravaActivity(
+            group_id=123, activity_id=1, athlete={"id": 7}, sport_type="Run", distance=5000.0,
+            start_date_local=datetime(2025, 1, 2), activity_map={"summary_polyline": "abc" * 1000}, laps=[{"lap": 1}],
+        ).save()
+
+        activities = list(StravaActivity().get_activities(
+            123, datetime(2025, 1, 1), datetime(2025, 2, 1), fields=("athlete.id", "sport_type", "distance")
+        ))
+    finally:
+        StravaActivity.drop_collection()
+        disconnect()
+
+    assert activities == [{"athlete": {"id": 7}, "sport_type": "Run", "distance": 5000.0}]
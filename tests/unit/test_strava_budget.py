@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+
+from adapters.strava_budget import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    SHORT_WINDOW_SECONDS,
+    HIGH_PRIORITY_TIMEOUT,
+    LOW_PRIORITY_TIMEOUT,
+    BudgetExhausted,
+    StravaBudget,
+    acquire_timeout,
+)
+from adapters.strava_transport import RateLimitState
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_acquire_consumes_headroom():
+    budget = StravaBudget(short_limit=10, daily_limit=100, clock=FakeClock())
+
+    budget.acquire(1)
+    budget.acquire(2)
+
+    assert budget.headroom() == {"short_remaining": 8, "daily_remaining": 98, "queued": 0}
+
+
+def test_short_window_resets():
+    clock = FakeClock()
+    budget = StravaBudget(short_limit=2, daily_limit=100, clock=clock)
+    budget.acquire(1)
+    budget.acquire(1)
+
+    clock.now += SHORT_WINDOW_SECONDS
+
+    assert budget.headroom()["short_remaining"] == 2
+    assert budget.headroom()["daily_remaining"] == 98
+
+
+def test_queues_when_exhausted_and_times_out():
+    budget = StravaBudget(short_limit=1, daily_limit=100, clock=FakeClock())
+    budget.acquire(1)
+
+    with pytest.raises(BudgetExhausted):
+        budget.acquire(1, timeout=0.01)
+
+    assert budget.headroom()["queued"] == 0
+
+
+def test_cancel_removes_queued_ticket():
+    budget = StravaBudget(short_limit=1, daily_limit=100, clock=FakeClock())
+    budget.acquire(1)
+    ticket = budget.submit(1)
+
+    budget.cancel(ticket)
+
+    assert budget.headroom()["queued"] == 0
+
+
+def test_acquire_timeout_is_short_for_high_priority_and_bounded_by_deadline():
+    assert acquire_timeout(PRIORITY_HIGH) == HIGH_PRIORITY_TIMEOUT
+    assert acquire_timeout(PRIORITY_LOW) == LOW_PRIORITY_TIMEOUT
+    assert 500 < acquire_timeout(PRIORITY_LOW, time.monotonic() + 540) <= 540
+    assert acquire_timeout(PRIORITY_HIGH, time.monotonic() + 540) == HIGH_PRIORITY_TIMEOUT
+    assert acquire_timeout(PRIORITY_HIGH, time.monotonic() - 1) == 0
+
+
+def test_weighted_round_robin_between_groups():
+    clock = FakeClock()
+    budget = StravaBudget(short_limit=1, daily_limit=100, clock=clock)
+    budget.acquire("busy")
+    budget.set_weight("busy", 2)
+    tickets = [budget.submit("busy") for _ in range(4)] + [budget.submit("quiet") for _ in range(2)]
+    assert not any(ticket.granted for ticket in tickets)
+
+    granted = []
+    for _ in range(6):
+        clock.now += SHORT_WINDOW_SECONDS
+        budget.tick()
+        granted += [ticket for ticket in tickets if ticket.granted and ticket not in granted]
+
+    assert [ticket.group_id for ticket in granted] == ["busy", "busy", "quiet", "busy", "busy", "quiet"]
+
+
+def test_low_priority_deferred_when_budget_low():
+    budget = StravaBudget(short_limit=10, daily_limit=100, low_priority_reserve=0.2, clock=FakeClock())
+    for _ in range(7):
+        budget.acquire(1)
+
+    backfill = budget.submit(2, PRIORITY_LOW)
+    assert backfill.granted
+
+    deferred = budget.submit(2, PRIORITY_LOW)
+    assert not deferred.granted
+
+    interactive = budget.submit(3, PRIORITY_HIGH)
+    assert interactive.granted
+    assert budget.headroom()["queued"] == 1
+
+
+def test_high_priority_served_before_low_in_same_group():
+    clock = FakeClock()
+    budget = StravaBudget(short_limit=1, daily_limit=100, low_priority_reserve=0, clock=clock)
+    budget.acquire(1)
+    low = budget.submit(1, PRIORITY_LOW)
+    high = budget.submit(1, PRIORITY_HIGH)
+
+    clock.now += SHORT_WINDOW_SECONDS
+    budget.tick()
+
+    assert high.granted
+    assert not low.granted
+
+
+def test_observe_reconciles_with_strava_usage():
+    budget = StravaBudget(short_limit=100, daily_limit=1000, clock=FakeClock())
+    state = RateLimitState()
+    state.update({"X-RateLimit-Limit": "200,2000", "X-RateLimit-Usage": "150,900"})
+
+    budget.observe(state)
+
+    assert budget.headroom()["short_remaining"] == 50
+    assert budget.headroom()["daily_remaining"] == 1100
+
+
+def test_blocked_waiter_is_released_after_window():
+    clock = FakeClock()
+    budget = StravaBudget(short_limit=1, daily_limit=100, clock=clock)
+    budget.acquire(1)
+    done = threading.Event()
+
+    waiter = threading.Thread(target=lambda: (budget.acquire(2, timeout=5), done.set()))
+    waiter.start()
+    assert not done.wait(0.05)
+
+    clock.now += SHORT_WINDOW_SECONDS
+    budget.tick()
+    waiter.join(2)
+
+    assert done.is_set()
@@ -1,7 +1,9 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 from datetime import datetime
 from requests import HTTPError
+import time
+from adapters.strava_budget import LOW_PRIORITY_TIMEOUT, PRIORITY_HIGH, PRIORITY_LOW
 from adapters.strava_client import StravaClient
 
 
@@ -16,11 +18,12 @@ def _mock_response(json_data, status_code=200, raise_for_status=None):
     return mock
 
 
-@patch("adapters.strava_client.requests.get")
-def test_fetch_activities_success(mock_get):
+def test_fetch_activities_success():
+    transport = MagicMock()
+    mock_get = transport.request
     mock_get.return_value = _mock_response([{"id": 1, "name": "Morning Run"}])
 
-    client = StravaClient()
+    client = StravaClient(transport=transport, budget=MagicMock())
     result = client.fetch_activities("valid_token", datetime(2025, 8, 1))
 
     assert result == [{"id": 1, "name": "Morning Run"}]
@@ -29,36 +32,40 @@ def test_fetch_activities_success(mock_get):
     assert call_kwargs[1]["headers"]["Authorization"] == "Bearer valid_token"
 
 
-@patch("adapters.strava_client.requests.get")
-def test_fetch_activities_passes_after_timestamp(mock_get):
+def test_fetch_activities_passes_after_timestamp():
+    transport = MagicMock()
+    mock_get = transport.request
     mock_get.return_value = _mock_response([])
     after = datetime(2025, 8, 1, 12, 0, 0)
 
-    StravaClient().fetch_activities("token", after)
+    StravaClient(transport=transport, budget=MagicMock()).fetch_activities("token", after)
 
     params = mock_get.call_args[1]["params"]
     assert params["after"] == int(after.timestamp())
-    assert params["per_page"] == 50
+    assert params["per_page"] == 200
+    assert params["page"] == 1
 
 
-@patch("adapters.strava_client.requests.get")
-def test_fetch_activities_raises_on_http_error(mock_get):
+def test_fetch_activities_raises_on_http_error():
+    transport = MagicMock()
+    mock_get = transport.request
     mock_get.return_value = _mock_response(
         {}, status_code=401, raise_for_status=HTTPError(response=MagicMock(status_code=401))
     )
 
     with pytest.raises(HTTPError):
-        StravaClient().fetch_activities("bad_token", datetime(2025, 8, 1))
+        StravaClient(transport=transport, budget=MagicMock()).fetch_activities("bad_token", datetime(2025, 8, 1))
 
 
-@patch("adapters.strava_client.requests.post")
-def test_refresh_access_token_success(mock_post):
+def test_refresh_access_token_success():
+    transport = MagicMock()
+    mock_post = transport.request
     mock_post.return_value = _mock_response({
         "access_token": "new_access",
         "refresh_token": "new_refresh",
     })
 
-    result = StravaClient().refresh_access_token("old_refresh")
+    result = StravaClient(transport=transport, budget=MagicMock()).refresh_access_token("old_refresh")
 
     assert result["access_token"] == "new_access"
     assert result["refresh_token"] == "new_refresh"
@@ -68,11 +75,47 @@ def test_refresh_access_token_success(mock_post):
     assert params["refresh_token"] == "old_refresh"
 
 
-@patch("adapters.strava_client.requests.post")
-def test_refresh_access_token_raises_on_error(mock_post):
+def test_refresh_access_token_raises_on_error():
+    transport = MagicMock()
+    mock_post = transport.request
     mock_post.return_value = _mock_response(
         {}, status_code=400, raise_for_status=HTTPError(response=MagicMock(status_code=400))
     )
 
     with pytest.raises(HTTPError):
-        StravaClient().refresh_access_token("bad_refresh")
+        StravaClient(transport=transport, budget=MagicMock()).refresh_access_token("bad_refresh")
+
+
+def test_rate_limit_exposes_transport_state():
+    transport = MagicMock()
+    assert StravaClient(transport=transport, budget=MagicMock()).rate_limit is transport.rate_limit
+
+
+def test_requests_reserve_budget_for_group():
+    transport = MagicMock()
+    transport.request.side_effect = lambda method, url, on_attempt, **kwargs: on_attempt() or _mock_response([])
+    budget = MagicMock()
+
+    StravaClient(transport=transport, budget=budget, group_id=123).fetch_activities(
+        "token", datetime(2025, 8, 1), priority=PRIORITY_LOW
+    )
+
+    budget.acquire.assert_called_once_with(123, PRIORITY_LOW, LOW_PRIORITY_TIMEOUT)
+
+
+def test_budget_wait_is_bounded_by_client_deadline():
+    transport = MagicMock()
+    transport.request.side_effect = lambda method, url, on_attempt, **kwargs: on_attempt() or _mock_response([])
+    budget = MagicMock()
+
+    StravaClient(transport=transport, budget=budget, deadline=time.monotonic() - 1).fetch_activities(
+        "token", datetime(2025, 8, 1), priority=PRIORITY_HIGH
+    )
+
+    assert budget.acquire.call_args.args[2] == 0
+    budget.observe.assert_called_once_with(transport.rate_limit)
+
+
+def test_default_transport_and_budget_are_shared():
+    assert StravaClient().transport is StravaClient().transport
+    assert StravaClient().budget is StravaClient().budget
@@ -0,0 +1,104 @@
+from datetime import datetime
+from unittest.mock import patch
+from infrastructure.mongo.strava_daily_rollup import StravaDailyRollup, rollup_key, rollup_values
+
+
+def _document(activity_id=1, athlete_id=7, sport_type="Run", start=datetime(2025, 8, 1, 18, 30), **values):
+    return {"activity_id": activity_id, "athlete": {"id": athlete_id}, "sport_type": sport_type, "start_date_local": start, **values}
+
+
+def test_rollup_key_truncates_to_local_day():
+    assert rollup_key(123, _document()) == {
+        "group_id": 123, "athlete_id": 7, "local_day": datetime(2025, 8, 1), "sport_type": "Run",
+    }
+
+
+def test_rollup_key_ignores_activities_without_athlete_or_date():
+    assert rollup_key(123, _document(start=None)) is None
+    assert rollup_key(123, {"start_date_local": datetime(2025, 8, 1)}) is None
+
+
+def test_rollup_values_default_missing_fields_to_zero():
+    assert rollup_values(_document(distance=5000.0)) == {
+        "distance": 5000.0, "moving_time": 0, "elapsed_time": 0, "total_elevation_gain": 0,
+    }
+
+
+@patch.object(StravaDailyRollup, "_get_collection")
+def test_apply_increments_with_one_bulk_write(mock_collection):
+    StravaDailyRollup().apply(123, [
+        _document(1, distance=5000.0, moving_time=1500),
+        _document(2, start=None),
+        _document(3, sport_type="Ride", distance=20000.0),
+    ])
+
+    operations = mock_collection.return_value.bulk_write.call_args.args[0]
+    assert len(operations) == 2
+    assert operations[0]._filter == {"group_id": 123, "athlete_id": 7, "local_day": datetime(2025, 8, 1), "sport_type": "Run"}
+    assert operations[0]._doc == {"$inc": {
+        "distance": 5000.0, "moving_time": 1500, "elapsed_time": 0, "total_elevation_gain": 0, "count": 1,
+    }}
+    assert operations[0]._upsert
+    mock_collection.return_value.delete_many.assert_not_called()
+
+
+@patch.object(StravaDailyRollup, "athlete_days")
+@patch("infrastructure.mongo.strava_daily_rollup.StravaStreak")
+@patch.object(StravaDailyRollup, "_get_collection")
+def test_apply_negative_decrements_and_drops_empty_days(mock_collection, mock_streak, mock_athlete_days):
+    mock_athlete_days.return_value = [datetime(2025, 7, 31)]
+
+    StravaDailyRollup().apply(123, [_document(1, distance=5000.0)], sign=-1)
+
+    operation = mock_collection.return_value.bulk_write.call_args.args[0][0]
+    assert operation._doc["$inc"]["count"] == -1
+    assert operation._doc["$inc"]["distance"] == -5000.0
+    mock_collection.return_value.delete_many.assert_called_once_with({"group_id": 123, "count": {"$lte": 0}})
+    mock_streak.return_value.recompute.assert_called_once_with(123, 7, [datetime(2025, 7, 31)])
+
+
+@patch("infrastructure.mongo.strava_daily_rollup.StravaStreak")
+@patch.object(StravaDailyRollup, "_get_collection")
+def test_apply_advances_streak_once_per_new_day(mock_collection, mock_streak):
+    mock_collection.return_value.bulk_write.return_value.upserted_ids = {0: "a", 1: "b", 2: "c"}
+
+    StravaDailyRollup().apply(123, [
+        _document(1, start=datetime(2025, 8, 2, 7, 0)),
+        _document(2, sport_type="Ride", start=datetime(2025, 8, 2, 18, 0)),
+        _document(3, start=datetime(2025, 8, 1, 7, 0)),
+        _document(4, start=datetime(2025, 8, 3, 7, 0)),
+    ])
+
+    advanced = [c.args[:3] for c in mock_streak.return_value.advance.call_args_list]
+    assert advanced == [(123, 7, datetime(2025, 8, 1)), (123, 7, datetime(2025, 8, 2))]
+
+
+@patch.object(StravaDailyRollup, "_get_collection")
+def test_apply_without_activities_does_nothing(mock_collection):
+    StravaDailyRollup().apply(123, [_document(start=None)])
+
+    mock_collection.return_value.bulk_write.assert_not_called()
+
+
+@patch("infrastructure.mongo.strava_daily_rollup.StravaStreak")
+@patch.object(StravaDailyRollup, "_get_collection")
+def test_rebuild_replaces_group_rows(mock_collection, mock_streak):
+    mock_collection.return_value.find.return_value = [
+        {"_id": "kept", "group_id": 123, "athlete_id": 7, "local_day": datetime(2025, 8, 1), "sport_type": "Run"},
+        {"_id": "stale", "group_id": 123, "athlete_id": 7, "local_day": datetime(2025, 7, 1), "sport_type": "Run"},
+    ]
+
+    rows = StravaDailyRollup().rebuild(123, [
+        _document(1, distance=1000.0),
+        _document(2, start=datetime(2025, 8, 1, 6, 0), distance=2000.0),
+        _document(3, start=datetime(2025, 8, 2, 6, 0), distance=4000.0),
+    ])
+
+    assert rows == 2
+    operations = mock_collection.return_value.bulk_write.call_args.args[0]
+    assert all(op._upsert for op in operations)
+    assert operations[0]._filter == {"group_id": 123, "athlete_id": 7, "local_day": datetime(2025, 8, 1), "sport_type": "Run"}
+    assert [(op._doc["local_day"].day, op._doc["count"], op._doc["distance"]) for op in operations] == [(1, 2, 3000.0), (2, 1, 4000.0)]
+    mock_collection.return_value.delete_many.assert_called_once_with({"_id": {"$in": ["stale"]}})
+    mock_collection.return_value.insert_many.assert_not_called()
+    mock_streak.return_value.rebuild.assert_called_once_with(123, {7: {datetime(2025, 8, 1), datetime(2025, 8, 2)}})
@@ -0,0 +1,205 @@
+import threading
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+mongomock = pytest.importorskip("mongomock")
+
+from mongoengine import connect, disconnect
+from infrastructure.mongo.strava_group import StravaGroup
+
+
+@pytest.fixture(autouse=True)
+def mongo():
+    connect("strava_bot_test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+    yield
+    StravaGroup.drop_collection()
+    disconnect()
+
+
+def test_backfill_medal_summaries_only_touches_groups_without_summary():
+    StravaGroup(telegram_group_id=1, medalhas={"2025-01": {"Run": {"Joao": 1}}}).save()
+    StravaGroup(telegram_group_id=2).save()
+    StravaGroup._get_collection().insert_one({"telegram_group_id": 3, "medalhas": {"2025-01": {"Run": {"Ana": 2}}}})
+
+    assert StravaGroup().backfill_medal_summaries() == 2
+    assert StravaGroup().backfill_medal_summaries() == 0
+
+    assert StravaGroup().get_group(1).medal_summary["Joao"]["sports"]["Run"]["1"] == 1
+    assert StravaGroup().get_group(2).medal_summary == {}
+    assert StravaGroup().get_group(3).medal_summary["Ana"]["total"]["points"] == 2
+
+
+def _apply_bulk(collection, operations, ordered=True):
+    # bulk_write do mongomock não aceita os argumentos do pymongo atual
+    for operation in operations:
+        collection.update_one(operation._filter, operation._doc)
+
+
+@patch.object(mongomock.collection.Collection, "bulk_write", autospec=True, side_effect=_apply_bulk)
+def test_award_month_writes_podiums_by_member_name_and_summary(mock_bulk_write):
+    membros = {"Joao": {"athlete_id": 1}, "Ana": {"athlete_id": 2}, "Rui": {"athlete_id": 3}}
+    StravaGroup(telegram_group_id=1, membros=membros, medalhas={"2025-07": {"Run": {"Ana": 1}}}).save()
+    StravaGroup(telegram_group_id=2, membros=membros).save()
+
+    awarded = StravaGroup().award_month("2025-08", {
+        1: {"Run": [2, 99, 1], "Ride": [3]},
+        2: {"Run": [99]},
+    })
+
+    assert awarded == 2
+    mock_bulk_write.assert_called_once()
+    group = StravaGroup().get_group(1)
+    assert group.medalhas == {"2025-07": {"Run": {"Ana": 1}}, "2025-08": {"Run": {"Ana": 1, "Joao": 2}, "Ride": {"Rui": 1}}}
+    assert group.medal_summary["Ana"]["total"] == {"1": 2, "2": 0, "3": 0, "points": 6}
+    assert StravaGroup().get_group(2).medalhas == {"2025-08": {}}
+
+
+@patch.object(mongomock.collection.Collection, "bulk_write", autospec=True, side_effect=_apply_bulk)
+def test_award_month_is_idempotent_and_replaces_the_month(mock_bulk_write):
+    StravaGroup(telegram_group_id=1, membros={"Joao": {"athlete_id": 1}, "Ana": {"athlete_id": 2}}).save()
+
+    StravaGroup().award_month("2025-08", {1: {"Run": [1, 2], "Ride": [1]}})
+    StravaGroup().award_month("2025-08", {1: {"Run": [2, 1]}})
+    first = StravaGroup().get_group(1)
+    StravaGroup().award_month("2025-08", {1: {"Run": [2, 1]}})
+    second = StravaGroup().get_group(1)
+
+    assert first.medalhas == second.medalhas == {"2025-08": {"Run": {"Ana": 1, "Joao": 2}}}
+    assert first.medal_summary == second.medal_summary
+    assert second.medal_summary["Joao"]["total"]["points"] == 2
+
+
+def _members(count):
+    # o $max do mongomock não compara com null (no MongoDB null é menor que qualquer data)
+    return {
+        f"Membro {index}": {"athlete_id": index, "access_token": "t", "refresh_token": "r", "last_activity_date": datetime(2024, 12, 1)}
+        for index in range(count)
+    }
+
+
+def test_member_updates_touch_only_their_fields():
+    StravaGroup(telegram_group_id=1, membros=_members(2), medalhas={"2025-01": {"Run": {"Membro 0": 1}}}).save()
+
+    assert StravaGroup().set_member_fields(1, "Membro 0", {"access_token": "novo", "expires_at": 10})
+    assert StravaGroup().advance_member_cursor(1, "Membro 1", datetime(2025, 1, 5))
+    assert StravaGroup().set_last_sync(1, datetime(2025, 1, 6))
+
+    group = StravaGroup().get_group(1)
+    assert group.membros["Membro 0"] == {
+        "athlete_id": 0, "access_token": "novo", "refresh_token": "r", "last_activity_date": datetime(2024, 12, 1), "expires_at": 10,
+    }
+    assert group.membros["Membro 1"]["last_activity_date"] == datetime(2025, 1, 5)
+    assert group.last_sync == datetime(2025, 1, 6)
+    assert group.medalhas == {"2025-01": {"Run": {"Membro 0": 1}}}
+
+
+def test_advance_member_cursor_never_moves_back_and_skips_removed_member():
+    StravaGroup(telegram_group_id=1, membros=_members(1)).save()
+
+    StravaGroup().advance_member_cursor(1, "Membro 0", datetime(2025, 1, 5))
+    StravaGroup().advance_member_cursor(1, "Membro 0", datetime(2025, 1, 3))
+    assert not StravaGroup().advance_member_cursor(1, "Removido", datetime(2025, 1, 5))
+    StravaGroup().reset_member_cursors(1, ["Membro 0"], datetime(2025, 1, 1))
+
+    group = StravaGroup().get_group(1)
+    assert group.membros["Membro 0"]["last_activity_date"] == datetime(2025, 1, 1)
+    assert "Removido" not in group.membros
+
+
+def test_reset_member_cursors_does_not_recreate_member_removed_concurrently():
+    StravaGroup(telegram_group_id=1, membros=_members(2)).save()
+    group = StravaGroup().get_group(1)
+    # o reset foi montado a partir de uma leitura anterior à remoção
+    StravaGroup().remove_member(group, "Membro 1")
+
+    assert StravaGroup().reset_member_cursors(1, list(group.membros), datetime(2025, 1, 1))
+
+    group = StravaGroup().get_group(1)
+    assert list(group.membros) == ["Membro 0"]
+    assert group.membros["Membro 0"]["last_activity_date"] == datetime(2025, 1, 1)
+    assert not StravaGroup().reset_member_cursors(1, ["Membro 1"], datetime(2025, 1, 1))
+
+
+def test_remove_member_unsets_member_and_medals():
+    StravaGroup(
+        telegram_group_id=1,
+        membros=_members(2),
+        medalhas={"2025-01": {"Run": {"Membro 0": 1, "Membro 1": 2}, "Ride": {"Membro 1": 1}}},
+        medal_summary={"Membro 0": {"total": {}}, "Membro 1": {"total": {}}},
+    ).save()
+
+    StravaGroup().remove_member(StravaGroup().get_group(1), "Membro 0")
+
+    group = StravaGroup().get_group(1)
+    assert list(group.membros) == ["Membro 1"]
+    assert group.medalhas == {"2025-01": {"Run": {"Membro 1": 2}, "Ride": {"Membro 1": 1}}}
+    assert list(group.medal_summary) == ["Membro 1"]
+
+
+def test_find_by_athlete_follows_member_link_and_unlink():
+    StravaGroup(telegram_group_id=1).save()
+    StravaGroup(telegram_group_id=2).save()
+    repo = StravaGroup()
+    repo.add_member(1, "Joao", {"athlete_id": 7, "access_token": "t"})
+    repo.add_member(2, "Joao", {"athlete_id": 7, "access_token": "t"})
+    repo.add_member(2, "Ana", {"athlete_id": 8, "access_token": "t"})
+
+    assert sorted(group.telegram_group_id for group in repo.find_by_athlete(7)) == [1, 2]
+
+    repo.remove_member(repo.get_group(2), "Joao")
+
+    assert [group.telegram_group_id for group in repo.find_by_athlete(7)] == [1]
+    assert repo.get_group(2).athlete_ids == [8]
+
+
+def test_backfill_athlete_ids_aligns_groups_with_their_members():
+    StravaGroup._get_collection().insert_one({"telegram_group_id": 1, "membros": _members(2)})
+    StravaGroup(telegram_group_id=2, membros=_members(1), athlete_ids=[0, 99]).save()
+
+    assert StravaGroup().backfill_athlete_ids() == 2
+    assert StravaGroup().backfill_athlete_ids() == 0
+
+    assert sorted(StravaGroup().get_group(1).athlete_ids) == [0, 1]
+    assert StravaGroup().get_group(2).athlete_ids == [0]
+
+
+def test_overlapping_syncs_do_not_lose_updates():
+    members = 20
+    StravaGroup(telegram_group_id=1, membros=_members(members)).save()
+    cursor = datetime(2025, 1, 1)
+    barrier = threading.Barrier(members * 2)
+
+    def sync(index, days):
+        barrier.wait()
+        repo = StravaGroup()
+        repo.set_member_fields(1, f"Membro {index}", {"access_token": f"token {index}"})
+        repo.advance_member_cursor(1, f"Membro {index}", cursor + timedelta(days=days))
+        repo.set_last_sync(1, cursor + timedelta(days=days))
+
+    # dois syncs por membro: um atual e um atrasado que termina depois com cursor antigo
+    threads = [threading.Thread(target=sync, args=(index, days)) for index in range(members) for days in (10, index % 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    group = StravaGroup().get_group(1)
+    for index in range(members):
+        assert group.membros[f"Membro {index}"]["access_token"] == f"token {index}"
+        assert group.membros[f"Membro {index}"]["last_activity_date"] == cursor + timedelta(days=10)
+        assert group.membros[f"Membro {index}"]["refresh_token"] == "r"
+
+
+@patch.object(StravaGroup, "_get_collection")
+def test_member_with_dotted_name_falls_back_to_pipeline_update(mock_collection):
+    mock_collection.return_value.update_one.return_value.matched_count = 1
+    StravaGroup().advance_member_cursor(1, "J. Silva", datetime(2025, 1, 5))
+
+    query, update = mock_collection.return_value.update_one.call_args.args
+    assert query["telegram_group_id"] == 1
+    assert "$expr" in query
+    assert isinstance(update, list)
+    set_field = update[0]["$set"]["membros"]["$setField"]
+    assert set_field["field"] == {"$literal": "J. Silva"}
+    assert set_field["input"] == "$membros"
@@ -0,0 +1,81 @@
+import pytest
+from datetime import datetime, timedelta
+
+mongomock = pytest.importorskip("mongomock")
+
+from mongoengine import connect, disconnect
+from infrastructure.mongo.strava_streak import StravaStreak
+
+DAY = datetime(2025, 8, 10)
+
+
+@pytest.fixture(autouse=True)
+def mongo(mongomock_bulk_write):
+    connect("strava_bot_test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+    StravaStreak.ensure_indexes()
+    yield
+    StravaStreak.drop_collection()
+    disconnect()
+
+
+def _state(athlete_id=1, group_id=123):
+    return StravaStreak.objects(group_id=group_id, athlete_id=athlete_id).first()
+
+
+def _no_recompute():
+    raise AssertionError("recálculo inesperado")
+
+
+def test_advance_builds_streak_day_by_day():
+    repo = StravaStreak()
+    for offset in range(3):
+        repo.advance(123, 1, DAY + timedelta(days=offset), _no_recompute)
+
+    state = _state()
+    assert (state.current, state.longest, state.last_day) == (3, 3, DAY + timedelta(days=2))
+
+
+def test_advance_gap_resets_current():
+    repo = StravaStreak()
+    repo.advance(123, 1, DAY, _no_recompute)
+    repo.advance(123, 1, DAY + timedelta(days=1), _no_recompute)
+    repo.advance(123, 1, DAY + timedelta(days=4), _no_recompute)
+
+    state = _state()
+    assert (state.current, state.longest) == (1, 2)
+
+
+def test_advance_out_of_order_day_recomputes_from_all_days():
+    repo = StravaStreak()
+    days = [DAY, DAY + timedelta(days=2)]
+    for day in days:
+        repo.advance(123, 1, day, _no_recompute)
+
+    days.append(DAY + timedelta(days=1))
+    repo.advance(123, 1, DAY + timedelta(days=1), lambda: days)
+
+    state = _state()
+    assert (state.current, state.longest, state.last_day) == (3, 3, DAY + timedelta(days=2))
+
+
+def test_recompute_without_days_removes_state():
+    repo = StravaStreak()
+    repo.advance(123, 1, DAY, _no_recompute)
+
+    repo.recompute(123, 1, [])
+
+    assert _state() is None
+
+
+def test_current_and_longest_streaks_are_per_group():
+    repo = StravaStreak()
+    repo.rebuild(123, {
+        1: [DAY - timedelta(days=offset) for offset in range(90)],
+        2: [DAY, DAY - timedelta(days=1)] + [DAY - timedelta(days=offset) for offset in range(10, 130)],
+        3: [DAY - timedelta(days=1)],
+    })
+    repo.rebuild(456, {1: [DAY]})
+
+    assert repo.current_streaks(123, DAY) == [(1, 90), (2, 2)]
+    assert repo.longest_streaks(123) == [(2, 120), (1, 90), (3, 1)]
+    assert repo.longest_streaks(123, limit=1) == [(2, 120)]
@@ -0,0 +1,52 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+
+mongomock = pytest.importorskip("mongomock")
+
+from mongoengine import connect, disconnect
+from infrastructure.mongo.strava_sync_lease import StravaSyncLease, utcnow
+
+TTL = timedelta(minutes=10)
+
+
+@pytest.fixture(autouse=True)
+def mongo():
+    connect("strava_bot_test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+    StravaSyncLease.ensure_indexes()
+    yield
+    StravaSyncLease.drop_collection()
+    disconnect()
+
+
+def test_only_one_owner_holds_the_lease():
+    repo = StravaSyncLease()
+
+    assert repo.acquire(1, "processo-a", TTL)
+    assert not repo.acquire(1, "processo-b", TTL)
+    assert repo.acquire(1, "processo-a", TTL)
+    assert repo.acquire(2, "processo-b", TTL)
+    assert repo.is_held(1)
+
+
+def test_release_only_by_owner():
+    repo = StravaSyncLease()
+    repo.acquire(1, "processo-a", TTL)
+
+    repo.release(1, "processo-b")
+    assert not repo.acquire(1, "processo-b", TTL)
+
+    repo.release(1, "processo-a")
+    assert not repo.is_held(1)
+    assert repo.acquire(1, "processo-b", TTL)
+
+
+def test_expired_lease_is_taken_over():
+    repo = StravaSyncLease()
+    repo.acquire(1, "processo-morto", TTL)
+
+    with patch("infrastructure.mongo.strava_sync_lease.utcnow", return_value=utcnow() + TTL + timedelta(seconds=1)):
+        assert not repo.is_held(1)
+        assert repo.acquire(1, "processo-b", TTL)
+
+    assert StravaSyncLease._get_collection().find_one({"group_id": 1})["owner"] == "processo-b"
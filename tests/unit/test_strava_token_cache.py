@@ -0,0 +1,148 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from adapters.strava_token_cache import StravaTokenCache
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _client(expires_at):
+    client = MagicMock()
+    client.refresh_access_token.side_effect = lambda refresh_token: {
+        "access_token": f"access-{client.refresh_access_token.call_count}",
+        "refresh_token": f"refresh-{client.refresh_access_token.call_count}",
+        "expires_at": expires_at,
+    }
+    return client
+
+
+def _member(expires_at, access_token="old", refresh_token="ref"):
+    return {"access_token": access_token, "refresh_token": refresh_token, "expires_at": expires_at}
+
+
+def test_valid_token_is_not_refreshed():
+    clock = FakeClock()
+    client = _client(clock.now + 21600)
+    cache = StravaTokenCache(margin_seconds=600, clock=clock)
+
+    tokens, refreshed = cache.get_valid(1, _member(clock.now + 3600), client)
+
+    assert tokens["access_token"] == "old"
+    assert not refreshed
+    client.refresh_access_token.assert_not_called()
+
+
+def test_token_refreshed_ahead_of_expiry():
+    clock = FakeClock()
+    client = _client(clock.now + 21600)
+    cache = StravaTokenCache(margin_seconds=600, clock=clock)
+
+    tokens, refreshed = cache.get_valid(1, _member(clock.now + 300), client)
+
+    assert refreshed
+    assert tokens == {"access_token": "access-1", "refresh_token": "refresh-1", "expires_at": clock.now + 21600}
+
+
+def test_legacy_member_without_expires_at_is_not_refreshed():
+    client = _client(None)
+    cache = StravaTokenCache()
+
+    tokens, refreshed = cache.get_valid(1, _member(None), client)
+
+    assert not refreshed
+    assert tokens["access_token"] == "old"
+
+
+def test_cached_token_shared_between_groups():
+    clock = FakeClock()
+    client = _client(clock.now + 21600)
+    cache = StravaTokenCache(margin_seconds=600, clock=clock)
+    stale = _member(clock.now + 300)
+
+    cache.get_valid(1, dict(stale), client)
+    tokens, refreshed = cache.get_valid(1, dict(stale), client)
+
+    assert not refreshed
+    assert tokens["access_token"] == "access-1"
+    assert client.refresh_access_token.call_count == 1
+
+
+def test_concurrent_syncs_refresh_once():
+    clock = FakeClock()
+    client = MagicMock()
+
+    def slow_refresh(refresh_token):
+        time.sleep(0.05)
+        return {"access_token": "new", "refresh_token": "new-ref", "expires_at": clock.now + 21600}
+
+    client.refresh_access_token.side_effect = slow_refresh
+    cache = StravaTokenCache(margin_seconds=600, clock=clock)
+    stale = _member(clock.now + 60)
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_valid(1, dict(stale), client)[0]))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.refresh_access_token.call_count == 1
+    assert {tokens["access_token"] for tokens in results} == {"new"}
+
+
+def test_force_refresh_reuses_token_already_replaced():
+    clock = FakeClock()
+    client = _client(clock.now + 21600)
+    cache = StravaTokenCache(clock=clock)
+    rejected = _member(None, access_token="rejected")
+
+    first, first_called = cache.force_refresh(1, rejected, client)
+    second, second_called = cache.force_refresh(1, rejected, client)
+
+    assert first_called and not second_called
+    assert second["access_token"] == first["access_token"]
+    assert client.refresh_access_token.call_count == 1
+
+
+def test_refresh_batch_only_expiring_and_staggered():
+    clock = FakeClock()
+    client = _client(clock.now + 21600)
+    cache = StravaTokenCache(clock=clock)
+    sleep = MagicMock()
+
+    refreshed = cache.refresh_batch(
+        [
+            (1, _member(clock.now + 600, refresh_token="r1")),
+            (2, _member(clock.now + 7200, refresh_token="r2")),
+            (3, _member(clock.now + 60, refresh_token="r3")),
+        ],
+        client,
+        horizon_seconds=1800,
+        stagger_seconds=0.5,
+        sleep=sleep,
+    )
+
+    assert set(refreshed) == {1, 3}
+    assert [c.args[0] for c in client.refresh_access_token.call_args_list] == ["r3", "r1"]
+    sleep.assert_called_once_with(0.5)
+
+
+def test_refresh_batch_skips_failures():
+    clock = FakeClock()
+    client = MagicMock()
+    client.refresh_access_token.side_effect = Exception("400")
+    cache = StravaTokenCache(clock=clock)
+
+    refreshed = cache.refresh_batch([(1, _member(clock.now + 60))], client, sleep=MagicMock())
+
+    assert refreshed == {}
@@ -0,0 +1,154 @@
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from requests import HTTPError
+
+from adapters.strava_budget import StravaBudget
+from adapters.strava_client import StravaClient
+from adapters.strava_transport import RateLimitState, StravaTransport
+
+
+class FakeStrava:
+    """Servidor HTTP local que simula a API do Strava com respostas roteirizadas."""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        self.client_ports = set()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                fake.requests.append((self.command, self.path))
+                fake.client_ports.add(self.client_address[1])
+                status, body, headers = fake.responses.pop(0) if fake.responses else (200, [], {})
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _reply
+            do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_strava():
+    with FakeStrava() as fake:
+        yield fake
+
+
+def _client(fake, **transport_kwargs):
+    transport_kwargs.setdefault("backoff_base", 0.001)
+    transport = StravaTransport(**transport_kwargs)
+    return StravaClient(
+        transport=transport,
+        base_url=f"{fake.url}/api/v3",
+        oauth_url=f"{fake.url}/oauth/token",
+        budget=StravaBudget(),
+    )
+
+
+def test_retries_on_5xx_then_succeeds(fake_strava):
+    fake_strava.responses = [
+        (502, {}, {}),
+        (503, {}, {}),
+        (200, [{"id": 1}], {}),
+    ]
+
+    result = _client(fake_strava).fetch_activities("tok", datetime(2025, 8, 1))
+
+    assert result == [{"id": 1}]
+    assert len(fake_strava.requests) == 3
+
+
+def test_retries_on_429_honoring_retry_after(fake_strava):
+    fake_strava.responses = [
+        (429, {}, {"Retry-After": "0"}),
+        (200, {"access_token": "a", "refresh_token": "r"}, {}),
+    ]
+
+    result = _client(fake_strava).refresh_access_token("old")
+
+    assert result["access_token"] == "a"
+    assert fake_strava.requests == [("POST", fake_strava.requests[0][1])] * 2
+
+
+def test_gives_up_after_max_retries(fake_strava):
+    fake_strava.responses = [(500, {}, {})] * 3
+
+    with pytest.raises(HTTPError):
+        _client(fake_strava, max_retries=2).fetch_activities("tok", datetime(2025, 8, 1))
+
+    assert len(fake_strava.requests) == 3
+
+
+def test_does_not_retry_on_401(fake_strava):
+    fake_strava.responses = [(401, {}, {})]
+
+    with pytest.raises(HTTPError):
+        _client(fake_strava).fetch_activities("tok", datetime(2025, 8, 1))
+
+    assert len(fake_strava.requests) == 1
+
+
+def test_parses_rate_limit_headers(fake_strava):
+    fake_strava.responses = [
+        (200, [], {"X-RateLimit-Limit": "100,1000", "X-RateLimit-Usage": "42,310"}),
+    ]
+    client = _client(fake_strava)
+
+    client.fetch_activities("tok", datetime(2025, 8, 1))
+
+    assert client.rate_limit.short_limit == 100
+    assert client.rate_limit.daily_limit == 1000
+    assert client.rate_limit.short_remaining == 58
+    assert client.rate_limit.daily_remaining == 690
+
+
+def test_reuses_pooled_connection(fake_strava):
+    client = _client(fake_strava)
+
+    for _ in range(3):
+        client.fetch_activities("tok", datetime(2025, 8, 1))
+
+    assert len(fake_strava.requests) == 3
+    assert len(fake_strava.client_ports) == 1
+
+
+def test_rate_limit_state_ignores_invalid_header():
+    state = RateLimitState()
+    state.update({"X-RateLimit-Usage": "garbage"})
+    assert state.short_remaining is None
+    assert state.updated_at is None
+
+
+def test_backoff_is_bounded():
+    transport = StravaTransport(backoff_base=1, backoff_max=4)
+    assert all(0 <= transport.backoff(attempt) <= 4 for attempt in range(10))
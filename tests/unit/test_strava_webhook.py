@@ -0,0 +1,73 @@
+import json
+import queue
+import urllib.error
+import urllib.request
+
+import pytest
+
+from adapters.strava_webhook import StravaWebhookServer
+
+
+@pytest.fixture
+def webhook():
+    server = StravaWebhookServer("verify-me", queue.Queue(), host="127.0.0.1", port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return response.status, json.loads(response.read())
+
+
+def _post_event(url, event):
+    request = urllib.request.Request(
+        url, data=json.dumps(event).encode(), headers={"Content-Type": "application/json"}, method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.status
+
+
+def test_subscription_validation_echoes_challenge(webhook):
+    status, body = _get(f"{webhook.url}?hub.mode=subscribe&hub.verify_token=verify-me&hub.challenge=15f7d1a91c1f40f8a748fd134752feb3")
+
+    assert status == 200
+    assert body == {"hub.challenge": "15f7d1a91c1f40f8a748fd134752feb3"}
+
+
+def test_subscription_validation_rejects_wrong_token(webhook):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        _get(f"{webhook.url}?hub.mode=subscribe&hub.verify_token=wrong&hub.challenge=abc")
+
+    assert error.value.code == 403
+
+
+def test_events_are_queued(webhook):
+    events = [
+        {"aspect_type": "create", "object_type": "activity", "object_id": 1360128428, "owner_id": 134815, "event_time": 1516126040},
+        {"aspect_type": "update", "object_type": "activity", "object_id": 1360128428, "owner_id": 134815, "updates": {"title": "Messy"}},
+        {"aspect_type": "delete", "object_type": "activity", "object_id": 1360128428, "owner_id": 134815},
+    ]
+
+    for event in events:
+        assert _post_event(webhook.url, event) == 200
+
+    assert [webhook.events.get(timeout=1) for _ in events] == events
+
+
+def test_invalid_payload_is_rejected(webhook):
+    request = urllib.request.Request(webhook.url, data=b"not json", method="POST")
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request, timeout=5)
+
+    assert error.value.code == 400
+    assert webhook.events.empty()
+
+
+def test_unknown_path_returns_404(webhook):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        _get(webhook.url.replace("/strava/webhook", "/other"))
+
+    assert error.value.code == 404
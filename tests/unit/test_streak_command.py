@@ -1,17 +1,17 @@
-from unittest.mock import patch, MagicMock
-from datetime import datetime, timedelta
-from application.commands.streak import handle_streak_command
-from tests.unit.conftest import MockActivity, make_group
+from unittest.mock import patch
+from datetime import datetime
+from application.commands.streak import handle_max_streak_command, handle_streak_command
+from tests.unit.conftest import make_group
 
 TODAY = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
 
 
-@patch("application.commands.streak.sync_all_activities")
-@patch("application.commands.streak.StravaActivity")
+@patch("application.commands.streak.ensure_fresh")
+@patch("application.commands.streak.StravaStreak")
 @patch("application.commands.streak.StravaGroup")
-def test_streak_no_activity_today(mock_group_repo, mock_activity_repo, mock_sync):
+def test_streak_no_activity_today(mock_group_repo, mock_streak_repo, mock_ensure_fresh):
     mock_group_repo.return_value.get_group.return_value = make_group()
-    mock_activity_repo.return_value.get_activities.return_value = []
+    mock_streak_repo.return_value.current_streaks.return_value = []
 
     result = handle_streak_command(123)
 
@@ -19,26 +19,43 @@ def test_streak_no_activity_today(mock_group_repo, mock_activity_repo, mock_sync
 
 
 @patch("application.commands.streak.create_rank")
-@patch("application.commands.streak.StreakService")
-@patch("application.commands.streak.sync_all_activities")
-@patch("application.commands.streak.StravaActivity")
+@patch("application.commands.streak.ensure_fresh")
+@patch("application.commands.streak.StravaStreak")
 @patch("application.commands.streak.StravaGroup")
-def test_streak_calls_streak_service_with_active_members(
-    mock_group_repo, mock_activity_repo, mock_sync, mock_streak_service, mock_create_rank
-):
+def test_streak_reads_current_streaks_of_today(mock_group_repo, mock_streak_repo, mock_ensure_fresh, mock_create_rank):
     group = make_group()
     mock_group_repo.return_value.get_group.return_value = group
-
-    today_activity = MagicMock()
-    today_activity.__getitem__ = lambda self, k: {"athlete": {"id": 1}}[k]
-    mock_activity_repo.return_value.get_activities.side_effect = [
-        [today_activity],
-        [MockActivity(1, TODAY)],
-    ]
-    mock_streak_service.return_value.calculate.return_value = [(1, 5)]
+    mock_streak_repo.return_value.current_streaks.return_value = [(1, 75), (2, 3)]
     mock_create_rank.return_value = "streak_rank"
 
     result = handle_streak_command(123)
 
     assert result == "streak_rank"
-    mock_streak_service.assert_called_once()
+    mock_streak_repo.return_value.current_streaks.assert_called_once_with(123, TODAY)
+    mock_create_rank.assert_called_once_with("Sequencia de dias ativos", [(1, 75), (2, 3)], group)
+
+
+@patch("application.commands.streak.create_rank")
+@patch("application.commands.streak.ensure_fresh")
+@patch("application.commands.streak.StravaStreak")
+@patch("application.commands.streak.StravaGroup")
+def test_max_streak_reads_longest_streaks(mock_group_repo, mock_streak_repo, mock_ensure_fresh, mock_create_rank):
+    group = make_group()
+    mock_group_repo.return_value.get_group.return_value = group
+    mock_streak_repo.return_value.longest_streaks.return_value = [(2, 120), (1, 30)]
+    mock_create_rank.return_value = "max_rank"
+
+    result = handle_max_streak_command(123)
+
+    assert result == "max_rank"
+    mock_create_rank.assert_called_once_with("Maiores sequencias de dias ativos", [(2, 120), (1, 30)], group)
+
+
+@patch("application.commands.streak.ensure_fresh")
+@patch("application.commands.streak.StravaStreak")
+@patch("application.commands.streak.StravaGroup")
+def test_max_streak_without_history(mock_group_repo, mock_streak_repo, mock_ensure_fresh):
+    mock_group_repo.return_value.get_group.return_value = make_group()
+    mock_streak_repo.return_value.longest_streaks.return_value = []
+
+    assert handle_max_streak_command(123) == "Nenhuma atividade registrada."
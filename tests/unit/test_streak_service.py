@@ -1,60 +1,45 @@
 from datetime import datetime, timedelta
-from domain.services.streak_service import StreakService
-from tests.unit.conftest import MockActivity
+from domain.services.streak_service import advance_streak, streak_from_days
 
 
-def _iso(delta_days: int = 0) -> str:
-    return (datetime.now() - timedelta(days=delta_days)).replace(
-        hour=10, minute=0, second=0, microsecond=0
-    ).isoformat()
+DAY = datetime(2025, 8, 10)
 
 
-def test_streak_consecutive_days():
-    activities = [
-        MockActivity(1, _iso(0)),
-        MockActivity(1, _iso(1)),
-        MockActivity(1, _iso(2)),
-    ]
-    result = StreakService(activities).calculate()
-    assert result == [(1, 3)]
+def test_advance_streak_starts_new_state():
+    assert advance_streak(None, DAY) == {"current": 1, "last_day": DAY, "longest": 1, "longest_end": DAY}
 
 
-def test_streak_gap_breaks_streak():
-    activities = [
-        MockActivity(1, _iso(0)),
-        MockActivity(1, _iso(2)),
-    ]
-    result = StreakService(activities).calculate()
-    assert result == [(1, 1)]
+def test_advance_streak_consecutive_day_extends():
+    state = advance_streak(advance_streak(None, DAY), DAY + timedelta(days=1))
+    assert state["current"] == 2
+    assert state["longest"] == 2
+    assert state["longest_end"] == DAY + timedelta(days=1)
 
 
-def test_streak_no_activity_today_excluded():
-    activities = [
-        MockActivity(1, _iso(1)),
-        MockActivity(1, _iso(2)),
-    ]
-    result = StreakService(activities).calculate()
-    assert result == []
+def test_advance_streak_gap_resets_current_keeps_longest():
+    state = streak_from_days([DAY, DAY + timedelta(days=1), DAY + timedelta(days=2)])
+    state = advance_streak(state, DAY + timedelta(days=5))
+    assert state["current"] == 1
+    assert state["longest"] == 3
+    assert state["longest_end"] == DAY + timedelta(days=2)
 
 
-def test_streak_sorted_descending():
-    activities = [
-        MockActivity(1, _iso(0)),
-        MockActivity(2, _iso(0)),
-        MockActivity(2, _iso(1)),
-        MockActivity(2, _iso(2)),
-    ]
-    result = StreakService(activities).calculate()
-    assert result[0] == (2, 3)
-    assert result[1] == (1, 1)
+def test_advance_streak_same_day_is_noop():
+    state = advance_streak(None, DAY)
+    assert advance_streak(state, DAY) == state
 
 
-def test_streak_multiple_activities_same_day_count_as_one():
-    activities = [MockActivity(1, _iso(0)) for _ in range(3)]
-    result = StreakService(activities).calculate()
-    assert result == [(1, 1)]
+def test_advance_streak_out_of_order_needs_recompute():
+    state = advance_streak(None, DAY)
+    assert advance_streak(state, DAY - timedelta(days=1)) is None
 
 
-def test_streak_empty_activities():
-    result = StreakService([]).calculate()
-    assert result == []
+def test_streak_from_days_is_not_capped():
+    days = [DAY - timedelta(days=offset) for offset in range(400)]
+    state = streak_from_days(days)
+    assert state["current"] == 400
+    assert state["last_day"] == DAY
+
+
+def test_streak_from_days_empty():
+    assert streak_from_days([]) is None
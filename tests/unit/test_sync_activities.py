@@ -1,8 +1,26 @@
+import threading
+import time
 import pytest
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
 from requests import HTTPError
-from application.sync_activities import sync_all_activities
+from adapters.strava_budget import PRIORITY_HIGH, PRIORITY_LOW, BudgetExhausted
+from adapters.strava_token_cache import StravaTokenCache
+from application.sync_activities import LEASE_TTL, group_flights, sync_all_activities, sync_athletes
+
+
+@pytest.fixture(autouse=True)
+def sync_lease():
+    with patch("application.sync_activities.StravaSyncLease") as mock_lease_repo:
+        mock_lease_repo.return_value.acquire.return_value = True
+        yield mock_lease_repo.return_value
+
+
+@pytest.fixture(autouse=True)
+def token_cache():
+    cache = StravaTokenCache()
+    with patch("application.sync_activities.default_token_cache", cache):
+        yield cache
 
 
 def _mock_group(last_sync=None, membros=None):
@@ -27,7 +45,9 @@ def test_sync_saves_all_activities(mock_group_repo, mock_activity_repo, mock_str
 
     sync_all_activities(group_id=123)
 
-    assert mock_activity_repo.return_value.save_activity.call_count == 2
+    saved = [c.args for c in mock_activity_repo.return_value.save_activities.call_args_list]
+    assert sorted(activity["id"] for _, activities in saved for activity in activities) == ["a1", "b1"]
+    assert all(group_id == 123 for group_id, _ in saved)
 
 
 @patch("application.sync_activities.StravaClient")
@@ -74,21 +94,112 @@ def test_sync_refreshes_token_on_401(mock_group_repo, mock_activity_repo, mock_s
     sync_all_activities(group_id=123)
 
     mock_strava_client.return_value.refresh_access_token.assert_called_once_with("ref1")
-    assert mock_activity_repo.return_value.save_activity.call_count == 1
+    mock_activity_repo.return_value.save_activities.assert_called_once()
 
 
 @patch("application.sync_activities.StravaClient")
 @patch("application.sync_activities.StravaActivity")
 @patch("application.sync_activities.StravaGroup")
-def test_sync_raises_on_non_401_error(mock_group_repo, mock_activity_repo, mock_strava_client):
+def test_sync_records_non_401_error(mock_group_repo, mock_activity_repo, mock_strava_client):
     mock_group_repo.return_value.get_group.return_value = _mock_group(membros={
         "user1": {"access_token": "tok", "refresh_token": "ref", "last_activity_date": None}
     })
     http_500 = HTTPError(response=MagicMock(status_code=500))
     mock_strava_client.return_value.fetch_activities.side_effect = http_500
 
-    with pytest.raises(HTTPError):
-        sync_all_activities(group_id=123)
+    results = sync_all_activities(group_id=123)
+
+    assert results[0].error is http_500
+    assert not results[0].ok
+    mock_strava_client.return_value.refresh_access_token.assert_not_called()
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_records_budget_exhausted_as_member_error(mock_group_repo, mock_activity_repo, mock_strava_client):
+    mock_group_repo.return_value.get_group.return_value = _mock_group(membros={
+        "user1": {"access_token": "tok", "refresh_token": "ref", "last_activity_date": None}
+    })
+    mock_strava_client.return_value.fetch_activities.side_effect = BudgetExhausted("sem orçamento")
+
+    results = sync_all_activities(group_id=123)
+
+    assert isinstance(results[0].error, BudgetExhausted)
+    mock_group_repo.return_value.advance_member_cursor.assert_not_called()
+    mock_group_repo.return_value.set_last_sync.assert_called_once()
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_failing_member_does_not_block_others(mock_group_repo, mock_activity_repo, mock_strava_client):
+    group = _mock_group()
+    mock_group_repo.return_value.get_group.return_value = group
+
+    def fetch(access_token, after, page=1, per_page=200, priority=0):
+        if access_token == "tok1":
+            raise HTTPError(response=MagicMock(status_code=503))
+        return [{"id": "b1", "start_date_local": "2025-01-02T12:00:00Z"}]
+
+    mock_strava_client.return_value.fetch_activities.side_effect = fetch
+
+    results = {result.member_name: result for result in sync_all_activities(group_id=123)}
+
+    assert not results["user1"].ok
+    assert results["user2"].ok
+    assert results["user2"].fetched == 1
+    assert group.membros["user2"]["last_activity_date"] == datetime(2025, 1, 2, 12, 0, 0)
+    assert group.membros["user1"]["last_activity_date"] is None
+    mock_group_repo.return_value.advance_member_cursor.assert_called_once_with(123, "user2", datetime(2025, 1, 2, 12, 0, 0))
+    mock_group_repo.return_value.set_last_sync.assert_called_once()
+    group.save.assert_not_called()
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_unexpected_member_error_does_not_abort_group(mock_group_repo, mock_activity_repo, mock_strava_client):
+    group = _mock_group()
+    mock_group_repo.return_value.get_group.return_value = group
+
+    def fetch(access_token, after, page=1, per_page=200, priority=0):
+        if access_token == "tok1":
+            return [{"id": "a1"}]
+        return [{"id": "b1", "start_date_local": "2025-01-02T12:00:00Z"}]
+
+    mock_strava_client.return_value.fetch_activities.side_effect = fetch
+
+    results = {result.member_name: result for result in sync_all_activities(group_id=123)}
+
+    assert isinstance(results["user1"].error, KeyError)
+    assert results["user2"].ok
+    mock_activity_repo.return_value.save_activities.assert_called_once_with(123, [{"id": "b1", "start_date_local": "2025-01-02T12:00:00Z"}])
+    mock_group_repo.return_value.advance_member_cursor.assert_called_once_with(123, "user2", datetime(2025, 1, 2, 12, 0, 0))
+    mock_group_repo.return_value.set_last_sync.assert_called_once()
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_follows_pagination_until_short_page(mock_group_repo, mock_activity_repo, mock_strava_client):
+    mock_group_repo.return_value.get_group.return_value = _mock_group(membros={
+        "user1": {"access_token": "tok1", "refresh_token": "ref1", "last_activity_date": None}
+    })
+    full_page = [{"id": i, "start_date_local": "2025-01-01T12:00:00Z"} for i in range(200)]
+    short_page = [{"id": 200, "start_date_local": "2025-01-02T12:00:00Z"}]
+    mock_strava_client.return_value.fetch_activities.side_effect = [full_page, short_page]
+
+    results = sync_all_activities(group_id=123)
+
+    pages = [c.kwargs["page"] for c in mock_strava_client.return_value.fetch_activities.call_args_list]
+    assert pages == [1, 2]
+    assert all(c.kwargs["per_page"] == 200 for c in mock_strava_client.return_value.fetch_activities.call_args_list)
+    assert results[0].pages == 2
+    assert results[0].fetched == 201
+    assert results[0].latency >= 0
+    mock_activity_repo.return_value.save_activities.assert_called_once()
+    assert len(mock_activity_repo.return_value.save_activities.call_args.args[1]) == 201
 
 
 @patch("application.sync_activities.StravaClient")
@@ -106,7 +217,7 @@ def test_sync_updates_last_activity_date(mock_group_repo, mock_activity_repo, mo
 
     sync_all_activities(group_id=123)
 
-    assert group.membros["user1"]["last_activity_date"] == "2025-01-05T12:00:00Z"
+    assert group.membros["user1"]["last_activity_date"] == datetime(2025, 1, 5, 12, 0, 0)
 
 
 @patch("application.sync_activities.StravaClient")
@@ -121,5 +232,267 @@ def test_sync_skips_member_with_no_activities(mock_group_repo, mock_activity_rep
 
     sync_all_activities(group_id=123)
 
-    mock_activity_repo.return_value.save_activity.assert_not_called()
-    group.save.assert_called_once()
+    mock_activity_repo.return_value.save_activities.assert_not_called()
+    mock_group_repo.return_value.advance_member_cursor.assert_not_called()
+    mock_group_repo.return_value.set_last_sync.assert_called_once()
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_uses_low_priority_for_backfill(mock_group_repo, mock_activity_repo, mock_strava_client):
+    mock_group_repo.return_value.get_group.return_value = _mock_group(membros={
+        "recent": {"access_token": "tok1", "refresh_token": "ref1", "last_activity_date": None},
+        "reset": {"access_token": "tok2", "refresh_token": "ref2", "last_activity_date": datetime.now() - timedelta(days=30)},
+    })
+    mock_strava_client.return_value.fetch_activities.return_value = []
+
+    sync_all_activities(group_id=123)
+
+    mock_strava_client.assert_called_once()
+    assert mock_strava_client.call_args.kwargs["group_id"] == 123
+    # espera por orçamento limitada ao tempo da lease
+    assert 0 < mock_strava_client.call_args.kwargs["deadline"] - time.monotonic() <= LEASE_TTL.total_seconds()
+    priorities = {
+        c.args[0]: c.kwargs["priority"] for c in mock_strava_client.return_value.fetch_activities.call_args_list
+    }
+    assert priorities == {"tok1": PRIORITY_HIGH, "tok2": PRIORITY_LOW}
+
+
+def _athlete_groups():
+    return {
+        1: _mock_group(membros={
+            "Joao": {"athlete_id": 10, "access_token": "tokJ", "refresh_token": "refJ", "last_activity_date": datetime(2025, 1, 3)},
+            "Maria": {"athlete_id": 20, "access_token": "tokM", "refresh_token": "refM", "last_activity_date": None},
+        }),
+        2: _mock_group(membros={
+            "Joao": {"athlete_id": 10, "access_token": "tokJ", "refresh_token": "refJ", "last_activity_date": datetime(2025, 1, 1)},
+        }),
+    }
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_athletes_fetches_shared_athlete_once(mock_group_repo, mock_activity_repo, mock_strava_client):
+    groups = _athlete_groups()
+    mock_group_repo.return_value.get_group.side_effect = groups.get
+    mock_strava_client.return_value.fetch_activities.side_effect = lambda token, after, **kwargs: (
+        [{"id": "j1", "start_date_local": "2025-01-05T12:00:00Z"}] if token == "tokJ" else []
+    )
+
+    report = sync_athletes([1, 2])
+
+    tokens = [c.args[0] for c in mock_strava_client.return_value.fetch_activities.call_args_list]
+    assert sorted(tokens) == ["tokJ", "tokM"]
+    joao_after = next(c.args[1] for c in mock_strava_client.return_value.fetch_activities.call_args_list if c.args[0] == "tokJ")
+    assert joao_after == datetime(2025, 1, 1)
+    saved_groups = sorted(c.args[0] for c in mock_activity_repo.return_value.save_activities.call_args_list)
+    assert saved_groups == [1, 2]
+    assert report.athletes == 2
+    assert report.memberships == 3
+    assert report.calls_made == 2
+    assert report.calls_saved == 1
+    assert report.group_fetched == {1: 1, 2: 1}
+    for group in groups.values():
+        assert group.membros["Joao"]["last_activity_date"] == datetime(2025, 1, 5, 12, 0, 0)
+        group.save.assert_not_called()
+    cursors = sorted(c.args[:2] for c in mock_group_repo.return_value.advance_member_cursor.call_args_list)
+    assert cursors == [(1, "Joao"), (2, "Joao")]
+    assert sorted(c.args[0] for c in mock_group_repo.return_value.set_last_sync.call_args_list) == [1, 2]
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_athletes_empty_cursor_does_not_skip_older_cursor(mock_group_repo, mock_activity_repo, mock_strava_client):
+    reset_cursor = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=17)
+    groups = {
+        1: _mock_group(membros={"Joao": {"athlete_id": 10, "access_token": "tokJ", "refresh_token": "refJ", "last_activity_date": None}}),
+        2: _mock_group(membros={"Joao": {"athlete_id": 10, "access_token": "tokJ", "refresh_token": "refJ", "last_activity_date": reset_cursor}}),
+    }
+    mock_group_repo.return_value.get_group.side_effect = groups.get
+    mock_strava_client.return_value.fetch_activities.return_value = []
+
+    sync_athletes([1, 2])
+
+    call = mock_strava_client.return_value.fetch_activities.call_args
+    assert call.args[1] == reset_cursor
+    assert call.kwargs["priority"] == PRIORITY_LOW
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_athletes_propagates_refreshed_token(mock_group_repo, mock_activity_repo, mock_strava_client):
+    groups = _athlete_groups()
+    mock_group_repo.return_value.get_group.side_effect = groups.get
+    http_401 = HTTPError(response=MagicMock(status_code=401))
+
+    def fetch(token, after, **kwargs):
+        if token == "tokJ":
+            raise http_401
+        return []
+
+    mock_strava_client.return_value.fetch_activities.side_effect = fetch
+    mock_strava_client.return_value.refresh_access_token.return_value = {"access_token": "newJ", "refresh_token": "newRefJ"}
+
+    sync_athletes([1, 2])
+
+    mock_strava_client.return_value.refresh_access_token.assert_called_once_with("refJ")
+    assert groups[1].membros["Joao"]["access_token"] == "newJ"
+    assert groups[2].membros["Joao"]["refresh_token"] == "newRefJ"
+    written = {c.args[:2]: c.args[2] for c in mock_group_repo.return_value.set_member_fields.call_args_list}
+    assert written[(1, "Joao")]["access_token"] == "newJ"
+    assert written[(2, "Joao")]["access_token"] == "newJ"
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_athletes_skips_recently_synced_groups(mock_group_repo, mock_activity_repo, mock_strava_client):
+    mock_group_repo.return_value.get_group.return_value = _mock_group(last_sync=datetime.now())
+
+    report = sync_athletes([1])
+
+    assert report.athletes == 0
+    mock_strava_client.return_value.fetch_activities.assert_not_called()
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_refreshes_expiring_token_before_fetch(mock_group_repo, mock_activity_repo, mock_strava_client):
+    group = _mock_group(membros={
+        "user1": {"athlete_id": 1, "access_token": "old", "refresh_token": "ref1", "expires_at": time.time() + 60, "last_activity_date": None}
+    })
+    mock_group_repo.return_value.get_group.return_value = group
+    mock_strava_client.return_value.fetch_activities.return_value = []
+    mock_strava_client.return_value.refresh_access_token.return_value = {
+        "access_token": "new", "refresh_token": "ref2", "expires_at": time.time() + 21600,
+    }
+
+    results = sync_all_activities(group_id=123)
+
+    mock_strava_client.return_value.refresh_access_token.assert_called_once_with("ref1")
+    assert mock_strava_client.return_value.fetch_activities.call_args.args[0] == "new"
+    assert group.membros["user1"]["access_token"] == "new"
+    assert group.membros["user1"]["expires_at"] > time.time() + 3600
+    assert results[0].calls == 2
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_athletes_batch_refreshes_expiring_tokens(mock_group_repo, mock_activity_repo, mock_strava_client):
+    expiring = time.time() + 600
+    groups = _athlete_groups()
+    for group in groups.values():
+        group.membros["Joao"]["expires_at"] = expiring
+    mock_group_repo.return_value.get_group.side_effect = groups.get
+    mock_strava_client.return_value.fetch_activities.return_value = []
+    mock_strava_client.return_value.refresh_access_token.return_value = {
+        "access_token": "newJ", "refresh_token": "newRefJ", "expires_at": time.time() + 21600,
+    }
+
+    with patch("adapters.strava_token_cache.time.sleep"):
+        sync_athletes([1, 2])
+
+    mock_strava_client.return_value.refresh_access_token.assert_called_once_with("refJ")
+    assert groups[1].membros["Joao"]["access_token"] == "newJ"
+    assert groups[2].membros["Joao"]["access_token"] == "newJ"
+
+
+@patch("application.sync_activities.default_response_cache")
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_bumps_cache_only_when_activities_change(mock_group_repo, mock_activity_repo, mock_strava_client, mock_cache):
+    mock_group_repo.return_value.get_group.return_value = _mock_group()
+    mock_strava_client.return_value.fetch_activities.return_value = [{"id": "a1", "start_date_local": "2025-01-02T12:00:00Z"}]
+    mock_activity_repo.return_value.save_activities.side_effect = [
+        {"inserted": 0, "updated": 0, "skipped": 1, "flagged": 0},
+        {"inserted": 1, "updated": 0, "skipped": 0, "flagged": 0},
+    ]
+
+    sync_all_activities(group_id=123, max_workers=1)
+
+    mock_cache.bump.assert_called_once_with(123)
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_concurrent_syncs_of_same_group_are_coalesced(mock_group_repo, mock_activity_repo, mock_strava_client):
+    mock_group_repo.return_value.get_group.return_value = _mock_group()
+    fetching = threading.Event()
+    release = threading.Event()
+
+    def fetch(*args, **kwargs):
+        fetching.set()
+        release.wait(5)
+        return []
+
+    mock_strava_client.return_value.fetch_activities.side_effect = fetch
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sync_all_activities(group_id=123))) for _ in range(3)]
+    threads[0].start()
+    fetching.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while group_flights.coalesced < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert mock_strava_client.return_value.fetch_activities.call_count == 2
+    assert len(results) == 3
+    assert results[0] is results[1] is results[2]
+
+
+@patch("application.sync_activities.LEASE_POLL_SECONDS", 0)
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_waits_for_lease_held_by_other_process(mock_group_repo, mock_activity_repo, mock_strava_client, sync_lease):
+    mock_group_repo.return_value.get_group.return_value = _mock_group()
+    sync_lease.acquire.return_value = False
+    sync_lease.is_held.side_effect = [True, True, False]
+
+    assert sync_all_activities(group_id=123) == []
+
+    mock_strava_client.return_value.fetch_activities.assert_not_called()
+    assert sync_lease.is_held.call_count == 3
+    sync_lease.release.assert_not_called()
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_rereads_group_after_taking_lease(mock_group_repo, mock_activity_repo, mock_strava_client, sync_lease):
+    mock_group_repo.return_value.get_group.side_effect = [_mock_group(), _mock_group(last_sync=datetime.now())]
+
+    assert sync_all_activities(group_id=123) == []
+
+    mock_strava_client.return_value.fetch_activities.assert_not_called()
+    owner = sync_lease.acquire.call_args.args[1]
+    sync_lease.release.assert_called_once_with(123, owner)
+
+
+@patch("application.sync_activities.StravaClient")
+@patch("application.sync_activities.StravaActivity")
+@patch("application.sync_activities.StravaGroup")
+def test_sync_athletes_skips_groups_leased_elsewhere(mock_group_repo, mock_activity_repo, mock_strava_client, sync_lease):
+    groups = _athlete_groups()
+    mock_group_repo.return_value.get_group.side_effect = groups.get
+    sync_lease.acquire.side_effect = lambda group_id, owner, ttl: group_id == 1
+    mock_strava_client.return_value.fetch_activities.return_value = []
+
+    report = sync_athletes([1, 2])
+
+    assert report.memberships == 2
+    mock_group_repo.return_value.get_group.assert_called_once_with(1)
+    sync_lease.release.assert_called_once()
+    assert sync_lease.release.call_args.args[0] == 1
@@ -0,0 +1,117 @@
+from unittest.mock import patch, MagicMock
+from datetime import datetime, timedelta
+from application.sync_scheduler import SyncScheduler, ensure_fresh
+
+NOW = datetime(2025, 8, 1, 12, 0, 0)
+
+
+def _report(group_fetched=None):
+    report = MagicMock()
+    report.group_fetched = group_fetched or {}
+    return report
+
+
+@patch("application.sync_scheduler.sync_athletes")
+@patch("application.sync_scheduler.StravaGroup")
+def test_run_once_syncs_all_new_groups(mock_group_repo, mock_sync):
+    mock_group_repo.return_value.list_group_ids.return_value = [1, 2]
+    mock_sync.return_value = _report()
+
+    synced = SyncScheduler().run_once(NOW)
+
+    assert set(synced) == {1, 2}
+    mock_sync.assert_called_once_with(synced)
+
+
+@patch("application.sync_scheduler.sync_athletes")
+@patch("application.sync_scheduler.StravaGroup")
+def test_run_once_prioritizes_recently_active_groups(mock_group_repo, mock_sync):
+    mock_group_repo.return_value.list_group_ids.return_value = [1, 2, 3]
+    mock_sync.return_value = _report()
+    scheduler = SyncScheduler()
+    scheduler.touch(3, NOW - timedelta(hours=2))
+    scheduler.touch(2, NOW - timedelta(minutes=1))
+
+    synced = scheduler.run_once(NOW)
+
+    assert synced == [2, 3, 1]
+    mock_sync.assert_called_once_with([2, 3, 1])
+
+
+@patch("application.sync_scheduler.sync_athletes")
+@patch("application.sync_scheduler.StravaGroup")
+def test_groups_are_rescheduled_by_activity(mock_group_repo, mock_sync):
+    mock_group_repo.return_value.list_group_ids.return_value = [1, 2]
+    mock_sync.side_effect = lambda group_ids: _report({1: 3, 2: 0})
+    scheduler = SyncScheduler(active_interval=timedelta(minutes=5), idle_interval=timedelta(hours=1))
+    scheduler.run_once(NOW)
+
+    assert scheduler.run_once(NOW + timedelta(minutes=1)) == []
+    assert scheduler.run_once(NOW + timedelta(minutes=6)) == [1]
+    assert scheduler.run_once(NOW + timedelta(minutes=61)) == [1, 2]
+
+
+@patch("application.sync_scheduler.sync_athletes")
+@patch("application.sync_scheduler.StravaGroup")
+def test_touch_brings_idle_group_forward(mock_group_repo, mock_sync):
+    mock_group_repo.return_value.list_group_ids.return_value = [1]
+    mock_sync.return_value = _report()
+    scheduler = SyncScheduler(active_interval=timedelta(minutes=5), idle_interval=timedelta(hours=1))
+    scheduler.run_once(NOW)
+
+    scheduler.touch(1, NOW + timedelta(minutes=10))
+
+    assert scheduler.run_once(NOW + timedelta(minutes=16)) == [1]
+
+
+@patch("application.sync_scheduler.sync_athletes")
+@patch("application.sync_scheduler.StravaGroup")
+def test_run_once_survives_sync_error(mock_group_repo, mock_sync):
+    mock_group_repo.return_value.list_group_ids.return_value = [1, 2]
+    mock_sync.side_effect = Exception("mongo down")
+    scheduler = SyncScheduler()
+
+    assert scheduler.run_once(NOW) == [1, 2]
+    assert scheduler.run_once(NOW + timedelta(minutes=1)) == []
+
+
+@patch("application.sync_scheduler.sync_all_activities")
+def test_ensure_fresh_without_bound_reads_stored_data(mock_sync):
+    ensure_fresh(123, max_age=None)
+
+    mock_sync.assert_not_called()
+
+
+@patch("application.sync_scheduler.sync_all_activities")
+def test_ensure_fresh_syncs_with_freshness_bound(mock_sync):
+    ensure_fresh(123, max_age=timedelta(minutes=30))
+
+    mock_sync.assert_called_once_with(123, min_interval=timedelta(minutes=30))
+
+
+@patch("application.sync_scheduler.award_month")
+def test_award_closed_month_runs_once_per_day(mock_award_month):
+    scheduler = SyncScheduler()
+
+    assert scheduler.award_closed_month(NOW) == "2025-07"
+    assert scheduler.award_closed_month(NOW + timedelta(hours=1)) is None
+    assert scheduler.award_closed_month(NOW + timedelta(days=1)) == "2025-07"
+
+    assert mock_award_month.call_count == 2
+    mock_award_month.assert_called_with("2025-07")
+
+
+@patch("application.sync_scheduler.award_month")
+def test_award_closed_month_backs_off_after_failures(mock_award_month):
+    scheduler = SyncScheduler()
+    mock_award_month.side_effect = RuntimeError("mongo fora")
+
+    assert scheduler.award_closed_month(NOW) is None
+    assert scheduler.award_closed_month(NOW + timedelta(seconds=5)) is None
+    assert scheduler.award_closed_month(NOW + timedelta(minutes=1)) is None
+    assert scheduler.award_closed_month(NOW + timedelta(minutes=2)) is None
+    assert mock_award_month.call_count == 2
+
+    mock_award_month.side_effect = None
+    assert scheduler.award_closed_month(NOW + timedelta(minutes=3)) == "2025-07"
+    assert mock_award_month.call_count == 3
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+from telebot import types
+
+from application.commands.rank import RANK_FAILED, RANK_PLACEHOLDER
+
+# o módulo conecta ao MongoDB ao ser importado; os testes com mongomock registram a própria conexão
+with patch("mongoengine.connect"):
+    from adapters.telegram import telegram_bot
+
+
+def _callback(data, chat_id=-100, message_id=42):
+    return types.CallbackQuery.de_json({
+        "id": "cb1",
+        "from": {"id": 1, "is_bot": False, "first_name": "Joao"},
+        "chat_instance": "x",
+        "data": data,
+        "message": {"message_id": message_id, "date": 0, "chat": {"id": chat_id, "type": "group"}},
+    })
+
+
+@pytest.fixture
+def bot():
+    events = MagicMock()
+    with patch.object(telegram_bot.bot, "answer_callback_query", events.answer), \
+         patch.object(telegram_bot.bot, "edit_message_text", events.edit), \
+         patch.object(telegram_bot.bot, "send_message", events.send):
+        yield events
+
+
+@patch("adapters.telegram.telegram_bot.handle_rank_month_command")
+def test_rank_callback_acknowledges_then_edits_menu_in_place(mock_rank, bot):
+    def render(group_id, sport_type):
+        # o botão já foi respondido e o menu virou o aviso antes do cálculo
+        assert bot.mock_calls == [call.answer("cb1"), call.edit(RANK_PLACEHOLDER, -100, 42)]
+        return "ranking"
+
+    mock_rank.side_effect = render
+
+    telegram_bot.rank_month_callback_handler(_callback("rank_Run"))
+
+    mock_rank.assert_called_once_with(-100, "Run")
+    assert bot.mock_calls[-1] == call.edit("ranking", -100, 42, parse_mode="HTML", disable_web_page_preview=True)
+    bot.send.assert_not_called()
+
+
+@patch("adapters.telegram.telegram_bot.handle_rank_year_command")
+def test_year_rank_callback_uses_year_handler(mock_rank, bot):
+    mock_rank.return_value = "ranking anual"
+
+    telegram_bot.rank_year_callback_handler(_callback("yrank_Ride"))
+
+    mock_rank.assert_called_once_with(-100, "Ride")
+    assert bot.mock_calls[-1] == call.edit("ranking anual", -100, 42, parse_mode="HTML", disable_web_page_preview=True)
+
+
+@patch("adapters.telegram.telegram_bot.handle_rank_month_command")
+def test_rank_callback_replaces_placeholder_when_render_fails(mock_rank, bot):
+    mock_rank.side_effect = RuntimeError("mongo fora")
+
+    telegram_bot.rank_month_callback_handler(_callback("rank_Run"))
+
+    assert bot.mock_calls[-1] == call.edit(RANK_FAILED, -100, 42, parse_mode="HTML", disable_web_page_preview=True)
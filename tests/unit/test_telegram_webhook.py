@@ -0,0 +1,81 @@
+import json
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock
+
+import pytest
+
+from adapters.telegram.telegram_webhook import SECRET_HEADER, TelegramWebhookServer
+
+# update real do Telegram (IDs trocados) para um /rank em grupo
+RANK_UPDATE = {
+    "update_id": 862012345,
+    "message": {
+        "message_id": 4211,
+        "from": {"id": 123456789, "is_bot": False, "first_name": "Joao", "language_code": "pt-br"},
+        "chat": {"id": -1001234567890, "title": "Corredores", "type": "supergroup"},
+        "date": 1754049600,
+        "text": "/rank",
+        "entities": [{"offset": 0, "length": 5, "type": "bot_command"}],
+    },
+}
+
+
+@pytest.fixture
+def on_updates():
+    return MagicMock()
+
+
+@pytest.fixture
+def webhook(on_updates):
+    server = TelegramWebhookServer("s3cr3t", on_updates, host="127.0.0.1", port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def _post(url, body, secret="s3cr3t"):
+    headers = {"Content-Type": "application/json"}
+    if secret is not None:
+        headers[SECRET_HEADER] = secret
+    request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_recorded_update_is_handed_to_pipeline(webhook, on_updates):
+    assert _post(webhook.url, json.dumps(RANK_UPDATE).encode()) == 200
+
+    updates = on_updates.call_args.args[0]
+    assert len(updates) == 1
+    assert updates[0].update_id == 862012345
+    assert updates[0].message.chat.id == -1001234567890
+    assert updates[0].message.text == "/rank"
+
+
+def test_rejects_missing_or_wrong_secret(webhook, on_updates):
+    assert _post(webhook.url, json.dumps(RANK_UPDATE).encode(), secret=None) == 403
+    assert _post(webhook.url, json.dumps(RANK_UPDATE).encode(), secret="errado") == 403
+    assert _post(webhook.url, json.dumps(RANK_UPDATE).encode(), secret="s3cr3té") == 403
+    on_updates.assert_not_called()
+
+
+def test_rejects_bad_payload_and_unknown_path(webhook, on_updates):
+    assert _post(webhook.url, b"{nao e json") == 400
+    assert _post(webhook.url, b"[]") == 400
+    assert _post(webhook.url.replace("/telegram/webhook", "/outro"), json.dumps(RANK_UPDATE).encode()) == 404
+    on_updates.assert_not_called()
+
+
+def test_acknowledges_even_if_pipeline_fails(webhook, on_updates):
+    on_updates.side_effect = RuntimeError("fila indisponível")
+
+    assert _post(webhook.url, json.dumps(RANK_UPDATE).encode()) == 200
+
+
+def test_requires_secret_token():
+    with pytest.raises(ValueError):
+        TelegramWebhookServer("", MagicMock(), host="127.0.0.1", port=0)
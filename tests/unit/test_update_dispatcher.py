@@ -0,0 +1,136 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from telebot import types
+
+from adapters.telegram.outbound_queue import PRIORITY_INTERACTIVE
+from adapters.telegram.update_dispatcher import BUSY_MESSAGE, DispatchingTeleBot, UpdateDispatcher, update_chat_id
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return condition()
+
+
+def _update(update_id, chat_id, text="/rank"):
+    return types.Update.de_json({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "group"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Joao"},
+            "text": text,
+        },
+    })
+
+
+def _callback_update(update_id, chat_id):
+    return types.Update.de_json({
+        "update_id": update_id,
+        "callback_query": {
+            "id": "cb1",
+            "from": {"id": 1, "is_bot": False, "first_name": "Joao"},
+            "chat_instance": "x",
+            "data": "rank_Run",
+            "message": {"message_id": 1, "date": 0, "chat": {"id": chat_id, "type": "group"}},
+        },
+    })
+
+
+def test_update_chat_id_for_messages_and_callbacks():
+    assert update_chat_id(_update(1, -100)) == -100
+    assert update_chat_id(_callback_update(2, -200)) == -200
+    assert update_chat_id(types.Update.de_json({"update_id": 3})) is None
+
+
+def test_updates_of_same_chat_run_in_order_and_chats_run_in_parallel():
+    release = threading.Event()
+    handled = []
+
+    def handle(update):
+        if update.chat == "lento":
+            release.wait(5)
+        handled.append((update.chat, update.seq))
+
+    dispatcher = UpdateDispatcher(handle, workers=2)
+    dispatcher.submit("lento", SimpleNamespace(chat="lento", seq=0))
+    for seq in range(5):
+        dispatcher.submit("rapido", SimpleNamespace(chat="rapido", seq=seq))
+        dispatcher.submit("lento", SimpleNamespace(chat="lento", seq=seq + 1))
+
+    assert _wait_until(lambda: len(handled) == 5)
+    assert handled == [("rapido", seq) for seq in range(5)]
+    assert dispatcher.gauges() == {"queue_depth": 5, "in_flight": 1, "chats": 1, "shed": 0}
+
+    release.set()
+    assert _wait_until(lambda: len(handled) == 11)
+    assert [seq for chat, seq in handled if chat == "lento"] == list(range(6))
+    dispatcher.shutdown()
+    assert dispatcher.gauges() == {"queue_depth": 0, "in_flight": 0, "chats": 0, "shed": 0}
+
+
+def test_backlog_over_limit_is_shed_with_busy_callback():
+    release = threading.Event()
+    on_busy = MagicMock()
+    dispatcher = UpdateDispatcher(lambda update: release.wait(5), workers=1, max_backlog=2, on_busy=on_busy)
+
+    accepted = [dispatcher.submit(0, "update 0")]
+    _wait_until(lambda: dispatcher.gauges()["in_flight"] == 1)
+    accepted += [dispatcher.submit(chat_id, f"update {chat_id}") for chat_id in (1, 2, 3)]
+
+    assert accepted == [True, True, True, False]
+    assert dispatcher.gauges() == {"queue_depth": 2, "in_flight": 1, "chats": 3, "shed": 1}
+    on_busy.assert_called_once_with("update 3")
+    assert dispatcher.gauges()["shed"] == 1
+    release.set()
+    dispatcher.shutdown()
+
+
+def test_handler_error_does_not_stop_the_chat_queue():
+    handled = []
+
+    def handle(update):
+        if update == "quebra":
+            raise RuntimeError("falhou")
+        handled.append(update)
+
+    dispatcher = UpdateDispatcher(handle, workers=1)
+    dispatcher.submit(1, "quebra")
+    dispatcher.submit(1, "segue")
+    dispatcher.shutdown()
+
+    assert handled == ["segue"]
+
+
+def test_dispatching_bot_routes_updates_and_replies_busy_to_commands():
+    bot = DispatchingTeleBot("123:abc", workers=1, max_backlog=0)
+    bot.queue_message = MagicMock()
+    bot.answer_callback_query = MagicMock()
+    bot.outbound = MagicMock()
+
+    bot.process_new_updates([_update(1, -100), _update(2, -100, text="bom treino"), _callback_update(3, -100)])
+
+    bot.queue_message.assert_called_once_with(-100, BUSY_MESSAGE, priority=PRIORITY_INTERACTIVE)
+    bot.answer_callback_query.assert_not_called()
+    chat_id, answer, priority = bot.outbound.submit.call_args.args
+    assert (chat_id, priority) == (-100, PRIORITY_INTERACTIVE)
+    answer()
+    bot.answer_callback_query.assert_called_once_with("cb1", BUSY_MESSAGE)
+    assert bot.dispatcher.gauges()["shed"] == 3
+
+
+def test_dispatching_bot_runs_registered_handlers_on_workers():
+    bot = DispatchingTeleBot("123:abc", workers=2)
+    seen = []
+    bot.message_handler(commands=["rank"])(lambda message: seen.append((message.chat.id, threading.current_thread().name)))
+
+    bot.process_new_updates([_update(1, -100), _update(2, -200)])
+    bot.dispatcher.shutdown()
+
+    assert sorted(chat_id for chat_id, _ in seen) == [-200, -100]
+    assert all(name.startswith("telegram-update") for _, name in seen)
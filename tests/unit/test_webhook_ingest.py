@@ -0,0 +1,162 @@
+import queue
+from unittest.mock import patch, MagicMock
+
+from requests import HTTPError
+
+from adapters.strava_budget import BudgetExhausted
+from adapters.strava_token_cache import StravaTokenCache
+from application.webhook_ingest import WebhookIngestor
+from tests.unit.conftest import make_group
+
+
+def _group(group_id):
+    group = make_group()
+    group.telegram_group_id = group_id
+    return group
+
+
+def _event(aspect_type, object_type="activity"):
+    return {"aspect_type": aspect_type, "object_type": object_type, "object_id": 99, "owner_id": 1}
+
+
+def _ingestor():
+    return WebhookIngestor(queue.Queue(), token_cache=StravaTokenCache())
+
+
+@patch("application.webhook_ingest.StravaClient")
+@patch("application.webhook_ingest.StravaActivity")
+@patch("application.webhook_ingest.StravaGroup")
+def test_create_fetches_once_and_saves_to_every_group(mock_group_repo, mock_activity_repo, mock_strava_client):
+    groups = [_group(10), _group(20)]
+    mock_group_repo.return_value.find_by_athlete.return_value = groups
+    mock_strava_client.return_value.fetch_activity.return_value = {"id": 99}
+
+    _ingestor().handle(_event("create"))
+
+    mock_strava_client.return_value.fetch_activity.assert_called_once_with("tok1", 99)
+    saved = [c.args for c in mock_activity_repo.return_value.save_activities.call_args_list]
+    assert saved == [(10, [{"id": 99}]), (20, [{"id": 99}])]
+    mock_activity_repo.return_value.remove_activity.assert_not_called()
+
+
+@patch("application.webhook_ingest.StravaClient")
+@patch("application.webhook_ingest.StravaActivity")
+@patch("application.webhook_ingest.StravaGroup")
+def test_budget_exhausted_skips_event_without_saving(mock_group_repo, mock_activity_repo, mock_strava_client):
+    groups = [_group(10)]
+    mock_group_repo.return_value.find_by_athlete.return_value = groups
+    mock_strava_client.return_value.fetch_activity.side_effect = BudgetExhausted("sem orçamento")
+
+    _ingestor().handle(_event("create"))
+
+    mock_activity_repo.return_value.save_activities.assert_not_called()
+
+
+@patch("application.webhook_ingest.StravaClient")
+@patch("application.webhook_ingest.StravaActivity")
+@patch("application.webhook_ingest.StravaGroup")
+def test_update_upserts_stored_activity(mock_group_repo, mock_activity_repo, mock_strava_client):
+    groups = [_group(10)]
+    mock_group_repo.return_value.find_by_athlete.return_value = groups
+    mock_strava_client.return_value.fetch_activity.return_value = {"id": 99}
+
+    _ingestor().handle(_event("update"))
+
+    mock_activity_repo.return_value.remove_activity.assert_not_called()
+    mock_activity_repo.return_value.save_activities.assert_called_once()
+
+
+@patch("application.webhook_ingest.StravaClient")
+@patch("application.webhook_ingest.StravaActivity")
+@patch("application.webhook_ingest.StravaGroup")
+def test_delete_removes_without_fetching(mock_group_repo, mock_activity_repo, mock_strava_client):
+    mock_group_repo.return_value.find_by_athlete.return_value = [_group(10), _group(20)]
+
+    _ingestor().handle(_event("delete"))
+
+    mock_strava_client.return_value.fetch_activity.assert_not_called()
+    removed = [c.args for c in mock_activity_repo.return_value.remove_activity.call_args_list]
+    assert removed == [(10, 99), (20, 99)]
+
+
+@patch("application.webhook_ingest.StravaClient")
+@patch("application.webhook_ingest.StravaActivity")
+@patch("application.webhook_ingest.StravaGroup")
+def test_refreshes_token_on_401(mock_group_repo, mock_activity_repo, mock_strava_client):
+    group = _group(10)
+    mock_group_repo.return_value.find_by_athlete.return_value = [group]
+    mock_strava_client.return_value.fetch_activity.side_effect = [
+        HTTPError(response=MagicMock(status_code=401)),
+        {"id": 99},
+    ]
+    mock_strava_client.return_value.refresh_access_token.return_value = {"access_token": "new", "refresh_token": "ref"}
+
+    _ingestor().handle(_event("create"))
+
+    assert group.membros["Joao"]["access_token"] == "new"
+    group_id, member_name, tokens = mock_group_repo.return_value.set_member_fields.call_args.args
+    assert (group_id, member_name, tokens["access_token"]) == (10, "Joao", "new")
+    group.save.assert_not_called()
+    mock_activity_repo.return_value.save_activities.assert_called_once()
+
+
+@patch("application.webhook_ingest.StravaClient")
+@patch("application.webhook_ingest.StravaActivity")
+@patch("application.webhook_ingest.StravaGroup")
+def test_refreshed_token_is_saved_to_every_group(mock_group_repo, mock_activity_repo, mock_strava_client):
+    other = make_group(membros={"Joao Silva": {"athlete_id": 1, "access_token": "tok1", "refresh_token": "ref1"}})
+    other.telegram_group_id = 20
+    mock_group_repo.return_value.find_by_athlete.return_value = [_group(10), other]
+    mock_strava_client.return_value.fetch_activity.side_effect = [
+        HTTPError(response=MagicMock(status_code=401)),
+        {"id": 99},
+    ]
+    mock_strava_client.return_value.refresh_access_token.return_value = {"access_token": "new", "refresh_token": "newref"}
+
+    _ingestor().handle(_event("create"))
+
+    saved = [(c.args[0], c.args[1], c.args[2]["refresh_token"]) for c in mock_group_repo.return_value.set_member_fields.call_args_list]
+    assert saved == [(10, "Joao", "newref"), (20, "Joao Silva", "newref")]
+    assert other.membros["Joao Silva"]["refresh_token"] == "newref"
+
+
+@patch("application.webhook_ingest.StravaClient")
+@patch("application.webhook_ingest.StravaActivity")
+@patch("application.webhook_ingest.StravaGroup")
+def test_member_missing_from_group_skips_event(mock_group_repo, mock_activity_repo, mock_strava_client):
+    group = make_group(membros={"Outro": {"athlete_id": 5, "access_token": "t", "refresh_token": "r"}})
+    group.telegram_group_id = 10
+    mock_group_repo.return_value.find_by_athlete.return_value = [group]
+
+    _ingestor().handle(_event("create"))
+
+    mock_strava_client.return_value.fetch_activity.assert_not_called()
+    mock_activity_repo.return_value.save_activities.assert_not_called()
+
+
+@patch("application.webhook_ingest.StravaActivity")
+@patch("application.webhook_ingest.StravaGroup")
+def test_ignores_unknown_athlete_and_non_activity_events(mock_group_repo, mock_activity_repo):
+    mock_group_repo.return_value.find_by_athlete.return_value = []
+    ingestor = _ingestor()
+
+    ingestor.handle(_event("create"))
+    ingestor.handle({"aspect_type": "update", "object_type": "athlete", "object_id": 1, "updates": {"authorized": "false"}})
+
+    mock_activity_repo.return_value.save_activities.assert_not_called()
+    mock_group_repo.return_value.find_by_athlete.assert_called_once_with(1)
+
+
+@patch("application.webhook_ingest.StravaActivity")
+@patch("application.webhook_ingest.StravaGroup")
+def test_worker_drains_queue(mock_group_repo, mock_activity_repo):
+    mock_group_repo.return_value.find_by_athlete.return_value = [_group(10)]
+    events = queue.Queue()
+    ingestor = WebhookIngestor(events)
+    ingestor.start()
+
+    events.put(_event("delete"))
+    events.join()
+    ingestor.stop(timeout=2)
+
+    mock_activity_repo.return_value.remove_activity.assert_called_once_with(10, 99)